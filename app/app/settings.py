@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,14 +47,30 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'core.middleware.BrowserMiddleware',
+]
+
+# Run by core.middleware.BrowserMiddleware for BROWSER_PATH_PREFIXES
+# only; API requests authenticate with tokens and skip them.
+BROWSER_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+BROWSER_PATH_PREFIXES = ['/admin/', '/api/docs/']
+# The admin looks for its middleware in MIDDLEWARE only; core.checks
+# checks BROWSER_MIDDLEWARE instead.
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
+
+# Admin sessions are read from the cache and written through to the
+# database, so they survive a cache restart.
+SESSION_ENGINE = os.environ.get(
+    'SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
 
 ROOT_URLCONF = 'app.urls'
 
@@ -86,6 +103,44 @@ DATABASES = {
     }
 }
 
+# Read replicas, as a comma separated list of database files. Product,
+# tag, category and wishlist reads go to them; see core.replicas.
+for number, name in enumerate(
+        filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')),
+        start=1):
+    DATABASES[f'replica_{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+# After a write, a user reads from the primary for this many seconds.
+# Pins are kept in REPLICA_PIN_CACHE, which must be shared by all
+# workers (CACHE_URL) when there are replicas; see core.E003.
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_CACHE = 'default'
+
+# Caches: with CACHE_URL (redis://host:6379/0) all workers share one
+# Redis cache; without it each process has its own memory cache, which
+# is only right for a single process. The tag and category name cache,
+# the category tree and replica write pins rely on the shared cache to
+# reach every worker.
+CACHE_URL = os.environ.get('CACHE_URL', '')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -105,6 +160,56 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing: PASSWORD_HASHER picks the algorithm used for new
+# hashes; the others stay listed so existing hashes still verify and are
+# upgraded on the next login. 'argon2' needs argon2-cffi and 'bcrypt'
+# needs bcrypt installed; see core.E004.
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'core.hashers.PBKDF2PasswordHasher',
+    'argon2': 'core.hashers.Argon2PasswordHasher',
+    'bcrypt': 'core.hashers.BCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items()
+    if name != PASSWORD_HASHER
+]
+PASSWORD_HASHER_OPTIONS = {
+    'pbkdf2': {
+        'iterations': int(
+            os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 1_000_000)),
+    },
+    'argon2': {
+        'time_cost': int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2)),
+        'memory_cost': int(
+            os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 102400)),
+        'parallelism': int(
+            os.environ.get('PASSWORD_ARGON2_PARALLELISM', 8)),
+    },
+    'bcrypt': {
+        'rounds': int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 12)),
+    },
+}
+# Hashing runs on a bounded pool; requests wait up to the timeout for a
+# slot and then get a 503.
+PASSWORD_HASH_WORKERS = int(
+    os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+PASSWORD_HASH_QUEUE_SIZE = 64
+PASSWORD_HASH_QUEUE_TIMEOUT = 5
+
+STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY', '')
+STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET', '')
+
+# 'db' issues database tokens; 'signed' issues stateless signed access
+# and refresh tokens. Both kinds are accepted in either mode.
+AUTH_TOKEN_MODE = os.environ.get('AUTH_TOKEN_MODE', 'db')
+# Reads with a signed access token are not checked against the user
+# table, so a deactivated user can read for up to this many seconds.
+SIGNED_TOKEN_ACCESS_LIFETIME = 5 * 60
+SIGNED_TOKEN_REFRESH_LIFETIME = 7 * 24 * 60 * 60
+# Seconds between reloads of the revoked token list in each process.
+SIGNED_TOKEN_REVOCATION_REFRESH = 30
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
@@ -127,6 +232,17 @@ MEDIA_URL = 'static/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+# Product image renditions: name -> longest edge in pixels.
+PRODUCT_IMAGE_RENDITIONS = {
+    'thumbnail': 200,
+    'medium': 800,
+}
+# Renditions have content-hashed names so they can be cached for a year.
+PRODUCT_IMAGE_CACHE_MAX_AGE = 60 * 60 * 24 * 365
+# Resumable image uploads are streamed to disk in chunks of this size.
+PRODUCT_IMAGE_MAX_UPLOAD_SIZE = 25 * 1024 * 1024
+PRODUCT_IMAGE_UPLOAD_CHUNK_SIZE = 64 * 1024
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -136,10 +252,65 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'EXCEPTION_HANDLER': 'core.views.exception_handler',
+    'DEFAULT_THROTTLE_CLASSES': ['core.throttling.BucketRateThrottle'],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '60/min',
+        'user': '600/min',
+        'products': '600/min',
+        'auth': '30/min',
+    },
+    # Proxies in front of the app that append to X-Forwarded-For.
+    # Anonymous clients are throttled by the address the last of them
+    # saw; with 0 it is REMOTE_ADDR, and a client cannot pick its own.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
 }
 
+# 'local' keeps rate limits per process; 'cache' also counts requests in
+# THROTTLE_CACHE, which should be a cache shared by all workers.
+THROTTLE_BACKEND = os.environ.get('THROTTLE_BACKEND', 'local')
+THROTTLE_CACHE = 'default'
+
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
 
+# Render product tags and categories from the arrays denormalized on
+# Product instead of joining the M2M tables.
+PRODUCT_DENORMALIZED_LABELS = True
+# Stock movements returned by GET /products/<id>/inventory/.
+INVENTORY_HISTORY_LIMIT = 100
+
+# Most entries returned by one page of the catalog change feed.
+CHANGE_FEED_PAGE_SIZE = 10_000
+
+# Most levels in the category tree, and seconds a built tree is cached.
+CATEGORY_MAX_DEPTH = 20
+CATEGORY_TREE_CACHE_TIMEOUT = 60 * 60
+
+# Tag and category names whose ids each process keeps in memory.
+PRODUCT_LABEL_CACHE_SIZE = 10_000
+
+# Background jobs (core.jobs): 'database' queues them for the run_jobs
+# worker, 'local' runs each in-process when its transaction commits.
+JOB_BACKEND = os.environ.get('JOB_BACKEND', 'database')
+# Jobs a worker runs at a time, and seconds it waits when none is due.
+JOB_CONCURRENCY = int(os.environ.get('JOB_CONCURRENCY', 4))
+JOB_POLL_INTERVAL = 1
+# Attempts per job; retries wait JOB_RETRY_DELAY seconds, doubling.
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_DELAY = 10
+# Seconds after which a running job is assumed lost and retried.
+JOB_TIMEOUT = 10 * 60
+# Seconds finished jobs are kept.
+JOB_RETENTION = 7 * 24 * 60 * 60
+# Finished jobs the wait and run time metrics are computed from.
+JOB_METRICS_SAMPLE = 1000
+
+# Generated OpenAPI schemas, one file per source version.
+API_SCHEMA_CACHE_DIR = BASE_DIR / 'schema_cache'
+
+# Fraction of requests that record query counts and timings.
+INSTRUMENTATION_SAMPLE_RATE = 0.01
+
 
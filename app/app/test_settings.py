@@ -0,0 +1,54 @@
+"""
+Settings for running the test suite.
+
+    python manage.py test --settings=app.test_settings --parallel auto
+
+The test database is an in-memory SQLite database whose tables are
+created straight from the models instead of replaying every migration;
+set TEST_MIGRATE=1 to run the migrations as well. Set TEST_DB_NAME to a
+file name to keep the database between runs with --keepdb.
+"""
+import os
+import tempfile
+
+from app.settings import *  # noqa: F401,F403
+from app.settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'TEST': {
+            'NAME': os.environ.get('TEST_DB_NAME'),
+            'MIGRATE': os.environ.get('TEST_MIGRATE') == '1',
+        },
+    },
+    # A separate database standing in for a read replica. Reads only go
+    # to it in tests that add it to DATABASE_REPLICAS.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'TEST': {
+            'MIGRATE': os.environ.get('TEST_MIGRATE') == '1',
+        },
+    },
+}
+DATABASE_REPLICAS = []
+
+# The hashers stay the same, but with the lowest work factors: at the
+# production cost every created user takes most of a second.
+PASSWORD_HASHER_OPTIONS = {
+    'pbkdf2': {'iterations': 1000},
+    'argon2': {'time_cost': 1, 'memory_cost': 1024, 'parallelism': 1},
+    'bcrypt': {'rounds': 4},
+}
+PASSWORD_HASH_WORKERS = 1
+
+STRIPE_SECRET_KEY = 'sk_test'
+
+JOB_BACKEND = 'local'
+
+# Parallel workers share the file system; keep their schema files out of
+# the source tree.
+API_SCHEMA_CACHE_DIR = os.path.join(
+    tempfile.gettempdir(), 'ecommerce-api-test-schema')
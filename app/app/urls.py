@@ -14,24 +14,35 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from drf_spectacular.views import (SpectacularAPIView, SpectacularSwaggerView)
 from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 from django.conf.urls.static import static
-from products.views import stripe_webhook
+from core.views import MetricsView, lazy_view
+from products.images import RENDITION_DIR
+from products.views import serve_rendition, stripe_webhook
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/schema', SpectacularAPIView.as_view(), name='api_schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(
+    # drf_spectacular is slow to import; load it on the first request.
+    path('api/schema', lazy_view(
+        'core.schema.CachedSchemaView'), name='api_schema'),
+    path('api/docs/', lazy_view(
+        'drf_spectacular.views.SpectacularSwaggerView',
         url_name='api_schema'), name='api_docs'),
     path('api/user', include('user.urls')),
     path('api/products/', include('products.urls')),
     path('webhooks/stripe/', stripe_webhook, name='stripe-webhook'),
+    path('api/metrics', MetricsView.as_view(), name='metrics'),
 ]
 
 if settings.DEBUG:
+    urlpatterns += [
+        path(
+            f"{settings.MEDIA_URL.lstrip('/')}{RENDITION_DIR}/<path:path>",
+            serve_rendition,
+        ),
+    ]
     urlpatterns += static(
         settings.MEDIA_URL,
         document_root=settings.MEDIA_ROOT
@@ -2,14 +2,57 @@
 
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 from core import models
 
 
+class EstimatedCountPaginator(Paginator):
+    """Paginator using the planner's row estimate for whole tables.
+
+    On PostgreSQL an unfiltered changelist reads `reltuples` instead of
+    running COUNT(*) over every row; filtered lists are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        connection = connections[self.object_list.db]
+        if connection.vendor == 'postgresql' and not query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE relname = %s',
+                    [query.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] > 0:
+                return int(row[0])
+        return super().count
+
+
+class StockFilter(admin.SimpleListFilter):
+    """Filter products by whether they are in stock."""
+    title = _('stock')
+    parameter_name = 'in_stock'
+
+    def lookups(self, request, model_admin):
+        return (('yes', _('In stock')), ('no', _('Out of stock')))
+
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.filter(stock__gt=0)
+        if self.value() == 'no':
+            return queryset.filter(stock=0)
+        return queryset
+
+
 class UserAdmin(BaseUserAdmin):
     """Custom user admin"""
     ordering = ['id']
     list_display = ['email', 'name']
+    search_fields = ['^email']
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
         (
@@ -32,5 +75,40 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+class ProductAdmin(admin.ModelAdmin):
+    """Product admin that stays fast with millions of products."""
+    ordering = ['-id']
+    list_display = ['id', 'name', 'user', 'price', 'stock']
+    list_select_related = ['user']
+    list_filter = [StockFilter]
+    # Case-sensitive prefix search, which core_product_name_idx serves;
+    # '^name' would compare UPPER(name) and scan the table.
+    search_fields = ['=id', 'name__startswith']
+    autocomplete_fields = ['user', 'categories', 'tags']
+    readonly_fields = ['image_renditions']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class LabelAdmin(admin.ModelAdmin):
+    """Admin for tags and categories, searchable by name prefix."""
+    ordering = ['name']
+    list_display = ['name', 'user']
+    list_select_related = ['user']
+    # Names are unique, so PostgreSQL already has a pattern index for
+    # case-sensitive prefixes.
+    search_fields = ['name__startswith']
+    autocomplete_fields = ['user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class CategoryAdmin(LabelAdmin):
+    """Category admin; the parent is picked by autocomplete."""
+    autocomplete_fields = ['user', 'parent']
+
+
 admin.site.register(models.User, UserAdmin)
-admin.site.register(models.Product)
+admin.site.register(models.Product, ProductAdmin)
+admin.site.register(models.Tag, LabelAdmin)
+admin.site.register(models.Category, CategoryAdmin)
@@ -0,0 +1,156 @@
+"""Helpers shared by the benchmark management commands."""
+
+import json
+import math
+import platform
+import socketserver
+import subprocess
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.servers.basehttp import (
+    WSGIRequestHandler,
+    WSGIServer,
+    get_internal_wsgi_application,
+)
+from rest_framework.authtoken.models import Token
+
+from core import seeding
+
+SCALES = {
+    'small': {
+        'users': 10, 'products': 1_000, 'tags': 50, 'categories': 20,
+        'tags_per_product': 3, 'cart_items': 5,
+    },
+    'medium': {
+        'users': 100, 'products': 20_000, 'tags': 500, 'categories': 100,
+        'tags_per_product': 3, 'cart_items': 10,
+    },
+    'large': {
+        'users': 1_000, 'products': 200_000, 'tags': 5_000,
+        'categories': 1_000, 'tags_per_product': 3, 'cart_items': 20,
+    },
+}
+BENCH_PASSWORD = 'bench-password'
+
+
+def percentile(values, p):
+    """Return the p-th percentile of sorted values (nearest rank)."""
+    if not values:
+        return None
+    rank = max(math.ceil(p / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def summarize(latencies):
+    """Return p50/p95/p99 and mean of latencies in milliseconds."""
+    values = sorted(latency * 1000 for latency in latencies)
+    if not values:
+        return {}
+    return {
+        'p50': round(percentile(values, 50), 3),
+        'p95': round(percentile(values, 95), 3),
+        'p99': round(percentile(values, 99), 3),
+        'mean': round(sum(values) / len(values), 3),
+        'max': round(values[-1], 3),
+    }
+
+
+def run_metadata(**extra):
+    """Return metadata identifying a benchmark run."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, cwd=settings.BASE_DIR,
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'database': settings.DATABASES['default']['ENGINE'],
+        **extra,
+    }
+
+
+def write_results(name, payload, output=None):
+    """Write benchmark results as JSON and return the file path."""
+    if output:
+        path = Path(output)
+    else:
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        path = Path(settings.BASE_DIR) / 'benchmark_results' / \
+            f'{name}-{stamp}.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2, default=str))
+    return path
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    """Request handler that does not log every request."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadedWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+def serve_in_background():
+    """Start the project's WSGI app on a free local port.
+
+    Return the server and its base URL; call `shutdown()` when done.
+    """
+    httpd = ThreadedWSGIServer(('127.0.0.1', 0), QuietWSGIRequestHandler)
+    httpd.set_app(get_internal_wsgi_application())
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    host, port = httpd.server_address
+    return httpd, f'http://{host}:{port}'
+
+
+def seed_catalog(scale):
+    """Create the synthetic catalog for `scale` unless it exists.
+
+    Return the list of (user, token key) pairs of the catalog owners.
+    """
+    config = SCALES[scale]
+    User = get_user_model()
+    users = list(
+        User.objects.filter(email__startswith=f'bench-{scale}-')
+        .order_by('id')
+    )
+    if len(users) != config['users']:
+        users = _create_catalog(scale, config)
+
+    tokens = {
+        token.user_id: token.key
+        for token in Token.objects.filter(user__in=users)
+    }
+    missing = [
+        Token(key=Token.generate_key(), user=user)
+        for user in users if user.id not in tokens
+    ]
+    Token.objects.bulk_create(missing)
+    tokens.update({token.user_id: token.key for token in missing})
+    return [(user, tokens[user.id]) for user in users]
+
+
+def _create_catalog(scale, config):
+    """Replace the synthetic catalog of `scale` and return its users."""
+    User = get_user_model()
+    User.objects.filter(email__startswith=f'bench-{scale}-').delete()
+    seeding.generate(
+        f'bench-{scale}',
+        password=BENCH_PASSWORD,
+        wishlist_items=config['cart_items'],
+        **config,
+    )
+    return list(
+        User.objects.filter(email__startswith=f'bench-{scale}-')
+        .order_by('id')
+    )
@@ -0,0 +1,96 @@
+"""System checks for the core app."""
+
+from importlib.util import find_spec
+
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Cache backends that are not shared between worker processes.
+PROCESS_LOCAL_CACHES = [
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+]
+
+# Module and package each optional PASSWORD_HASHER needs.
+HASHER_LIBRARIES = {
+    'argon2': ('argon2', 'argon2-cffi'),
+    'bcrypt': ('bcrypt', 'bcrypt'),
+}
+
+ADMIN_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+]
+
+
+@register()
+def check_browser_middleware(app_configs, **kwargs):
+    """Stand in for the admin's middleware checks (admin.E408-E410),
+    which only look at MIDDLEWARE, when BrowserMiddleware runs the
+    session, auth and messages middleware for the admin."""
+    if 'core.middleware.BrowserMiddleware' not in settings.MIDDLEWARE:
+        return []
+    return [
+        Error(
+            f"'{path}' must be in BROWSER_MIDDLEWARE in order to use the "
+            f"admin application.",
+            id='core.E001',
+        )
+        for path in ADMIN_MIDDLEWARE
+        if path not in settings.BROWSER_MIDDLEWARE
+    ]
+
+
+@register()
+def check_database_replicas(app_configs, **kwargs):
+    """Check DATABASE_REPLICAS only names databases in DATABASES."""
+    return [
+        Error(
+            f"DATABASE_REPLICAS entry '{alias}' is not in DATABASES.",
+            id='core.E002',
+        )
+        for alias in settings.DATABASE_REPLICAS
+        if alias not in settings.DATABASES or alias == 'default'
+    ]
+
+
+@register()
+def check_replica_pin_cache(app_configs, **kwargs):
+    """Check write pins are kept in a cache all workers share when
+    reads go to replicas; otherwise a user's next read can reach a
+    worker that never saw the pin and miss their own write."""
+    if not settings.DATABASE_REPLICAS:
+        return []
+    cache = settings.CACHES.get(settings.REPLICA_PIN_CACHE)
+    if cache is None:
+        return [Error(
+            f"REPLICA_PIN_CACHE '{settings.REPLICA_PIN_CACHE}' is not in "
+            f"CACHES.",
+            id='core.E003',
+        )]
+    if cache['BACKEND'] in PROCESS_LOCAL_CACHES:
+        return [Error(
+            f"REPLICA_PIN_CACHE '{settings.REPLICA_PIN_CACHE}' must be a "
+            f"cache shared by all workers when DATABASE_REPLICAS is set.",
+            hint='Set CACHE_URL to a Redis server.',
+            id='core.E003',
+        )]
+    return []
+
+
+@register()
+def check_password_hasher(app_configs, **kwargs):
+    """Check the library of the selected PASSWORD_HASHER is installed,
+    rather than failing on the first login."""
+    hasher = getattr(settings, 'PASSWORD_HASHER', None)
+    if hasher not in HASHER_LIBRARIES:
+        return []
+    module, package = HASHER_LIBRARIES[hasher]
+    if find_spec(module) is not None:
+        return []
+    return [Error(
+        f"PASSWORD_HASHER '{hasher}' needs the {package} package.",
+        hint=f'pip install {package}',
+        id='core.E004',
+    )]
@@ -0,0 +1,57 @@
+"""Password hashers with a work factor taken from settings.
+
+PASSWORD_HASHER_OPTIONS holds the cost parameters of each algorithm.
+When they change, existing hashes report `must_update` and are
+upgraded the next time the user logs in.
+"""
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def _option(algorithm, name, default):
+    options = getattr(settings, 'PASSWORD_HASHER_OPTIONS', {})
+    return options.get(algorithm, {}).get(name, default)
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with configurable iterations."""
+
+    @property
+    def iterations(self):
+        return _option(
+            'pbkdf2', 'iterations', hashers.PBKDF2PasswordHasher.iterations)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id with configurable time and memory cost.
+
+    Requires the argon2-cffi package.
+    """
+
+    @property
+    def time_cost(self):
+        return _option(
+            'argon2', 'time_cost', hashers.Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return _option(
+            'argon2', 'memory_cost', hashers.Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return _option(
+            'argon2', 'parallelism', hashers.Argon2PasswordHasher.parallelism)
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """bcrypt with configurable rounds.
+
+    Requires the bcrypt package.
+    """
+
+    @property
+    def rounds(self):
+        return _option(
+            'bcrypt', 'rounds', hashers.BCryptSHA256PasswordHasher.rounds)
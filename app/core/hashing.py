@@ -0,0 +1,78 @@
+"""Bounded worker pool for password hashing.
+
+Hashing is deliberately slow. Running it on a small pool caps the CPU
+that logins and signups can take, so a login storm queues up instead of
+starving every other request. hashlib and the argon2/bcrypt bindings
+release the GIL, so the pool threads hash in parallel.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+_pool = None
+_slots = None
+_lock = threading.Lock()
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full.
+
+    The API answers it with a 503; see core.views.exception_handler.
+    """
+
+
+def _get_pool():
+    global _pool, _slots
+    with _lock:
+        if _pool is None:
+            workers = settings.PASSWORD_HASH_WORKERS
+            _pool = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix='password-hash')
+            _slots = threading.BoundedSemaphore(
+                workers + settings.PASSWORD_HASH_QUEUE_SIZE)
+    return _pool, _slots
+
+
+@receiver(setting_changed)
+def _reset_pool(*, setting, **kwargs):
+    global _pool
+    if setting in ('PASSWORD_HASH_WORKERS', 'PASSWORD_HASH_QUEUE_SIZE'):
+        with _lock:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = None
+
+
+def run(func, *args):
+    """Run `func` on the hashing pool and wait for its result.
+
+    Raise HashingBusy if no slot frees up within
+    PASSWORD_HASH_QUEUE_TIMEOUT seconds.
+    """
+    pool, slots = _get_pool()
+    if not slots.acquire(timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT):
+        raise HashingBusy()
+    try:
+        future = pool.submit(func, *args)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future.result()
+
+
+def make_password(password):
+    """Hash a password on the pool."""
+    if password is None:
+        return hashers.make_password(None)
+    return run(hashers.make_password, password)
+
+
+def verify_password(password, encoded):
+    """Check a password on the pool; return (is_correct, must_update)."""
+    return run(hashers.verify_password, password, encoded)
@@ -0,0 +1,244 @@
+"""Per-request query and latency instrumentation.
+
+A sampled fraction of requests records the SQL query count, DB time,
+serializer time and render time. They are tagged by DRF view and
+action, returned in a Server-Timing header and aggregated into
+in-process histograms.
+"""
+
+import bisect
+import random
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+_current = ContextVar('request_metrics', default=None)
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogram:
+    """Cumulative histogram in the Prometheus style."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        """Return (cumulative bucket counts, sum, count)."""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = []
+        running = 0
+        for value in counts:
+            running += value
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+class Registry:
+    """Histograms keyed by metric name and view."""
+
+    metrics = {
+        'request_duration_seconds': LATENCY_BUCKETS,
+        'db_queries': COUNT_BUCKETS,
+        'db_duration_seconds': LATENCY_BUCKETS,
+        'serializer_duration_seconds': LATENCY_BUCKETS,
+        'render_duration_seconds': LATENCY_BUCKETS,
+    }
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._collectors = []
+
+    def observe(self, metric, view, value):
+        key = (metric, view)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(
+                    key, Histogram(self.metrics[metric]))
+        histogram.observe(value)
+
+    def register_collector(self, collector):
+        """Register a callable returning extra Prometheus text lines."""
+        self._collectors.append(collector)
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def get(self, metric, view):
+        return self._histograms.get((metric, view))
+
+    def render(self):
+        """Return all metrics in the Prometheus text format."""
+        lines = []
+        by_metric = {}
+        for (metric, view), histogram in sorted(self._histograms.items()):
+            by_metric.setdefault(metric, []).append((view, histogram))
+        for metric, entries in by_metric.items():
+            name = f'api_{metric}'
+            lines.append(f'# TYPE {name} histogram')
+            for view, histogram in entries:
+                cumulative, total, count = histogram.snapshot()
+                bounds = [str(b) for b in histogram.buckets] + ['+Inf']
+                for bound, value in zip(bounds, cumulative):
+                    lines.append(
+                        f'{name}_bucket{{view="{view}",le="{bound}"}} {value}'
+                    )
+                lines.append(f'{name}_sum{{view="{view}"}} {total}')
+                lines.append(f'{name}_count{{view="{view}"}} {count}')
+        for collector in self._collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class RequestMetrics:
+    """Measurements collected while handling one request."""
+
+    def __init__(self):
+        self.view = None
+        self.queries = 0
+        self.db = 0.0
+        self.serializer = 0.0
+        self.render = 0.0
+        self.serializer_depth = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        """Database execute wrapper counting and timing queries."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+    def server_timing(self, total):
+        """Return the value of the Server-Timing header."""
+        return ', '.join([
+            f'db;dur={self.db * 1000:.2f};desc="{self.queries} queries"',
+            f'serializer;dur={self.serializer * 1000:.2f}',
+            f'render;dur={self.render * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+
+
+def current_metrics():
+    """Return the metrics of the request being sampled, if any."""
+    return _current.get()
+
+
+def view_name(request, view_func):
+    """Return a `ViewClass.action` tag for a resolved view."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', repr(view_func))
+    actions = getattr(view_func, 'actions', None) or {}
+    method = request.method.lower()
+    return f'{cls.__name__}.{actions.get(method, method)}'
+
+
+class TimedSerializerMixin:
+    """Serializer mixin adding its (de)serialization time to the
+    sampled request."""
+
+    def to_representation(self, instance):
+        metrics = _current.get()
+        if metrics is None or metrics.serializer_depth:
+            return super().to_representation(instance)
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer += time.perf_counter() - start
+            metrics.serializer_depth -= 1
+
+    def run_validation(self, *args, **kwargs):
+        metrics = _current.get()
+        if metrics is None or metrics.serializer_depth:
+            return super().run_validation(*args, **kwargs)
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().run_validation(*args, **kwargs)
+        finally:
+            metrics.serializer += time.perf_counter() - start
+            metrics.serializer_depth -= 1
+
+
+class InstrumentationMiddleware:
+    """Sample requests and record their query and latency breakdown.
+
+    INSTRUMENTATION_SAMPLE_RATE is the fraction of requests measured;
+    unsampled requests only pay for one random() call.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.INSTRUMENTATION_SAMPLE_RATE:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(
+                        conn.execute_wrapper(metrics.record_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+
+        if metrics.view is not None:
+            view = metrics.view
+            registry.observe('request_duration_seconds', view, total)
+            registry.observe('db_queries', view, metrics.queries)
+            registry.observe('db_duration_seconds', view, metrics.db)
+            registry.observe(
+                'serializer_duration_seconds', view, metrics.serializer)
+            registry.observe('render_duration_seconds', view, metrics.render)
+        response['Server-Timing'] = metrics.server_timing(total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.view = view_name(request, view_func)
+
+    def process_template_response(self, request, response):
+        metrics = _current.get()
+        if metrics is not None:
+            start = time.perf_counter()
+
+            def record_render(response):
+                metrics.render += time.perf_counter() - start
+
+            response.add_post_render_callback(record_render)
+        return response
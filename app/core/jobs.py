@@ -0,0 +1,257 @@
+"""Background jobs stored in the database.
+
+`enqueue()` stores a call to a module-level function as a `Job` row in
+the current transaction, so a job exists exactly when the change that
+needs it commits. With JOB_BACKEND = 'database' the `run_jobs` worker
+claims due jobs, highest priority first, and runs at most
+JOB_CONCURRENCY of them at a time. With 'local' each job runs in the
+enqueuing process as soon as the transaction commits, which is what
+tests use.
+
+A failing job is retried up to its `max_attempts`, waiting
+JOB_RETRY_DELAY seconds and doubling after each failure, then marked
+failed. Jobs left running by a worker that died are retried after
+JOB_TIMEOUT seconds; if the first run does finish after all, its result
+is dropped in favour of the retry.
+"""
+
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.models import Job
+
+logger = logging.getLogger(__name__)
+
+# Quantiles of the latency summaries in the metrics.
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def job_name(func):
+    """Return the dotted path a job stores for `func`."""
+    if isinstance(func, str):
+        return func
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def enqueue(func, *, priority=0, delay=0, max_attempts=None, **kwargs):
+    """Queue a call of `func(**kwargs)`; `func` is a module-level
+    function or its dotted path, and kwargs must be JSON serializable.
+    """
+    job = Job.objects.create(
+        name=job_name(func),
+        kwargs=kwargs,
+        priority=priority,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    if settings.JOB_BACKEND == 'local':
+        transaction.on_commit(lambda: run_now(job.pk))
+    return job
+
+
+def _claim(queryset, now):
+    """Mark the queued jobs in `queryset` running; return the count."""
+    return queryset.filter(status=Job.QUEUED).update(
+        status=Job.RUNNING, started_at=now, attempts=F('attempts') + 1)
+
+
+def claim(limit):
+    """Mark up to `limit` due jobs running and return their ids.
+
+    Each job is claimed with a conditional UPDATE, so concurrent workers
+    never claim the same job.
+    """
+    now = timezone.now()
+    due = (
+        Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+        .order_by('-priority', 'run_at', 'id')
+        .values_list('id', flat=True)[:limit * 2]
+    )
+    claimed = []
+    for pk in due:
+        if _claim(Job.objects.filter(pk=pk), now):
+            claimed.append(pk)
+            if len(claimed) == limit:
+                break
+    return claimed
+
+
+def run(pk):
+    """Run a claimed job and record whether it succeeded.
+
+    The result is only recorded while the job is still in the run this
+    call claimed; a job requeued by `requeue_stale()` meanwhile keeps
+    the state it was given.
+    """
+    job = Job.objects.get(pk=pk)
+    claimed = Job.objects.filter(
+        pk=pk, status=Job.RUNNING, started_at=job.started_at)
+    try:
+        import_string(job.name)(**job.kwargs)
+    except Exception:
+        logger.exception('Job %s (%s) failed', job.pk, job.name)
+        error = traceback.format_exc()
+        now = timezone.now()
+        if job.attempts < job.max_attempts:
+            delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            claimed.update(
+                status=Job.QUEUED, last_error=error,
+                run_at=now + timedelta(seconds=delay),
+            )
+        else:
+            claimed.update(
+                status=Job.FAILED, last_error=error, finished_at=now)
+        return False
+    claimed.update(status=Job.DONE, finished_at=timezone.now())
+    return True
+
+
+def run_now(pk):
+    """Claim and run a queued job in this process."""
+    if _claim(Job.objects.filter(pk=pk), timezone.now()):
+        run(pk)
+
+
+def requeue_stale():
+    """Retry, or fail when out of attempts, jobs running longer than
+    JOB_TIMEOUT. Return the number of jobs changed."""
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        started_at__lt=now - timedelta(seconds=settings.JOB_TIMEOUT),
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, finished_at=now, last_error='Timed out.')
+    retried = stale.update(
+        status=Job.QUEUED, run_at=now, last_error='Timed out.')
+    return failed + retried
+
+
+def prune():
+    """Delete jobs that finished more than JOB_RETENTION seconds ago."""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_RETENTION)
+    deleted, _ = Job.objects.filter(
+        status__in=[Job.DONE, Job.FAILED], finished_at__lt=cutoff,
+    ).delete()
+    return deleted
+
+
+def _run_in_thread(pk):
+    close_old_connections()
+    try:
+        run(pk)
+    except Exception:
+        logger.exception('Could not run job %s', pk)
+    finally:
+        close_old_connections()
+
+
+class Worker:
+    """Claim due jobs and run them on a pool of `concurrency` threads."""
+
+    # Seconds between requeueing stale jobs and pruning old ones.
+    maintenance_interval = 60
+
+    def __init__(self, concurrency=None, poll_interval=None):
+        self.concurrency = concurrency or settings.JOB_CONCURRENCY
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL
+        self.pool = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix='jobs')
+        self.running = set()
+        self._lock = threading.Lock()
+
+    def _done(self, future):
+        with self._lock:
+            self.running.discard(future)
+
+    def run_once(self):
+        """Start as many due jobs as there are free threads; return the
+        number started."""
+        with self._lock:
+            free = self.concurrency - len(self.running)
+        if free <= 0:
+            return 0
+        claimed = claim(free)
+        for pk in claimed:
+            future = self.pool.submit(_run_in_thread, pk)
+            with self._lock:
+                self.running.add(future)
+            future.add_done_callback(self._done)
+        return len(claimed)
+
+    def run(self, stop=None):
+        """Run jobs until `stop` (a threading.Event) is set, then wait
+        for the running ones."""
+        stop = stop or threading.Event()
+        next_maintenance = 0
+        try:
+            while not stop.is_set():
+                if time.monotonic() >= next_maintenance:
+                    requeue_stale()
+                    prune()
+                    next_maintenance = (
+                        time.monotonic() + self.maintenance_interval)
+                started = self.run_once()
+                close_old_connections()
+                if not started:
+                    stop.wait(self.poll_interval)
+        finally:
+            self.pool.shutdown(wait=True)
+
+
+def _quantile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def collect_metrics():
+    """Return Prometheus lines with the queue depth per job and status,
+    and the wait and run times of the latest finished jobs."""
+    now = timezone.now()
+    lines = ['# TYPE jobs gauge']
+    for row in (
+            Job.objects.exclude(status=Job.DONE)
+            .values('name', 'status').annotate(count=Count('id'))
+            .order_by('name', 'status')):
+        lines.append(
+            f'jobs{{name="{row["name"]}",status="{row["status"]}"}} '
+            f'{row["count"]}')
+
+    oldest = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=now).aggregate(
+        oldest=Min('run_at'))['oldest']
+    lines.append('# TYPE jobs_oldest_due_seconds gauge')
+    lines.append(
+        'jobs_oldest_due_seconds '
+        f'{(now - oldest).total_seconds() if oldest else 0}')
+
+    latencies = {}
+    for name, run_at, started_at, finished_at in (
+            Job.objects.filter(status=Job.DONE)
+            .order_by('-finished_at')
+            .values_list('name', 'run_at', 'started_at', 'finished_at')
+            [:settings.JOB_METRICS_SAMPLE]):
+        wait, duration = latencies.setdefault(name, ([], []))
+        wait.append(max(0, (started_at - run_at).total_seconds()))
+        duration.append((finished_at - started_at).total_seconds())
+    for metric, index in (('wait', 0), ('run', 1)):
+        name = f'jobs_{metric}_seconds'
+        lines.append(f'# TYPE {name} summary')
+        for job, values in sorted(latencies.items()):
+            values = sorted(values[index])
+            for q in QUANTILES:
+                lines.append(
+                    f'{name}{{name="{job}",quantile="{q}"}} '
+                    f'{_quantile(values, q)}')
+            lines.append(f'{name}_sum{{name="{job}"}} {sum(values)}')
+            lines.append(f'{name}_count{{name="{job}"}} {len(values)}')
+    return lines
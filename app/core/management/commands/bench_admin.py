@@ -0,0 +1,99 @@
+"""
+Benchmark render times of the Product admin pages.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import benchmark
+from core.models import Product
+
+ADMIN_EMAIL = 'bench-admin@example.com'
+
+
+class Command(BaseCommand):
+    """Django command to time Product admin pages on a seeded catalog."""
+    help = 'Measure Product admin page render times and query counts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', nargs='+', choices=benchmark.SCALES,
+            default=['small'],
+        )
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--output', help='Path of the JSON results.')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        admin = User.objects.filter(email=ADMIN_EMAIL).first()
+        if admin is None:
+            admin = User.objects.create_superuser(
+                ADMIN_EMAIL, benchmark.BENCH_PASSWORD)
+        client = Client()
+        client.force_login(admin)
+
+        results = []
+        hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        with override_settings(ALLOWED_HOSTS=hosts):
+            for scale in options['scale']:
+                self.stdout.write(f'Seeding {scale} catalog...')
+                benchmark.seed_catalog(scale)
+                for name, url, params in self._pages():
+                    result = self._run(
+                        client, url, params, options['repeat'])
+                    result.update(page=name, scale=scale)
+                    results.append(result)
+                    self.stdout.write(
+                        f"{scale:<7} {name:<24} "
+                        f"p50 {result['latency_ms']['p50']:>9} ms  "
+                        f"p95 {result['latency_ms']['p95']:>9} ms  "
+                        f"{result['queries']:>3} queries"
+                    )
+
+        path = benchmark.write_results('admin', {
+            'meta': benchmark.run_metadata(repeat=options['repeat']),
+            'results': results,
+        }, options['output'])
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
+
+    def _pages(self):
+        changelist = reverse('admin:core_product_changelist')
+        product = Product.objects.order_by('-id').first()
+        pages = [
+            ('changelist', changelist, {}),
+            ('changelist-page-50', changelist, {'p': 50}),
+            ('changelist-search', changelist, {'q': 'Product 1'}),
+            ('changelist-in-stock', changelist, {'in_stock': 'yes'}),
+            ('autocomplete-tags', reverse('admin:autocomplete'), {
+                'app_label': 'core', 'model_name': 'product',
+                'field_name': 'tags', 'term': 'bench',
+            }),
+        ]
+        if product:
+            pages.append((
+                'change-form',
+                reverse('admin:core_product_change', args=[product.id]),
+                {},
+            ))
+        return pages
+
+    def _run(self, client, url, params, repeat):
+        """GET a page `repeat` times after one warm-up request."""
+        client.get(url, params)
+        latencies = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.get(url, params)
+                latencies.append(time.perf_counter() - start)
+        return {
+            'status': response.status_code,
+            'queries': len(queries),
+            'latency_ms': benchmark.summarize(latencies),
+        }
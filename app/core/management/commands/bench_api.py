@@ -0,0 +1,246 @@
+"""
+Load test every products and user API endpoint.
+"""
+import itertools
+import json
+import re
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import reverse
+
+from core import benchmark
+from products.urls import router
+
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the API with concurrent clients."""
+    help = (
+        'Seed synthetic catalogs and measure throughput, latency '
+        'percentiles and query counts of every API endpoint.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', nargs='+', choices=list(benchmark.SCALES),
+            default=['small'],
+        )
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Requests per endpoint and scale.',
+        )
+        parser.add_argument(
+            '--url',
+            help='Benchmark a running server instead of starting one. '
+                 'Query counts need INSTRUMENTATION_SAMPLE_RATE = 1 and '
+                 'throttling disabled there.',
+        )
+        parser.add_argument('--output', help='Path of the JSON results.')
+        parser.add_argument(
+            '--baseline', help='Results file to compare this run against.')
+
+    def handle(self, *args, **options):
+        httpd = None
+        base_url = options['url']
+        # Rate limits would turn the load test into a test of the 429s.
+        unthrottled = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+        with override_settings(INSTRUMENTATION_SAMPLE_RATE=1,
+                               REST_FRAMEWORK=unthrottled):
+            if not base_url:
+                httpd, base_url = benchmark.serve_in_background()
+            try:
+                results = []
+                for scale in options['scale']:
+                    self.stdout.write(f'Seeding {scale} catalog...')
+                    owners = benchmark.seed_catalog(scale)
+                    for endpoint in self._endpoints(base_url, owners):
+                        result = self._run(base_url, endpoint, options)
+                        result['scale'] = scale
+                        results.append(result)
+                        self._print(result)
+            finally:
+                if httpd is not None:
+                    httpd.shutdown()
+                get_user_model().objects.filter(
+                    email__startswith='bench-signup-').delete()
+
+        payload = {
+            'meta': benchmark.run_metadata(
+                concurrency=options['concurrency'],
+                requests=options['requests'],
+                url=options['url'],
+            ),
+            'results': results,
+        }
+        path = benchmark.write_results('api', payload, options['output'])
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
+        if options['baseline']:
+            self._compare(options['baseline'], results)
+
+    def _endpoints(self, base_url, owners):
+        """Return the endpoints to drive with per-request arguments."""
+        endpoints = []
+        for prefix, viewset, basename in router.registry:
+            list_path = reverse(f'products:{basename}-list')
+            endpoints.append({
+                'name': f'{basename}-list', 'method': 'GET',
+                'requests': [(list_path, token, None)
+                             for _, token in owners],
+            })
+            detail = []
+            for _, token in owners:
+                status, _, _, body = self._request(
+                    base_url, 'GET', list_path, token)
+                items = json.loads(body) if status == 200 else []
+                if items:
+                    path = reverse(
+                        f'products:{basename}-detail',
+                        args=[items[0]['id']],
+                    )
+                    detail.append((path, token, None))
+            if detail:
+                endpoints.append({
+                    'name': f'{basename}-detail', 'method': 'GET',
+                    'requests': detail,
+                })
+
+        endpoints.append({
+            'name': 'user-me', 'method': 'GET',
+            'requests': [(reverse('user:me'), token, None)
+                         for _, token in owners],
+        })
+        endpoints.append({
+            'name': 'user-token', 'method': 'POST',
+            'requests': [
+                (reverse('user:token'), None, {
+                    'email': user.email,
+                    'password': benchmark.BENCH_PASSWORD,
+                })
+                for user, _ in owners
+            ],
+        })
+        run = uuid.uuid4().hex[:8]
+        counter = itertools.count()
+        endpoints.append({
+            'name': 'user-create', 'method': 'POST',
+            'requests': (
+                (reverse('user:create'), None, {
+                    'email': f'bench-signup-{run}-{next(counter)}'
+                             '@example.com',
+                    'password': benchmark.BENCH_PASSWORD,
+                    'name': 'Bench signup',
+                })
+                for _ in itertools.count()
+            ),
+        })
+        return endpoints
+
+    def _request(self, base_url, method, path, token=None, body=None):
+        """Send one request; return (status, seconds, queries, body)."""
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(
+            base_url + path, data=data, method=method)
+        request.add_header('Accept', 'application/json')
+        if data is not None:
+            request.add_header('Content-Type', 'application/json')
+        if token:
+            request.add_header('Authorization', f'Token {token}')
+
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                payload = response.read()
+                status, headers = response.status, response.headers
+        except HTTPError as exc:
+            payload = exc.read()
+            status, headers = exc.code, exc.headers
+        except URLError:
+            return None, time.perf_counter() - start, None, b''
+        elapsed = time.perf_counter() - start
+
+        match = QUERIES_RE.search(headers.get('Server-Timing') or '')
+        queries = int(match.group(1)) if match else None
+        return status, elapsed, queries, payload
+
+    def _run(self, base_url, endpoint, options):
+        """Send the endpoint's requests from concurrent clients."""
+        requests = itertools.islice(
+            itertools.cycle(endpoint['requests'])
+            if isinstance(endpoint['requests'], list)
+            else endpoint['requests'],
+            options['requests'],
+        )
+        calls = [
+            (base_url, endpoint['method'], path, token, body)
+            for path, token, body in requests
+        ]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            responses = list(
+                pool.map(lambda call: self._request(*call), calls))
+        wall = time.perf_counter() - start
+
+        ok = [r for r in responses if r[0] is not None and r[0] < 400]
+        queries = [r[2] for r in ok if r[2] is not None]
+        return {
+            'endpoint': endpoint['name'],
+            'method': endpoint['method'],
+            'requests': len(responses),
+            'errors': len(responses) - len(ok),
+            'throughput_rps': round(len(ok) / wall, 2) if wall else None,
+            'latency_ms': benchmark.summarize([r[1] for r in ok]),
+            'queries': {
+                'mean': round(sum(queries) / len(queries), 2),
+                'max': max(queries),
+            } if queries else None,
+        }
+
+    def _print(self, result):
+        latency = result['latency_ms'] or {}
+        queries = result['queries'] or {}
+        self.stdout.write(
+            f"{result['scale']:<7} {result['endpoint']:<18} "
+            f"{result['throughput_rps'] or 0:>9.1f} req/s  "
+            f"p50 {latency.get('p50', '-'):>8} ms  "
+            f"p95 {latency.get('p95', '-'):>8} ms  "
+            f"p99 {latency.get('p99', '-'):>8} ms  "
+            f"queries {queries.get('mean', '-')}  "
+            f"errors {result['errors']}"
+        )
+
+    def _compare(self, baseline_path, results):
+        """Print p95 latency and throughput changes against a baseline."""
+        with open(baseline_path) as fh:
+            baseline = {
+                (r['scale'], r['endpoint']): r
+                for r in json.load(fh)['results']
+            }
+        self.stdout.write(f'Compared with {baseline_path}:')
+        for result in results:
+            old = baseline.get((result['scale'], result['endpoint']))
+            if not old or not old['latency_ms'] or not result['latency_ms']:
+                continue
+            p95 = _change(
+                old['latency_ms']['p95'], result['latency_ms']['p95'])
+            rps = _change(old['throughput_rps'], result['throughput_rps'])
+            self.stdout.write(
+                f"{result['scale']:<7} {result['endpoint']:<18} "
+                f"p95 {p95:+.1f}%  throughput {rps:+.1f}%"
+            )
+
+
+def _change(old, new):
+    """Return the relative change from old to new in percent."""
+    if not old:
+        return 0.0
+    return (new - old) / old * 100
@@ -0,0 +1,90 @@
+"""
+Benchmark password hashers and the login hashing pool.
+"""
+import importlib.util
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from core import benchmark, hashing
+
+CONFIGS = [
+    ('pbkdf2', 'core.hashers.PBKDF2PasswordHasher', None,
+     [{'iterations': n} for n in (260_000, 600_000, 1_000_000)]),
+    ('argon2', 'core.hashers.Argon2PasswordHasher', 'argon2',
+     [{'time_cost': 2, 'memory_cost': 19456, 'parallelism': 1},
+      {'time_cost': 2, 'memory_cost': 102400, 'parallelism': 8}]),
+    ('bcrypt', 'core.hashers.BCryptSHA256PasswordHasher', 'bcrypt',
+     [{'rounds': n} for n in (10, 12)]),
+]
+
+
+class Command(BaseCommand):
+    """Django command to measure logins/s and latency per hasher."""
+    help = 'Measure login throughput and latency for each hasher setting.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=40)
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+',
+            help='Concurrent logins to try (default: 1, workers, '
+                 '4 x workers).',
+        )
+        parser.add_argument('--output', help='Path of the JSON results.')
+
+    def handle(self, *args, **options):
+        workers = settings.PASSWORD_HASH_WORKERS
+        concurrency = options['concurrency'] or sorted(
+            {1, workers, 4 * workers})
+        results = []
+        for name, hasher, library, variants in CONFIGS:
+            if library and importlib.util.find_spec(library) is None:
+                self.stdout.write(f'Skipping {name}: {library} not installed')
+                continue
+            for params in variants:
+                with override_settings(
+                        PASSWORD_HASHERS=[hasher],
+                        PASSWORD_HASHER_OPTIONS={name: params}):
+                    encoded = make_password('bench-password')
+                    for clients in concurrency:
+                        result = self._run(
+                            encoded, clients, options['logins'])
+                        result.update(hasher=name, params=params)
+                        results.append(result)
+                        self.stdout.write(
+                            f'{name:<7} {str(params):<58} '
+                            f'{clients:>3} clients  '
+                            f"{result['logins_per_second']:>7.1f} logins/s  "
+                            f"p50 {result['latency_ms']['p50']:>8} ms  "
+                            f"p95 {result['latency_ms']['p95']:>8} ms"
+                        )
+
+        path = benchmark.write_results('hashers', {
+            'meta': benchmark.run_metadata(
+                workers=workers, logins=options['logins']),
+            'results': results,
+        }, options['output'])
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
+
+    def _run(self, encoded, clients, logins):
+        """Verify `logins` passwords from `clients` concurrent callers."""
+
+        def login(_):
+            start = time.perf_counter()
+            hashing.verify_password('bench-password', encoded)
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            latencies = list(pool.map(login, range(logins)))
+        wall = time.perf_counter() - start
+        return {
+            'clients': clients,
+            'logins': logins,
+            'logins_per_second': round(logins / wall, 2),
+            'latency_ms': benchmark.summarize(latencies),
+        }
@@ -0,0 +1,108 @@
+"""
+Benchmark the per-request cost of each middleware on API requests.
+"""
+import time
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import path
+
+from core import benchmark
+
+# MIDDLEWARE before the browser-only middleware were split out.
+FULL_STACK = [
+    'core.instrumentation.InstrumentationMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+API_PATH = '/api/products/'
+
+
+def empty_view(request):
+    return HttpResponse(b'{}', content_type='application/json')
+
+
+# The requests are routed here, so only the middleware is measured.
+urlpatterns = [path(API_PATH.lstrip('/'), empty_view)]
+
+
+class Command(BaseCommand):
+    """Django command to time API requests to an empty view through
+    growing prefixes of the old MIDDLEWARE, giving the cost of each
+    middleware, and through the old and the current MIDDLEWARE."""
+    help = 'Measure the per-request cost of each middleware.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20_000)
+        parser.add_argument('--output', help='Path of the JSON results.')
+
+    def handle(self, *args, **options):
+        with override_settings(
+                ROOT_URLCONF=__name__,
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                INSTRUMENTATION_SAMPLE_RATE=0):
+            self._run(options)
+
+    def _run(self, options):
+        total = options['requests']
+        current = list(settings.MIDDLEWARE)
+
+        per_middleware = []
+        previous = self._time([], total)
+        for i, middleware in enumerate(FULL_STACK):
+            mean = self._time(FULL_STACK[:i + 1], total)
+            cost = mean - previous
+            previous = mean
+            per_middleware.append({
+                'middleware': middleware,
+                'in_api_stack': middleware in current,
+                'overhead_us': round(cost, 2),
+            })
+            self.stdout.write(
+                f"{middleware:<58} {cost:>6.2f} us"
+                f"{'' if middleware in current else '  (skipped for API)'}"
+            )
+
+        stacks = []
+        for name, middleware in (('full', FULL_STACK), ('api', current)):
+            mean = self._time(middleware, total)
+            stacks.append({
+                'stack': name,
+                'middleware': middleware,
+                'per_request_us': round(mean, 2),
+            })
+            self.stdout.write(f'{name:<5} stack {mean:>7.2f} us per request')
+        saved = stacks[0]['per_request_us'] - stacks[1]['per_request_us']
+        self.stdout.write(f'Saved {saved:.2f} us per API request')
+
+        path = benchmark.write_results('middleware', {
+            'meta': benchmark.run_metadata(requests=total),
+            'per_middleware': per_middleware,
+            'stacks': stacks,
+        }, options['output'])
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
+
+    def _time(self, middleware, total, rounds=5):
+        """Return the mean microseconds a request takes through
+        `middleware`, from the least disturbed of several rounds."""
+        with override_settings(MIDDLEWARE=middleware):
+            handler = BaseHandler()
+            handler.load_middleware()
+        factory = RequestFactory()
+        requests = [factory.get(API_PATH) for _ in range(1000)]
+        handler.get_response(requests[0])
+        best = float('inf')
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for i in range(total):
+                handler.get_response(requests[i % len(requests)])
+            best = min(best, time.perf_counter() - start)
+        return best / total * 1_000_000
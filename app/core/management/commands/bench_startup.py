@@ -0,0 +1,105 @@
+"""
+Benchmark worker cold start and report the slowest imports.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import benchmark
+
+# Run in a fresh interpreter so nothing is imported yet.
+STARTUP_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+phases = {}
+import django
+django.setup()
+phases['setup'] = time.perf_counter() - start
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+phases['wsgi'] = time.perf_counter() - start
+from django.urls import get_resolver
+get_resolver().url_patterns
+phases['urls'] = time.perf_counter() - start
+from django.test import Client
+Client(SERVER_NAME='localhost').get(sys.argv[1])
+phases['first_request'] = time.perf_counter() - start
+print(json.dumps(phases))
+'''
+
+
+def parse_importtime(stderr):
+    """Return {module: (self us, cumulative us)} from -X importtime."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative, name = line[len('import time:'):].split('|')
+        if self_us.strip().isdigit():
+            modules[name.strip()] = (int(self_us), int(cumulative))
+    return modules
+
+
+class Command(BaseCommand):
+    """Django command to time a worker from interpreter start to its
+    first response."""
+    help = 'Measure process startup time and report the slowest imports.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--top', type=int, default=15)
+        parser.add_argument(
+            '--path', default='/api/user/me/',
+            help='Path requested as the first request.',
+        )
+        parser.add_argument('--output', help='Path of the JSON results.')
+
+    def handle(self, *args, **options):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get(
+                'DJANGO_SETTINGS_MODULE', 'app.settings'),
+        }
+        runs, imports = [], {}
+        for _ in range(options['runs']):
+            proc = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT,
+                 options['path']],
+                capture_output=True, text=True, cwd=settings.BASE_DIR,
+                env=env, check=True,
+            )
+            runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+            for name, times in parse_importtime(proc.stderr).items():
+                imports.setdefault(name, []).append(times)
+
+        phases = {
+            phase: round(
+                statistics.median(run[phase] for run in runs) * 1000, 2)
+            for phase in runs[0]
+        }
+        for phase, ms in phases.items():
+            self.stdout.write(f'{phase:<14} {ms:>9.2f} ms')
+
+        packages = {}
+        for name, times in imports.items():
+            self_us = statistics.median(t[0] for t in times)
+            root = name.split('.')[0]
+            packages[root] = packages.get(root, 0) + self_us
+        slowest = sorted(
+            packages.items(), key=lambda item: item[1], reverse=True,
+        )[:options['top']]
+        self.stdout.write('\nSlowest packages (self import time):')
+        for name, us in slowest:
+            self.stdout.write(f'  {name:<28} {us / 1000:>8.2f} ms')
+
+        path = benchmark.write_results('startup', {
+            'meta': benchmark.run_metadata(runs=options['runs']),
+            'phases_ms': phases,
+            'packages_ms': {name: round(us / 1000, 3) for name, us in slowest},
+        }, options['output'])
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
@@ -0,0 +1,72 @@
+"""
+Benchmark the per-request overhead of rate limiting.
+"""
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from core import benchmark, throttling
+
+
+class View:
+    throttle_scope = None
+
+
+class Command(BaseCommand):
+    """Django command to time BucketRateThrottle.allow_request."""
+    help = 'Measure the overhead of the rate limiter per request.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100_000)
+        parser.add_argument(
+            '--clients', type=int, default=1_000,
+            help='Distinct client IP addresses to spread requests over.',
+        )
+        parser.add_argument('--output', help='Path of the JSON results.')
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        requests = []
+        for i in range(options['clients']):
+            address = f'10.0.{i // 256}.{i % 256}'
+            request = factory.get('/', REMOTE_ADDR=address)
+            request.user = AnonymousUser()
+            requests.append(request)
+
+        results = []
+        for backend in ('local', 'cache'):
+            with override_settings(
+                    THROTTLE_BACKEND=backend,
+                    REST_FRAMEWORK={
+                        'DEFAULT_THROTTLE_RATES': {'anon': '1000000/s'}}):
+                result = self._run(requests, options['requests'])
+            result['backend'] = backend
+            results.append(result)
+            self.stdout.write(
+                f"{backend:<6} {result['per_request_us']['mean']:>7} us mean"
+                f"  p99 {result['per_request_us']['p99']:>7} us"
+            )
+
+        path = benchmark.write_results('throttle', {
+            'meta': benchmark.run_metadata(
+                requests=options['requests'], clients=options['clients']),
+            'results': results,
+        }, options['output'])
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
+
+    def _run(self, requests, total):
+        """Time `total` throttle checks spread over the requests."""
+        view = View()
+        clients = len(requests)
+        latencies = []
+        for i in range(total):
+            request = requests[i % clients]
+            start = time.perf_counter()
+            throttling.BucketRateThrottle().allow_request(request, view)
+            latencies.append(time.perf_counter() - start)
+        # summarize() reports milliseconds; scale to microseconds.
+        summary = benchmark.summarize([t * 1000 for t in latencies])
+        return {'requests': total, 'per_request_us': summary}
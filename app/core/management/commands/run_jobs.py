@@ -0,0 +1,41 @@
+"""
+Run queued background jobs.
+"""
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    """Django command to run the background job worker until it is
+    interrupted or terminated."""
+    help = 'Run queued background jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int,
+            help='Jobs run at a time; JOB_CONCURRENCY by default.')
+        parser.add_argument(
+            '--poll-interval', type=float,
+            help='Seconds to wait when no job is due.')
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+
+        def shutdown(signum, frame):
+            self.stdout.write('Stopping after the running jobs...')
+            stop.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+        worker = jobs.Worker(
+            concurrency=options['concurrency'],
+            poll_interval=options['poll_interval'],
+        )
+        self.stdout.write(
+            f'Running jobs, {worker.concurrency} at a time.')
+        worker.run(stop)
+        self.stdout.write(self.style.SUCCESS('Stopped.'))
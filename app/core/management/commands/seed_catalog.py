@@ -0,0 +1,80 @@
+"""
+Generate a large synthetic catalog for load and migration testing.
+"""
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core import seeding
+
+
+class Command(BaseCommand):
+    """Django command to bulk generate users, products and carts."""
+    help = (
+        'Generate users, tags, categories, products, carts and wishlists '
+        'with bulk inserts and parallel workers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000)
+        parser.add_argument('--products', type=int, default=100_000)
+        parser.add_argument('--tags', type=int, default=1_000)
+        parser.add_argument('--categories', type=int, default=200)
+        parser.add_argument('--tags-per-product', type=int, default=3)
+        parser.add_argument('--categories-per-product', type=int, default=1)
+        parser.add_argument('--cart-items', type=int, default=5)
+        parser.add_argument('--wishlist-items', type=int, default=5)
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Random seed; the same seed generates the same data.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Worker processes (SQLite always uses one).',
+        )
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Prefix of generated emails, tag and category names.',
+        )
+        parser.add_argument('--password', default='password')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if get_user_model().objects.filter(
+                email__startswith=f'{prefix}-').exists():
+            raise CommandError(
+                f'Data with prefix "{prefix}" already exists; '
+                'choose another --prefix.'
+            )
+
+        start = time.perf_counter()
+        counts = {}
+
+        def progress(kind, rows):
+            counts[kind] = counts.get(kind, 0) + rows
+            self.stdout.write(f'{kind}: {counts[kind]}', ending='\r')
+            self.stdout.flush()
+
+        seeding.generate(
+            prefix,
+            users=options['users'],
+            products=options['products'],
+            tags=options['tags'],
+            categories=options['categories'],
+            tags_per_product=options['tags_per_product'],
+            categories_per_product=options['categories_per_product'],
+            cart_items=options['cart_items'],
+            wishlist_items=options['wishlist_items'],
+            seed=options['seed'],
+            workers=options['workers'],
+            password=options['password'],
+            progress=progress,
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {options['users']} users and {options['products']} "
+            f'products in {elapsed:.1f}s'
+        ))
@@ -0,0 +1,33 @@
+"""
+Django command to pre-generate the cached OpenAPI schema.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.schema import schema_cache
+
+
+class Command(BaseCommand):
+    """Generate the schema and write it to API_SCHEMA_CACHE_DIR."""
+    help = 'Generate the OpenAPI schema cache for the current code.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--api-version', action='append', dest='versions',
+            help='API version to generate (repeatable; default: none).',
+        )
+
+    def handle(self, *args, **options):
+        for version in options['versions'] or [None]:
+            path = schema_cache.path(version)
+            if path.exists():
+                self.stdout.write(f'{path} is up to date')
+                continue
+            start = time.perf_counter()
+            schema_cache.get(version)
+            if not path.exists():
+                self.stderr.write(self.style.ERROR(f'Could not write {path}'))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f'Wrote {path} in {time.perf_counter() - start:.2f}s'))
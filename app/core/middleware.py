@@ -0,0 +1,77 @@
+"""Middleware that only browser-facing pages need.
+
+The API authenticates with tokens, so sessions, CSRF, messages and the
+clickjacking header do nothing for it but cost time on every request.
+BrowserMiddleware runs the BROWSER_MIDDLEWARE stack for paths starting
+with one of BROWSER_PATH_PREFIXES (the admin and the API docs) and
+passes every other request straight through.
+"""
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.exception import convert_exception_to_response
+from django.utils.module_loading import import_string
+
+
+class BrowserMiddleware:
+    """Run BROWSER_MIDDLEWARE for browser paths only.
+
+    The wrapped middleware is chained in order like entries of
+    MIDDLEWARE, and their view, template response and exception hooks
+    run at this middleware's position in MIDDLEWARE.
+    """
+    sync_capable = True
+    async_capable = False
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefixes = tuple(settings.BROWSER_PATH_PREFIXES)
+        self.view_hooks = []
+        self.template_response_hooks = []
+        self.exception_hooks = []
+
+        handler = get_response
+        for path in reversed(settings.BROWSER_MIDDLEWARE):
+            try:
+                middleware = import_string(path)(handler)
+            except MiddlewareNotUsed:
+                continue
+            if hasattr(middleware, 'process_view'):
+                self.view_hooks.insert(0, middleware.process_view)
+            if hasattr(middleware, 'process_template_response'):
+                self.template_response_hooks.append(
+                    middleware.process_template_response)
+            if hasattr(middleware, 'process_exception'):
+                self.exception_hooks.append(middleware.process_exception)
+            handler = convert_exception_to_response(middleware)
+        self.browser_handler = handler
+
+    def is_browser_request(self, request):
+        return request.path_info.startswith(self.prefixes)
+
+    def __call__(self, request):
+        if self.is_browser_request(request):
+            return self.browser_handler(request)
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.is_browser_request(request):
+            for hook in self.view_hooks:
+                response = hook(request, view_func, view_args, view_kwargs)
+                if response is not None:
+                    return response
+        return None
+
+    def process_template_response(self, request, response):
+        if self.is_browser_request(request):
+            for hook in self.template_response_hooks:
+                response = hook(request, response)
+        return response
+
+    def process_exception(self, request, exception):
+        if self.is_browser_request(request):
+            for hook in self.exception_hooks:
+                response = hook(request, exception)
+                if response is not None:
+                    return response
+        return None
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:11
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def fill_cached_labels(apps, schema_editor):
+    Product = apps.get_model('core', 'Product')
+    ProductTag = Product.tags.through
+    ProductCategory = Product.categories.through
+    last_id = 0
+    while True:
+        ids = list(
+            Product.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', flat=True)[:BATCH_SIZE]
+        )
+        if not ids:
+            return
+        last_id = ids[-1]
+        tags, categories = defaultdict(list), defaultdict(list)
+        for product_id, tag_id, name, user_id in (
+                ProductTag.objects.filter(product_id__in=ids)
+                .order_by('tag_id')
+                .values_list('product_id', 'tag_id', 'tag__name',
+                             'tag__user_id')):
+            tags[product_id].append(
+                {'id': tag_id, 'name': name, 'user': user_id})
+        for product_id, category_id, name in (
+                ProductCategory.objects.filter(product_id__in=ids)
+                .order_by('category_id')
+                .values_list('product_id', 'category_id',
+                             'category__name')):
+            categories[product_id].append({'id': category_id, 'name': name})
+        Product.objects.bulk_update([
+            Product(id=product_id, cached_tags=tags[product_id],
+                    cached_categories=categories[product_id])
+            for product_id in ids
+        ], ['cached_tags', 'cached_categories'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_product_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='cached_categories',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='cached_tags',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(fill_cached_labels, migrations.RunPython.noop),
+    ]
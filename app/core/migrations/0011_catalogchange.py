@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def seed_change_feed(apps, schema_editor):
+    """Start the feed with every existing object, so a client syncing
+    from cursor 0 gets the whole catalog."""
+    CatalogChange = apps.get_model('core', 'CatalogChange')
+    for kind, model in (('category', 'Category'), ('tag', 'Tag'),
+                        ('product', 'Product')):
+        rows = (
+            apps.get_model('core', model).objects.order_by('id')
+            .values_list('id', 'user_id').iterator(chunk_size=BATCH_SIZE)
+        )
+        batch = []
+        for object_id, user_id in rows:
+            batch.append(CatalogChange(
+                kind=kind, object_id=object_id, user_id=user_id))
+            if len(batch) == BATCH_SIZE:
+                CatalogChange.objects.bulk_create(batch)
+                batch = []
+        CatalogChange.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_inventorymovement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('product', 'Product'), ('tag', 'Tag'), ('category', 'Category')], max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'id'], name='core_catalogchange_feed_idx')],
+            },
+        ),
+        migrations.RunPython(seed_change_feed, migrations.RunPython.noop),
+    ]
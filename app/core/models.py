@@ -1,7 +1,12 @@
 """Django models"""
 
 from django.conf import settings
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models.functions import Concat, Length, Substr
+from django.contrib.auth.hashers import is_password_usable
+
+from core import hashing
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -39,6 +44,24 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = 'email'
 
+    def set_password(self, raw_password):
+        """Hash the password on the bounded hashing pool."""
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """Check the password on the hashing pool, upgrading the stored
+        hash if the preferred hasher or its work factor changed."""
+        if raw_password is None or not is_password_usable(self.password):
+            return False
+        is_correct, must_update = hashing.verify_password(
+            raw_password, self.password)
+        if is_correct and must_update:
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+        return is_correct
+
 
 class Tag(models.Model):
     """Tag object"""
@@ -54,16 +77,124 @@ class Tag(models.Model):
 
 
 class Category(models.Model):
-    """Category object"""
+    """Category object, in a tree stored as materialized paths.
+
+    `path` is the zero-padded ids from the root down to the category, so
+    a subtree is the range of paths that start with its root's path;
+    see products.category_tree. Deleting a category moves its children
+    up to its parent.
+    """
+    PATH_WIDTH = 10
+
     name = models.CharField(max_length=255, unique=True)
     user = models.ForeignKey(
      settings.AUTH_USER_MODEL,
      on_delete=models.CASCADE,
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.RESTRICT,
+        null=True,
+        blank=True,
+        related_name='children',
+    )
+    path = models.CharField(max_length=255, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['path'], name='core_category_path_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def path_segment(cls, pk):
+        """Return the part of a path that stands for category `pk`."""
+        return f'{pk:0{cls.PATH_WIDTH}d}'
+
+    @staticmethod
+    def subtree_bounds(path):
+        """Return the lowest path of the subtree at `path` and the first
+        path after it. Paths are all digits, so the range is the same in
+        every collation."""
+        return path, f'{int(path) + 1:0{len(path)}d}'
+
+    @property
+    def depth(self):
+        """Number of ancestors."""
+        return len(self.path) // self.PATH_WIDTH - 1
+
+    def _move_subtree(self, old_path, path):
+        """Swap the old path prefix for the new one below this
+        category."""
+        low, high = self.subtree_bounds(old_path)
+        Category.objects.filter(
+            path__gt=low, path__lt=high,
+        ).update(path=Concat(
+            models.Value(path),
+            Substr('path', len(old_path) + 1),
+        ))
+
+    def validate_parent(self, parent):
+        """Raise ValidationError if `parent` would make a cycle or a
+        tree deeper than CATEGORY_MAX_DEPTH levels."""
+        if parent is None:
+            return
+        height = 0
+        if self.path:
+            if parent.path.startswith(self.path):
+                raise ValidationError(
+                    {'parent': 'A category cannot be moved under itself.'})
+            low, high = self.subtree_bounds(self.path)
+            deepest = Category.objects.filter(
+                path__gte=low, path__lt=high,
+            ).aggregate(deepest=models.Max(Length('path')))['deepest']
+            height = (deepest - len(self.path)) // self.PATH_WIDTH
+        if parent.depth + 1 + height >= settings.CATEGORY_MAX_DEPTH:
+            raise ValidationError({'parent': (
+                f'Categories can be at most {settings.CATEGORY_MAX_DEPTH} '
+                f'levels deep.')})
+
+    def clean(self):
+        super().clean()
+        self.validate_parent(self.parent)
+
+    def save(self, *args, **kwargs):
+        """Save, then set the path of the category and, if it moved, of
+        its descendants. Moves that would corrupt the tree raise
+        ValidationError."""
+        if self.parent_id is not None and (
+                self.pk is None
+                or self.path != self.parent.path + self.path_segment(self.pk)):
+            self.validate_parent(self.parent)
+        super().save(*args, **kwargs)
+        path = self.path_segment(self.pk)
+        if self.parent_id is not None:
+            path = self.parent.path + path
+        if path == self.path:
+            return
+        old_path, self.path = self.path, path
+        Category.objects.filter(pk=self.pk).update(path=path)
+        if old_path:
+            self._move_subtree(old_path, path)
+
+    @transaction.atomic
+    def delete(self, *args, **kwargs):
+        """Move the children up to this category's parent, log the moved
+        categories to the change feed, then delete it."""
+        from products import changes
+
+        low, high = self.subtree_bounds(self.path)
+        moved = list(
+            Category.objects.filter(path__gt=low, path__lt=high)
+            .values_list('id', 'user_id')
+        )
+        Category.objects.filter(parent=self).update(parent=self.parent_id)
+        self._move_subtree(self.path, self.path[:-self.PATH_WIDTH])
+        changes.record(CatalogChange.CATEGORY, moved)
+        return super().delete(*args, **kwargs)
+
 
 class Product(models.Model):
     """Product object"""
@@ -76,13 +207,136 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField()
     image = models.ImageField(upload_to="products/", blank=True, null=True)
+    image_renditions = models.JSONField(default=dict, blank=True)
     categories = models.ManyToManyField('Category', related_name='products')
     tags = models.ManyToManyField(Tag, blank=True)
+    # Denormalized copies of tags and categories, maintained by
+    # products.signals; see products.labels.
+    cached_tags = models.JSONField(default=list, blank=True, editable=False)
+    cached_categories = models.JSONField(
+        default=list, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Serves the admin's case-sensitive name prefix search; on
+            # PostgreSQL LIKE needs the pattern operator class.
+            models.Index(
+                fields=['name'], name='core_product_name_idx',
+                opclasses=['varchar_pattern_ops'],
+            ),
+            models.Index(fields=['stock'], name='core_product_stock_idx'),
+            # The product list filters and orders within one user.
+            models.Index(
+                fields=['user', 'price', 'id'],
+                name='core_product_user_price_idx',
+            ),
+            models.Index(
+                fields=['user', 'stock'], name='core_product_user_stock_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class InventoryMovement(models.Model):
+    """Append-only record of a change to a product's stock."""
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='inventory_movements',
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+    )
+    delta = models.IntegerField()
+    stock_after = models.PositiveIntegerField()
+    reason = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['product', '-id'],
+                name='core_inventory_product_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.product_id}: {self.delta:+d}'
+
+
+class CatalogChange(models.Model):
+    """Entry in the catalog change feed; ids are the feed's cursor."""
+    PRODUCT = 'product'
+    TAG = 'tag'
+    CATEGORY = 'category'
+    KIND_CHOICES = [
+        (PRODUCT, 'Product'),
+        (TAG, 'Tag'),
+        (CATEGORY, 'Category'),
+    ]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    # Owner of the changed object. No constraint, so the entries outlive
+    # the user they belonged to like any other tombstone.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+    )
+    deleted = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'id'], name='core_catalogchange_feed_idx'),
+        ]
+
+
+class Job(models.Model):
+    """A call to run in the background by core.jobs."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    # Dotted path of the function to call with `kwargs`.
+    name = models.CharField(max_length=255)
+    kwargs = models.JSONField(default=dict, blank=True)
+    # Higher priorities run first.
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', '-priority', 'run_at'],
+                name='core_job_queue_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
+
+
 class Cart(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -102,3 +356,9 @@ class Wishlist(models.Model):
         on_delete=models.CASCADE,
     )
     products = models.ManyToManyField(Product, blank=True)
+
+
+class RevokedToken(models.Model):
+    """Identifier of a signed auth token revoked before it expires."""
+    jti = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
@@ -0,0 +1,107 @@
+"""Routing safe reads to read replicas.
+
+Views using ReplicaReadMixin send the queries of GET, HEAD and OPTIONS
+requests to one of DATABASE_REPLICAS, picked by user so a user keeps
+reading from the same replica. Everything else uses the primary:
+
+- writes, and every query of an unsafe request;
+- reads inside a transaction, so a transaction sees its own writes;
+- reads of a user who wrote in the last REPLICA_PIN_SECONDS, so users
+  read their own writes while the replicas catch up.
+
+Pins are kept in the REPLICA_PIN_CACHE cache, which must be shared by
+all workers; the core.E003 check refuses a per-process cache.
+Authentication runs before routing starts, so tokens are always checked
+against the primary.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+_replica = ContextVar('replica', default=None)
+
+
+def _pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Send the user's reads to the primary for REPLICA_PIN_SECONDS."""
+    caches[settings.REPLICA_PIN_CACHE].set(
+        _pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return bool(caches[settings.REPLICA_PIN_CACHE].get(_pin_key(user_id)))
+
+
+def replica_for(user_id):
+    """Return the replica alias for the user's reads, or None."""
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas or is_pinned(user_id):
+        return None
+    return replicas[user_id % len(replicas)]
+
+
+@contextmanager
+def reading_from(alias):
+    """Route reads outside transactions to `alias` (None: primary)."""
+    token = _replica.set(alias)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class ReplicaRouter:
+    """Database router sending reads to the replica chosen for the
+    current request and everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # Explicit, so an instance read from a replica is saved to the
+        # primary rather than where it came from.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+
+class ReplicaReadMixin:
+    """Serve a view's safe requests from a read replica, and pin users
+    to the primary after their other requests."""
+
+    _replica_token = None
+    _writer_id = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not request.user.is_authenticated:
+            return
+        if request.method in SAFE_METHODS:
+            self._replica_token = _replica.set(
+                replica_for(request.user.id))
+        else:
+            self._writer_id = request.user.id
+            pin_to_primary(self._writer_id)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self._replica_token is not None:
+            _replica.reset(self._replica_token)
+            self._replica_token = None
+        if self._writer_id is not None:
+            # Start the window again once the writes have committed.
+            pin_to_primary(self._writer_id)
+        return super().finalize_response(
+            request, response, *args, **kwargs)
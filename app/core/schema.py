@@ -0,0 +1,176 @@
+"""Precomputed OpenAPI schema.
+
+Generating the schema introspects every view and serializer, so it is
+done once per code version instead of on each request. The generated
+document is kept in memory and written to API_SCHEMA_CACHE_DIR under a
+hash of the project's source, so new workers and new builds of the same
+code read it from disk. `python manage.py warm_schema` writes it ahead
+of time.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from importlib import import_module
+from pathlib import Path
+
+import drf_spectacular
+import rest_framework
+from django.apps import apps
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import translation
+from django.utils.cache import patch_cache_control
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def source_hash():
+    """Return a hash of everything the schema is generated from."""
+    digest = hashlib.sha256()
+    digest.update(drf_spectacular.__version__.encode())
+    digest.update(rest_framework.VERSION.encode())
+    digest.update(repr(sorted(
+        getattr(settings, 'SPECTACULAR_SETTINGS', {}).items())).encode())
+    base = Path(settings.BASE_DIR)
+    roots = {Path(import_module(settings.ROOT_URLCONF).__file__).parent}
+    roots.update(
+        Path(config.path) for config in apps.get_app_configs()
+        if Path(config.path).is_relative_to(base)
+    )
+    for root in sorted(roots):
+        for path in sorted(root.rglob('*.py')):
+            relative = path.relative_to(base)
+            if 'tests' in relative.parts or 'migrations' in relative.parts:
+                continue
+            digest.update(str(relative).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class SchemaDocument:
+    """A generated schema and its renderings."""
+
+    def __init__(self, content):
+        self.json = content
+        self.etag = hashlib.sha256(content).hexdigest()[:32]
+        self._yaml = None
+
+    def render(self, fmt):
+        """Return the schema as `json` or `yaml` bytes."""
+        if fmt == 'json':
+            return self.json
+        if self._yaml is None:
+            self._yaml = OpenApiYamlRenderer().render(json.loads(self.json))
+        return self._yaml
+
+
+class SchemaCache:
+    """Schemas by API version and language, cached in memory and on
+    disk."""
+
+    def __init__(self):
+        self._documents = {}
+        self._lock = threading.Lock()
+
+    def path(self, version=None, lang=None):
+        name = f'openapi-{source_hash()}-{version or "default"}'
+        if lang:
+            name += f'-{lang}'
+        return Path(settings.API_SCHEMA_CACHE_DIR) / f'{name}.json'
+
+    def get(self, version=None, lang=None):
+        """Return the SchemaDocument, generating it if needed."""
+        key = (version, lang)
+        document = self._documents.get(key)
+        if document is None:
+            with self._lock:
+                document = self._documents.get(key)
+                if document is None:
+                    document = self._load(version, lang)
+                    self._documents[key] = document
+        return document
+
+    def _load(self, version, lang):
+        path = self.path(version, lang)
+        try:
+            return SchemaDocument(path.read_bytes())
+        except FileNotFoundError:
+            pass
+        document = SchemaDocument(generate(version, lang))
+        tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename, so concurrent workers never read half a
+            # file.
+            tmp.write_bytes(document.json)
+            os.replace(tmp, path)
+        except OSError:
+            # A read-only deploy still serves the schema from memory.
+            logger.warning('Could not write the schema to %s', path,
+                           exc_info=True)
+        return document
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+
+
+def generate(version=None, lang=None):
+    """Generate the schema and return it rendered as JSON."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS(
+        api_version=version)
+    with translation.override(lang or translation.get_language()):
+        schema = generator.get_schema(request=None, public=True)
+    return OpenApiJsonRenderer().render(schema)
+
+
+schema_cache = SchemaCache()
+
+
+@receiver(setting_changed)
+def _reset_schema_cache(*, setting, **kwargs):
+    if setting in ('API_SCHEMA_CACHE_DIR', 'SPECTACULAR_SETTINGS'):
+        source_hash.cache_clear()
+        schema_cache.clear()
+
+
+class CachedSchemaView(SpectacularAPIView):
+    """Serve the precomputed schema with an ETag."""
+
+    def _get_schema_response(self, request):
+        version = (
+            self.api_version or request.version
+            or self._get_version_parameter(request)
+        )
+        lang = request.GET.get('lang') if settings.USE_I18N else None
+        if lang not in dict(settings.LANGUAGES):
+            lang = None
+        document = schema_cache.get(version, lang)
+        renderer = request.accepted_renderer
+        etag = f'"{document.etag}-{renderer.format}"'
+
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+        else:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type += f'; charset={renderer.charset}'
+            response = HttpResponse(
+                document.render(renderer.format),
+                content_type=content_type,
+            )
+            response['Content-Disposition'] = (
+                f'inline; filename="{self._get_filename(request, version)}"')
+        response['ETag'] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
@@ -0,0 +1,270 @@
+"""Fast, deterministic generation of synthetic catalog data.
+
+Rows get explicit primary keys from ranges reserved up front, so
+products, carts and wishlists can be linked through their through
+tables without reading anything back. The work is split into chunks
+that run in parallel worker processes. Each chunk seeds its own random
+generator, so the output does not depend on the number of workers.
+"""
+
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+
+from core.models import (
+    Cart,
+    CartItem,
+    Category,
+    Product,
+    Tag,
+    Wishlist,
+)
+from products import labels
+
+CHUNK_SIZE = 20_000
+BATCH_SIZE = 5_000
+
+
+def _init_worker():
+    django.setup()
+
+
+def _next_ids(models):
+    """Return the first free primary key of each model."""
+    return {
+        model._meta.label: (
+            model.objects.aggregate(max_id=Max('pk'))['max_id'] or 0) + 1
+        for model in models
+    }
+
+
+def _chunks(total, size=CHUNK_SIZE):
+    return [
+        (start, min(start + size, total))
+        for start in range(0, total, size)
+    ]
+
+
+def _rng(plan, kind, start):
+    return random.Random(f"{plan['seed']}:{kind}:{start}")
+
+
+def _seed_users(plan, start, stop):
+    User = get_user_model()
+    base = plan['ids'][User._meta.label]
+    User.objects.bulk_create([
+        User(
+            id=base + i,
+            email=f"{plan['prefix']}-{i}@example.com",
+            name=f'User {i}',
+            password=plan['password'],
+        )
+        for i in range(start, stop)
+    ], batch_size=BATCH_SIZE)
+
+
+def _seed_labels(plan, model, label, total):
+    base = plan['ids'][model._meta.label]
+    user_base = plan['ids'][get_user_model()._meta.label]
+    objs = [
+        model(
+            id=base + i,
+            name=f"{plan['prefix']}-{label}-{i}",
+            user_id=user_base + i % plan['users'],
+        )
+        for i in range(total)
+    ]
+    if model is Category:
+        # bulk_create skips Category.save(), which sets the path.
+        for obj in objs:
+            obj.path = Category.path_segment(obj.id)
+    model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+
+
+def _seed_products(plan, start, stop):
+    rng = _rng(plan, 'products', start)
+    ids = plan['ids']
+    base = ids[Product._meta.label]
+    user_base = ids[get_user_model()._meta.label]
+    tag_base, tags = ids[Tag._meta.label], plan['tags']
+    category_base = ids[Category._meta.label]
+    categories = plan['categories']
+
+    products = [
+        Product(
+            id=base + i,
+            user_id=user_base + i % plan['users'],
+            name=f'Product {i}',
+            description=f'Synthetic product {i}',
+            price=Decimal(rng.randint(100, 100_000)) / 100,
+            stock=rng.randint(0, 500),
+        )
+        for i in range(start, stop)
+    ]
+
+    ProductTag = Product.tags.through
+    ProductCategory = Product.categories.through
+    tags_per_product = min(plan['tags_per_product'], tags)
+    categories_per_product = min(plan['categories_per_product'], categories)
+    product_tags, product_categories = [], []
+    for product in products:
+        # No signals fire here, so fill the denormalized arrays the way
+        # products.labels does.
+        tag_sample = sorted(rng.sample(range(tags), tags_per_product))
+        category_sample = sorted(
+            rng.sample(range(categories), categories_per_product))
+        for tag in tag_sample:
+            product_tags.append(
+                ProductTag(product_id=product.id, tag_id=tag_base + tag))
+        for category in category_sample:
+            product_categories.append(ProductCategory(
+                product_id=product.id, category_id=category_base + category))
+        product.cached_tags = [
+            labels.tag_entry(
+                tag_base + tag, f"{plan['prefix']}-tag-{tag}",
+                user_base + tag % plan['users'])
+            for tag in tag_sample
+        ]
+        product.cached_categories = [
+            labels.category_entry(
+                category_base + category,
+                f"{plan['prefix']}-category-{category}")
+            for category in category_sample
+        ]
+    Product.objects.bulk_create(products, batch_size=BATCH_SIZE)
+    ProductTag.objects.bulk_create(product_tags, batch_size=BATCH_SIZE)
+    ProductCategory.objects.bulk_create(
+        product_categories, batch_size=BATCH_SIZE)
+
+
+def _seed_carts(plan, start, stop):
+    """Create a cart and a wishlist with some of their own products for
+    each user in the range."""
+    rng = _rng(plan, 'carts', start)
+    ids = plan['ids']
+    users = plan['users']
+    user_base = ids[get_user_model()._meta.label]
+    product_base = ids[Product._meta.label]
+    cart_base = ids[Cart._meta.label]
+    wishlist_base = ids[Wishlist._meta.label]
+
+    Cart.objects.bulk_create([
+        Cart(id=cart_base + u, user_id=user_base + u)
+        for u in range(start, stop)
+    ], batch_size=BATCH_SIZE)
+    Wishlist.objects.bulk_create([
+        Wishlist(id=wishlist_base + u, user_id=user_base + u)
+        for u in range(start, stop)
+    ], batch_size=BATCH_SIZE)
+
+    items, wishes = [], []
+    WishlistProduct = Wishlist.products.through
+    for u in range(start, stop):
+        # Products are dealt to users round robin, so user u owns
+        # products u, u + users, u + 2 * users, ...
+        owned = range(u, plan['products'], users)
+        if not owned:
+            continue
+        for index in rng.sample(owned, min(plan['cart_items'], len(owned))):
+            items.append(CartItem(
+                cart_id=cart_base + u,
+                product_id=product_base + index,
+                quantity=rng.randint(1, 5),
+            ))
+        for index in rng.sample(
+                owned, min(plan['wishlist_items'], len(owned))):
+            wishes.append(WishlistProduct(
+                wishlist_id=wishlist_base + u,
+                product_id=product_base + index,
+            ))
+    CartItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+    WishlistProduct.objects.bulk_create(wishes, batch_size=BATCH_SIZE)
+
+
+TASKS = {
+    'users': _seed_users,
+    'products': _seed_products,
+    'carts': _seed_carts,
+}
+
+
+def _run_task(kind, plan, start, stop):
+    with transaction.atomic():
+        TASKS[kind](plan, start, stop)
+    return kind, stop - start
+
+
+def generate(prefix, users, products, tags, categories, *,
+             tags_per_product=3, categories_per_product=1, cart_items=5,
+             wishlist_items=5, seed=0, workers=1, password='password',
+             progress=None):
+    """Generate a synthetic catalog and return the ids reserved for it.
+
+    Users are `{prefix}-{n}@example.com`, and tags and categories are
+    named `{prefix}-tag-{n}` and `{prefix}-category-{n}`.
+    """
+    if users < 1:
+        raise ValueError('At least one user is required.')
+    User = get_user_model()
+    models = [User, Tag, Category, Product, Cart, CartItem, Wishlist]
+    plan = {
+        'prefix': prefix,
+        'seed': seed,
+        'users': users,
+        'products': products,
+        'tags': tags,
+        'categories': categories,
+        'tags_per_product': tags_per_product,
+        'categories_per_product': categories_per_product,
+        'cart_items': cart_items,
+        'wishlist_items': wishlist_items,
+        'password': make_password(password),
+        'ids': _next_ids(models),
+    }
+    if connection.vendor == 'sqlite':
+        # SQLite allows a single writer; extra processes only contend.
+        workers = 1
+
+    def run(kind, total):
+        chunks = _chunks(total)
+        if workers == 1:
+            for chunk in chunks:
+                done = _run_task(kind, plan, *chunk)
+                if progress:
+                    progress(*done)
+            return
+        connections.close_all()
+        context = multiprocessing.get_context(
+            'fork' if 'fork' in multiprocessing.get_all_start_methods()
+            else 'spawn')
+        with ProcessPoolExecutor(
+                max_workers=workers, mp_context=context,
+                initializer=_init_worker) as pool:
+            futures = [
+                pool.submit(_run_task, kind, plan, *chunk)
+                for chunk in chunks
+            ]
+            for future in futures:
+                done = future.result()
+                if progress:
+                    progress(*done)
+
+    run('users', users)
+    with transaction.atomic():
+        _seed_labels(plan, Tag, 'tag', tags)
+        _seed_labels(plan, Category, 'category', categories)
+    run('products', products)
+    run('carts', users)
+
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+    return plan['ids']
@@ -1,30 +1,41 @@
 """Tests for Django admin modifications."""
+from decimal import Decimal
+
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.test import Client
 
+from core.models import Category, Product, Tag
+
 
 LISTED_USERS_URL = reverse('admin:core_user_changelist')
 CREATE_USER_URL = reverse('admin:core_user_add')
+PRODUCT_CHANGELIST_URL = reverse('admin:core_product_changelist')
 
 
 class AdminSiteTests(TestCase):
     """Test for Django admin site."""
-    def setUp(self):
-        """Setup for tests."""
-        self.client = Client()
-        self.admin_user = get_user_model().objects.create_superuser(
+    @classmethod
+    def setUpTestData(cls):
+        """Create the users shared by the tests."""
+        cls.admin_user = get_user_model().objects.create_superuser(
             email='admin@example.com',
             password='test123',
         )
-        self.client.force_login(self.admin_user)
-        self.user = get_user_model().objects.create_user(
+        cls.user = get_user_model().objects.create_user(
             email='user@example.com',
             password='test123',
             name='Test User',
         )
 
+    def setUp(self):
+        """Setup for tests."""
+        self.client = Client()
+        self.client.force_login(self.admin_user)
+
     def test_users_listed(self):
         """Test that users are listed on user page."""
         res = self.client.get(LISTED_USERS_URL)
@@ -44,3 +55,123 @@ class AdminSiteTests(TestCase):
         res = self.client.get(CREATE_USER_URL)
 
         self.assertEqual(res.status_code, 200)
+
+
+class ProductAdminTests(TestCase):
+    """Test the Product admin."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='test123',
+        )
+        cls.tag = Tag.objects.create(name='Sale', user=cls.admin_user)
+        for i in range(5):
+            product = Product.objects.create(
+                user=get_user_model().objects.create_user(
+                    email=f'user{i}@example.com',
+                    password='test123',
+                ),
+                name=f'Product {i}',
+                description='Sample description',
+                price=Decimal('9.99'),
+                stock=i,
+            )
+            product.tags.add(cls.tag)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin_user)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Test product owners are loaded with the page in one query."""
+        self.client.get(PRODUCT_CHANGELIST_URL)
+        with CaptureQueriesContext(connection) as five:
+            self.client.get(PRODUCT_CHANGELIST_URL)
+        Product.objects.create(
+            user=get_user_model().objects.create_user(
+                email='extra@example.com',
+                password='test123',
+            ),
+            name='Extra',
+            description='Sample description',
+            price=Decimal('1.00'),
+            stock=1,
+        )
+
+        with CaptureQueriesContext(connection) as six:
+            res = self.client.get(PRODUCT_CHANGELIST_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(six), len(five))
+        # Only the paginator counts; the full result count is skipped.
+        self.assertEqual(
+            sum('COUNT(' in query['sql'] for query in six.captured_queries),
+            1,
+        )
+
+    def test_changelist_search_and_filter(self):
+        """Test searching by name prefix and filtering by stock."""
+        res = self.client.get(
+            PRODUCT_CHANGELIST_URL, {'q': 'Product 3', 'in_stock': 'yes'})
+
+        self.assertContains(res, 'Product 3')
+        self.assertNotContains(res, 'Product 4')
+
+        res = self.client.get(PRODUCT_CHANGELIST_URL, {'in_stock': 'no'})
+
+        self.assertContains(res, 'Product 0')
+        self.assertNotContains(res, 'Product 1')
+
+    def test_change_page_uses_autocomplete(self):
+        """Test tags and categories use autocomplete widgets."""
+        product = Product.objects.first()
+        url = reverse('admin:core_product_change', args=[product.id])
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertContains(res, 'class="admin-autocomplete"', count=3)
+
+
+class CategoryAdminTests(TestCase):
+    """Test the Category admin."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='test123',
+        )
+        cls.home = Category.objects.create(name='Home', user=cls.admin_user)
+        cls.kitchen = Category.objects.create(
+            name='Kitchen', user=cls.admin_user, parent=cls.home)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin_user)
+
+    def test_move_under_descendant_rejected(self):
+        """Test the change form refuses to make a cycle."""
+        url = reverse('admin:core_category_change', args=[self.home.id])
+
+        res = self.client.post(url, {
+            'name': 'Home',
+            'user': self.admin_user.id,
+            'parent': self.kitchen.id,
+        })
+
+        self.assertEqual(res.status_code, 200)
+        self.assertContains(res, 'cannot be moved under itself')
+        self.home.refresh_from_db()
+        self.assertIsNone(self.home.parent)
+
+    def test_parent_uses_autocomplete(self):
+        """Test the parent is not rendered as a select of every
+        category."""
+        url = reverse('admin:core_category_change', args=[self.kitchen.id])
+
+        res = self.client.get(url)
+
+        self.assertContains(res, 'class="admin-autocomplete"', count=2)
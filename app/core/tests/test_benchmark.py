@@ -0,0 +1,28 @@
+"""Tests for benchmark helpers."""
+
+from django.test import SimpleTestCase
+
+from core import benchmark
+
+
+class BenchmarkHelperTests(SimpleTestCase):
+    """Test latency summaries used by the benchmark commands."""
+
+    def test_percentile_nearest_rank(self):
+        """Test percentiles use the nearest-rank method."""
+        values = list(range(1, 101))
+
+        self.assertEqual(benchmark.percentile(values, 50), 50)
+        self.assertEqual(benchmark.percentile(values, 95), 95)
+        self.assertEqual(benchmark.percentile(values, 99), 99)
+        self.assertEqual(benchmark.percentile([7], 99), 7)
+        self.assertIsNone(benchmark.percentile([], 50))
+
+    def test_summarize_converts_to_milliseconds(self):
+        """Test summaries are reported in milliseconds."""
+        summary = benchmark.summarize([0.001, 0.002, 0.003, 0.004])
+
+        self.assertEqual(summary['p50'], 2.0)
+        self.assertEqual(summary['p99'], 4.0)
+        self.assertEqual(summary['mean'], 2.5)
+        self.assertEqual(summary['max'], 4.0)
@@ -0,0 +1,88 @@
+"""Tests for the password hashing pool."""
+
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import hashing
+from core.checks import check_password_hasher
+
+
+class HashingPoolTests(SimpleTestCase):
+    """Test the bounded password hashing pool."""
+
+    def test_run_returns_result(self):
+        """Test work submitted to the pool returns its result."""
+        self.assertEqual(hashing.run(sum, [1, 2, 3]), 6)
+
+    def test_verify_password(self):
+        """Test passwords are verified on the pool."""
+        encoded = hashing.make_password('secret')
+
+        self.assertEqual(
+            hashing.verify_password('secret', encoded), (True, False))
+        self.assertFalse(hashing.verify_password('wrong', encoded)[0])
+
+    @override_settings(
+        PASSWORD_HASH_WORKERS=1,
+        PASSWORD_HASH_QUEUE_SIZE=0,
+        PASSWORD_HASH_QUEUE_TIMEOUT=0.01,
+    )
+    def test_full_pool_raises_busy(self):
+        """Test callers give up when every slot is taken."""
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait()
+
+        worker = threading.Thread(target=hashing.run, args=(block,))
+        worker.start()
+        started.wait()
+        try:
+            with self.assertRaises(hashing.HashingBusy):
+                hashing.run(sum, [1])
+        finally:
+            release.set()
+            worker.join()
+
+
+class PasswordHasherCheckTests(SimpleTestCase):
+    """Test the check for the selected hasher's library."""
+
+    def test_missing_library_fails_check(self):
+        """Test a hasher whose library is missing fails at startup."""
+        with override_settings(PASSWORD_HASHER='argon2'), \
+                mock.patch('core.checks.find_spec', return_value=None):
+            errors = check_password_hasher(None)
+
+        self.assertEqual([error.id for error in errors], ['core.E004'])
+
+    def test_pbkdf2_needs_no_library(self):
+        """Test the default hasher passes the check."""
+        with override_settings(PASSWORD_HASHER='pbkdf2'):
+            self.assertEqual(check_password_hasher(None), [])
+
+
+class HashingBusyApiTests(TestCase):
+    """Test a full hashing queue is reported by the API."""
+
+    def test_login_returns_503(self):
+        """Test logins get a 503 while the queue is full."""
+        get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+
+        with mock.patch('core.hashing.run', side_effect=hashing.HashingBusy):
+            res = APIClient().post(reverse('user:token'), {
+                'email': 'user@example.com',
+                'password': 'testpass123',
+            })
+
+        self.assertEqual(
+            res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -0,0 +1,99 @@
+"""Tests for request instrumentation."""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.instrumentation import registry
+from core.models import Product
+
+
+PRODUCT_URL = reverse('products:product-list')
+METRICS_URL = reverse('metrics')
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=1)
+class InstrumentationTests(TestCase):
+    """Test query and latency instrumentation."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        Product.objects.create(
+            user=cls.user,
+            name='Sample Product',
+            description='Sample description',
+            price=Decimal('9.99'),
+            stock=3,
+        )
+
+    def setUp(self):
+        registry.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_header(self):
+        """Test sampled responses carry a Server-Timing breakdown."""
+        res = self.client.get(PRODUCT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        timing = res['Server-Timing']
+        for name in ('db', 'serializer', 'render', 'total'):
+            self.assertIn(f'{name};dur=', timing)
+        self.assertRegex(timing, r'desc="[1-9]\d* queries"')
+
+    def test_metrics_tagged_by_view_and_action(self):
+        """Test histograms are recorded per viewset action."""
+        self.client.get(PRODUCT_URL)
+        self.client.get(PRODUCT_URL)
+
+        histogram = registry.get('db_queries', 'ProductViewSet.list')
+        self.assertIsNotNone(histogram)
+        self.assertEqual(histogram.count, 2)
+        self.assertGreater(histogram.sum, 0)
+        self.assertIsNotNone(
+            registry.get('serializer_duration_seconds',
+                         'ProductViewSet.list'))
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_recorded(self):
+        """Test requests outside the sample have no overhead output."""
+        res = self.client.get(PRODUCT_URL)
+
+        self.assertNotIn('Server-Timing', res)
+        self.assertIsNone(
+            registry.get('db_queries', 'ProductViewSet.list'))
+
+    def test_metrics_endpoint_requires_admin(self):
+        """Test the metrics endpoint is limited to staff users."""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_metrics_endpoint_renders_histograms(self):
+        """Test the metrics endpoint exposes Prometheus histograms."""
+        admin = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+        self.client.get(PRODUCT_URL)
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        body = res.content.decode()
+        self.assertIn('# TYPE api_db_queries histogram', body)
+        self.assertIn(
+            'api_request_duration_seconds_count'
+            '{view="ProductViewSet.list"} 1',
+            body,
+        )
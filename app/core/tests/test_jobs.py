@@ -0,0 +1,179 @@
+"""Tests for the background job queue."""
+
+import hashlib
+import hmac
+import json
+import time
+from concurrent.futures import Future
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+
+CALLS = []
+
+
+def record_call(**kwargs):
+    CALLS.append(kwargs)
+
+
+def fail(**kwargs):
+    raise RuntimeError('Boom')
+
+
+class JobQueueTests(TestCase):
+    """Test enqueuing, claiming and running jobs."""
+
+    def setUp(self):
+        CALLS.clear()
+
+    @override_settings(JOB_BACKEND='database')
+    def test_enqueue_stores_job(self):
+        """Test jobs are stored for the worker."""
+        with self.captureOnCommitCallbacks(execute=True):
+            job = jobs.enqueue(record_call, priority=3, value=1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.name, 'core.tests.test_jobs.record_call')
+        self.assertEqual(job.kwargs, {'value': 1})
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(CALLS, [])
+
+    @override_settings(JOB_BACKEND='local')
+    def test_local_backend_runs_on_commit(self):
+        """Test the local backend runs jobs once the transaction
+        commits."""
+        with self.captureOnCommitCallbacks(execute=True):
+            job = jobs.enqueue(record_call, value=1)
+            self.assertEqual(CALLS, [])
+
+        self.assertEqual(CALLS, [{'value': 1}])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+
+    @override_settings(JOB_BACKEND='database')
+    def test_claim_by_priority(self):
+        """Test due jobs are claimed by priority, up to the limit."""
+        low = jobs.enqueue(record_call)
+        high = jobs.enqueue(record_call, priority=5)
+        jobs.enqueue(record_call, priority=9, delay=60)
+
+        self.assertEqual(jobs.claim(1), [high.pk])
+        self.assertEqual(jobs.claim(5), [low.pk])
+        self.assertEqual(jobs.claim(5), [])
+
+    @override_settings(JOB_BACKEND='database', JOB_RETRY_DELAY=10)
+    def test_retry_then_fail(self):
+        """Test failed jobs are retried later, then marked failed."""
+        job = jobs.enqueue(fail, max_attempts=2)
+
+        with self.assertLogs('core.jobs', 'ERROR'):
+            jobs.run_now(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+        self.assertIn('Boom', job.last_error)
+
+        with self.assertLogs('core.jobs', 'ERROR'):
+            jobs.run_now(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    @override_settings(JOB_BACKEND='database', JOB_TIMEOUT=60)
+    def test_requeue_stale(self):
+        """Test jobs running past the timeout are retried."""
+        job = jobs.enqueue(record_call)
+        jobs.claim(1)
+        Job.objects.filter(pk=job.pk).update(
+            started_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.assertEqual(jobs.claim(1), [job.pk])
+
+    @override_settings(JOB_BACKEND='database', JOB_TIMEOUT=60)
+    def test_stale_run_does_not_overwrite_retry(self):
+        """Test a timed out run finishing late leaves the retry
+        running."""
+        job = jobs.enqueue(record_call)
+        jobs.claim(1)
+        job.refresh_from_db()
+        Job.objects.filter(pk=job.pk).update(
+            started_at=job.started_at - timedelta(minutes=5))
+        late = Job.objects.get(pk=job.pk)
+        jobs.requeue_stale()
+        jobs.claim(1)
+
+        with mock.patch.object(Job.objects, 'get', return_value=late):
+            jobs.run(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertIsNone(job.finished_at)
+
+    @override_settings(JOB_BACKEND='database')
+    def test_worker_respects_concurrency(self):
+        """Test a worker never runs more than its concurrency."""
+        for _ in range(3):
+            jobs.enqueue(record_call)
+        worker = jobs.Worker(concurrency=2)
+        self.addCleanup(worker.pool.shutdown)
+        futures = []
+
+        def submit(*args):
+            futures.append(Future())
+            return futures[-1]
+
+        with mock.patch.object(worker.pool, 'submit', side_effect=submit):
+            self.assertEqual(worker.run_once(), 2)
+            self.assertEqual(worker.run_once(), 0)
+            futures[0].set_result(None)
+            self.assertEqual(worker.run_once(), 1)
+
+        self.assertEqual(
+            Job.objects.filter(status=Job.RUNNING).count(), 3)
+
+    @override_settings(JOB_BACKEND='database')
+    def test_metrics(self):
+        """Test queue depth and latency are reported."""
+        jobs.enqueue(record_call)
+        jobs.run_now(jobs.enqueue(record_call).pk)
+
+        lines = jobs.collect_metrics()
+
+        name = 'core.tests.test_jobs.record_call'
+        self.assertIn(f'jobs{{name="{name}",status="queued"}} 1', lines)
+        self.assertIn(f'jobs_run_seconds_count{{name="{name}"}} 1', lines)
+
+    @override_settings(
+        JOB_BACKEND='database', STRIPE_WEBHOOK_SECRET='whsec_test')
+    def test_stripe_webhook_queues_event(self):
+        """Test verified webhook events are handled by a job."""
+        payload = {
+            'id': 'evt_1',
+            'object': 'event',
+            'type': 'payment_intent.succeeded',
+            'data': {'object': {'id': 'pi_1'}},
+        }
+        body = json.dumps(payload)
+        stamp = int(time.time())
+        signature = hmac.new(
+            b'whsec_test', f'{stamp}.{body}'.encode(), hashlib.sha256,
+        ).hexdigest()
+
+        res = self.client.post(
+            reverse('stripe-webhook'), body,
+            content_type='application/json',
+            HTTP_STRIPE_SIGNATURE=f't={stamp},v1={signature}')
+
+        self.assertEqual(res.status_code, 200)
+        job = Job.objects.get()
+        self.assertEqual(
+            job.name, 'products.payments.handle_stripe_event')
+        self.assertEqual(job.kwargs, {'event': payload})
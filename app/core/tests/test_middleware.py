@@ -0,0 +1,73 @@
+"""Tests for the browser-only middleware stack."""
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.checks import check_browser_middleware
+
+
+PRODUCTS_URL = reverse('products:product-list')
+ADMIN_LOGIN_URL = reverse('admin:login')
+ADMIN_INDEX_URL = reverse('admin:index')
+
+
+class BrowserMiddlewareTests(TestCase):
+    """Test API requests skip the browser middleware."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+
+    def test_api_request_skips_sessions(self):
+        """Test API responses set no cookies or browser headers."""
+        client = APIClient()
+        client.force_authenticate(self.admin_user)
+
+        res = client.get(PRODUCTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(hasattr(res.wsgi_request, 'session'))
+        self.assertNotIn('X-Frame-Options', res)
+        self.assertNotIn('Cookie', res.get('Vary', ''))
+
+    def test_admin_uses_sessions(self):
+        """Test the admin still logs in with a session."""
+        client = Client()
+
+        res = client.post(ADMIN_LOGIN_URL, {
+            'username': 'admin@example.com',
+            'password': 'testpass123',
+        })
+        self.assertEqual(res.status_code, status.HTTP_302_FOUND)
+
+        res = client.get(ADMIN_INDEX_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['X-Frame-Options'], 'DENY')
+
+    def test_admin_enforces_csrf(self):
+        """Test CSRF is checked on admin forms."""
+        client = Client(enforce_csrf_checks=True)
+
+        res = client.post(ADMIN_LOGIN_URL, {
+            'username': 'admin@example.com',
+            'password': 'testpass123',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(BROWSER_MIDDLEWARE=[
+        'django.contrib.sessions.middleware.SessionMiddleware',
+    ])
+    def test_check_missing_admin_middleware(self):
+        """Test the system check reports admin middleware left out."""
+        errors = check_browser_middleware(None)
+
+        self.assertEqual(
+            [error.id for error in errors], ['core.E001', 'core.E001'])
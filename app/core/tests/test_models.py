@@ -5,15 +5,16 @@ from core.models import Product
 
 
 class ProductModelTest(TestCase):
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         """Create a sample user and product for testing."""
-        self.user = get_user_model().objects.create_user(
+        cls.user = get_user_model().objects.create_user(
             email="test@example.com",
             password="testpass123"
         )
 
-        self.product = Product.objects.create(
-            user=self.user,  # Associate the product with a user
+        cls.product = Product.objects.create(
+            user=cls.user,  # Associate the product with a user
             name="Test Product",
             description="This is a test product.",
             price=Decimal('99.99'),
@@ -0,0 +1,119 @@
+"""Tests for read replica routing."""
+
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.checks import check_database_replicas, check_replica_pin_cache
+from core.models import Product
+from core.replicas import reading_from
+
+PRODUCT_URL = reverse('products:product-list')
+# app.test_settings adds a 'replica' database standing in for a replica.
+HAS_REPLICA = 'replica' in settings.DATABASES
+
+
+def create_user(alias, **params):
+    return get_user_model().objects.db_manager(alias).create_user(**params)
+
+
+def create_product(alias, user, name):
+    return Product.objects.using(alias).create(
+        user_id=user.id, name=name, description='Description',
+        price=Decimal('1.00'), stock=1,
+    )
+
+
+@skipUnless(HAS_REPLICA, 'Needs the replica database of app.test_settings.')
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TransactionTestCase):
+    """Test reads go to the replica and writes to the primary."""
+    databases = {'default', 'replica'} if HAS_REPLICA else {'default'}
+
+    def setUp(self):
+        cache.clear()
+        # The same user on both databases, with different products, so
+        # a response shows which database it was read from.
+        params = {
+            'id': 7, 'email': 'replica@example.com',
+            'password': 'testpass123',
+        }
+        self.user = create_user('default', **params)
+        create_user('replica', **params)
+        create_product('default', self.user, 'On primary')
+        create_product('replica', self.user, 'On replica')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def names(self):
+        res = self.client.get(PRODUCT_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [product['name'] for product in res.data]
+
+    def test_reads_use_replica(self):
+        """Test safe requests read from the replica."""
+        self.assertEqual(self.names(), ['On replica'])
+
+    def test_reads_after_write_use_primary(self):
+        """Test a user reads the primary for a while after writing."""
+        res = self.client.post(PRODUCT_URL, {
+            'name': 'New', 'description': 'Description',
+            'price': '2.00', 'stock': 1,
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.names(), ['New', 'On primary'])
+
+        cache.clear()
+        self.assertEqual(self.names(), ['On replica'])
+
+    def test_no_replicas(self):
+        """Test reads use the primary without replicas."""
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.names(), ['On primary'])
+
+    def test_transactions_use_primary(self):
+        """Test reads in a transaction and writes use the primary."""
+        with reading_from('replica'):
+            self.assertEqual(
+                Product.objects.get().name, 'On replica')
+            with transaction.atomic():
+                self.assertEqual(
+                    Product.objects.get().name, 'On primary')
+            Product.objects.filter(user=self.user).update(stock=5)
+
+        self.assertEqual(Product.objects.using('replica').get().stock, 1)
+        self.assertEqual(Product.objects.using('default').get().stock, 5)
+
+    def test_unknown_replica_fails_check(self):
+        """Test replicas must be databases in DATABASES."""
+        self.assertEqual(check_database_replicas(None), [])
+
+        with self.settings(DATABASE_REPLICAS=['missing']):
+            errors = check_database_replicas(None)
+
+        self.assertEqual([error.id for error in errors], ['core.E002'])
+
+    def test_process_local_pin_cache_fails_check(self):
+        """Test replicas need a pin cache shared by all workers."""
+        self.assertEqual(
+            [error.id for error in check_replica_pin_cache(None)],
+            ['core.E003'],
+        )
+
+        redis = {'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://localhost:6379/0',
+        }}
+        with self.settings(CACHES=redis):
+            self.assertEqual(check_replica_pin_cache(None), [])
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(check_replica_pin_cache(None), [])
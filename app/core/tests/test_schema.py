@@ -0,0 +1,77 @@
+"""Tests for the cached OpenAPI schema."""
+
+import io
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+
+from core import schema
+
+
+SCHEMA_URL = reverse('api_schema')
+
+
+class CachedSchemaTests(SimpleTestCase):
+    """Test the schema is generated once and served with an ETag."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = override_settings(API_SCHEMA_CACHE_DIR=tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_schema_generated_once(self):
+        """Test repeated requests reuse the generated schema."""
+        with mock.patch('core.schema.generate', wraps=schema.generate) as gen:
+            first = self.client.get(SCHEMA_URL, {'format': 'json'})
+            second = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.content, second.content)
+        self.assertIn(b'"openapi"', first.content)
+        self.assertEqual(gen.call_count, 1)
+
+    def test_schema_read_from_disk(self):
+        """Test a new process loads the schema written by another."""
+        self.client.get(SCHEMA_URL)
+        schema.schema_cache.clear()
+
+        with mock.patch('core.schema.generate') as gen:
+            res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        gen.assert_not_called()
+
+    def test_read_only_cache_dir(self):
+        """Test the schema is served when it cannot be written to disk."""
+        with mock.patch('pathlib.Path.write_bytes',
+                        side_effect=PermissionError('read-only')), \
+                self.assertLogs('core.schema', 'WARNING'):
+            res = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(b'"openapi"', res.content)
+
+    def test_etag_not_modified(self):
+        """Test a matching If-None-Match returns 304."""
+        res = self.client.get(SCHEMA_URL)
+        etag = res['ETag']
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        json_res = self.client.get(
+            SCHEMA_URL, {'format': 'json'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(json_res.status_code, status.HTTP_200_OK)
+
+    def test_warm_schema_command(self):
+        """Test the command writes the schema file."""
+        call_command('warm_schema', stdout=io.StringIO())
+
+        self.assertTrue(schema.schema_cache.path().exists())
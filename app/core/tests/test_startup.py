@@ -0,0 +1,52 @@
+"""Tests for process startup."""
+
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from core.management.commands.bench_startup import parse_importtime
+
+LAZY_MODULES = ['stripe', 'PIL.Image', 'drf_spectacular.views']
+
+
+class StartupTests(SimpleTestCase):
+    """Test what a worker imports before its first request."""
+
+    def test_heavy_dependencies_imported_lazily(self):
+        """Test loading the app and URLconf skips heavy dependencies."""
+        script = (
+            'import json, sys, django\n'
+            'django.setup()\n'
+            'from django.urls import get_resolver\n'
+            'get_resolver().url_patterns\n'
+            f'print(json.dumps([m for m in {LAZY_MODULES!r} '
+            'if m in sys.modules]))\n'
+        )
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ['DJANGO_SETTINGS_MODULE'],
+        }
+
+        proc = subprocess.run(
+            [sys.executable, '-c', script], capture_output=True, text=True,
+            cwd=settings.BASE_DIR, env=env, check=True,
+        )
+
+        self.assertEqual(json.loads(proc.stdout), [])
+
+    def test_parse_importtime(self):
+        """Test -X importtime output is parsed per module."""
+        stderr = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   json.decoder\n'
+            'import time:       300 |        420 | json\n'
+        )
+
+        self.assertEqual(parse_importtime(stderr), {
+            'json.decoder': (120, 120),
+            'json': (300, 420),
+        })
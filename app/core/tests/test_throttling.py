@@ -0,0 +1,139 @@
+"""Tests for rate limiting."""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import throttling
+
+
+PRODUCT_URL = reverse('products:product-list')
+TOKEN_URL = reverse('user:token')
+
+
+class LocalBucketTests(SimpleTestCase):
+    """Test the in-process token bucket."""
+
+    def test_bucket_refills(self):
+        """Test tokens run out and refill at the rate."""
+        buckets = throttling.LocalBuckets()
+
+        self.assertEqual(buckets.consume('k', 2, 10, now=0), 0)
+        self.assertEqual(buckets.consume('k', 2, 10, now=0), 0)
+        self.assertAlmostEqual(buckets.consume('k', 2, 10, now=0), 5)
+        self.assertEqual(buckets.consume('k', 2, 10, now=5), 0)
+
+    def test_idle_buckets_pruned(self):
+        """Test refilled buckets are dropped when the table is full."""
+        buckets = throttling.LocalBuckets(max_keys=2)
+        buckets.consume('a', 1, 10, now=0)
+        buckets.consume('b', 1, 10, now=0)
+
+        buckets.consume('c', 1, 10, now=20)
+
+        self.assertEqual(set(buckets._buckets), {'c'})
+
+    def test_pruning_uses_each_buckets_period(self):
+        """Test a short-period request does not reset a long-period
+        bucket that is still refilling."""
+        buckets = throttling.LocalBuckets(max_keys=2)
+        buckets.consume('auth', 1, 60, now=0)
+        buckets.consume('a', 1, 1, now=0)
+        buckets.consume('auth', 1, 60, now=1)
+
+        buckets.consume('b', 1, 1, now=2)
+
+        self.assertEqual(list(buckets._buckets), ['auth', 'b'])
+        self.assertGreater(buckets.consume('auth', 1, 60, now=3), 0)
+
+    def test_full_table_evicts_least_recently_used(self):
+        """Test a full table of refilling buckets drops the least
+        recently used one."""
+        buckets = throttling.LocalBuckets(max_keys=2)
+        buckets.consume('a', 1, 60, now=0)
+        buckets.consume('b', 1, 60, now=0)
+        buckets.consume('a', 1, 60, now=1)
+
+        buckets.consume('c', 1, 60, now=2)
+
+        self.assertEqual(list(buckets._buckets), ['a', 'c'])
+
+
+@override_settings(REST_FRAMEWORK={
+    'DEFAULT_THROTTLE_CLASSES': ['core.throttling.BucketRateThrottle'],
+    'DEFAULT_THROTTLE_RATES': {'products': '2/min', 'auth': '1/min'},
+    'NUM_PROXIES': 0,
+})
+class ThrottleApiTests(TestCase):
+    """Test rate limits on the API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_scope_limited_per_user(self):
+        """Test each user has their own limit for a scope."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        for _ in range(2):
+            self.client.get(PRODUCT_URL)
+
+        res = self.client.get(PRODUCT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+        self.client.force_authenticate(other)
+        res = self.client.get(PRODUCT_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_login_limited_per_ip(self):
+        """Test anonymous login attempts are limited by IP address."""
+        payload = {'email': 'user@example.com', 'password': 'wrong'}
+        self.client.post(TOKEN_URL, payload, REMOTE_ADDR='10.0.0.1')
+
+        res = self.client.post(TOKEN_URL, payload, REMOTE_ADDR='10.0.0.1')
+        other = self.client.post(TOKEN_URL, payload, REMOTE_ADDR='10.0.0.2')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(other.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_forwarded_for_header_not_trusted(self):
+        """Test a client cannot get a fresh bucket by changing
+        X-Forwarded-For."""
+        payload = {'email': 'user@example.com', 'password': 'wrong'}
+        self.client.post(
+            TOKEN_URL, payload, REMOTE_ADDR='10.0.0.1',
+            HTTP_X_FORWARDED_FOR='1.1.1.1')
+
+        res = self.client.post(
+            TOKEN_URL, payload, REMOTE_ADDR='10.0.0.1',
+            HTTP_X_FORWARDED_FOR='2.2.2.2')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(THROTTLE_BACKEND='cache')
+    def test_shared_counter_limits_across_workers(self):
+        """Test the cache counter applies when local buckets are empty."""
+        cache.clear()
+        self.client.force_authenticate(self.user)
+        for _ in range(2):
+            self.client.get(PRODUCT_URL)
+        # A fresh worker has no local state.
+        throttling.buckets.clear()
+
+        res = self.client.get(PRODUCT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
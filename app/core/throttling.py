@@ -0,0 +1,153 @@
+"""Rate limiting with in-process token buckets.
+
+Every worker keeps a token bucket per client and scope in an
+OrderedDict, least recently used first. Buckets are immutable (tokens,
+timestamp, refilled at) tuples that are replaced, not updated, so no
+lock is taken; under contention a request or two more than the rate may
+get through, but nothing ever waits. When the table is full the least
+recently used buckets that have refilled are dropped, or failing that
+the least recently used one, so no request scans the table.
+
+With THROTTLE_BACKEND = 'cache' the bucket is backed by a fixed-window
+counter in the THROTTLE_CACHE cache, which is shared by all workers when
+that cache is Redis or Memcached. The local bucket is still checked
+first: a client it rejects is over the shared limit as well, so abusive
+clients are turned away without a round trip to the cache.
+"""
+
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """Return (requests, seconds) for a rate such as '100/min'."""
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+class LocalBuckets:
+    """Token buckets of one process, keyed by client and scope."""
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    def consume(self, key, capacity, period, now):
+        """Take a token; return 0 or the seconds until one is free."""
+        rate = capacity / period
+        tokens, stamp, _ = self._buckets.get(key, (capacity, now, now))
+        tokens = min(capacity, tokens + (now - stamp) * rate)
+        wait = 0
+        if tokens < 1:
+            wait = (1 - tokens) / rate
+        else:
+            tokens -= 1
+        self._store(key, (tokens, now, now + (capacity - tokens) / rate))
+        return wait
+
+    def _store(self, key, bucket):
+        buckets = self._buckets
+        if key not in buckets and len(buckets) >= self.max_keys:
+            self._evict(bucket[1])
+        buckets[key] = bucket
+        try:
+            buckets.move_to_end(key)
+        except KeyError:
+            # Evicted by another thread in the meantime.
+            pass
+
+    def _evict(self, now):
+        """Drop the least recently used buckets that have refilled by
+        `now`, or the least recently used one if none has."""
+        buckets = self._buckets
+        dropped = 0
+        try:
+            key, bucket = buckets.popitem(last=False)
+            while bucket[2] <= now:
+                dropped += 1
+                key, bucket = buckets.popitem(last=False)
+        except KeyError:
+            return
+        if dropped:
+            # Still refilling; it was only popped to look at it.
+            buckets[key] = bucket
+            buckets.move_to_end(key, last=False)
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class CacheCounter:
+    """Fixed-window request counter in a shared cache."""
+
+    def hit(self, key, limit, period, now):
+        """Count a request; return 0 or the seconds until the window
+        resets."""
+        cache = caches[settings.THROTTLE_CACHE]
+        window = int(now // period)
+        cache_key = f'throttle:{key}:{window}'
+        cache.add(cache_key, 0, period)
+        try:
+            count = cache.incr(cache_key)
+        except ValueError:
+            # The window expired between add() and incr().
+            cache.add(cache_key, 1, period)
+            count = 1
+        if count > limit:
+            return (window + 1) * period - now
+        return 0
+
+
+buckets = LocalBuckets()
+counter = CacheCounter()
+
+
+@receiver(setting_changed)
+def _reset_buckets(*, setting, **kwargs):
+    if setting in ('REST_FRAMEWORK', 'THROTTLE_BACKEND'):
+        buckets.clear()
+
+
+class BucketRateThrottle(BaseThrottle):
+    """Throttle each user, or each IP address for anonymous requests.
+
+    The rate comes from DEFAULT_THROTTLE_RATES under the view's
+    `throttle_scope`, or 'user' / 'anon' for views without one. Scopes
+    without a rate are not throttled.
+    """
+
+    def __init__(self):
+        self._wait = 0
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if request.user and request.user.is_authenticated:
+            scope = scope or 'user'
+            key = f'{scope}:user:{request.user.pk}'
+        else:
+            scope = scope or 'anon'
+            key = f'{scope}:ip:{self.get_ident(request)}'
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None:
+            return True
+
+        limit, period = parse_rate(rate)
+        now = time.time()
+        self._wait = buckets.consume(key, limit, period, now)
+        if not self._wait and settings.THROTTLE_BACKEND == 'cache':
+            self._wait = counter.hit(key, limit, period, now)
+        return not self._wait
+
+    def wait(self):
+        return self._wait
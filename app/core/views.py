@@ -0,0 +1,57 @@
+"""Views for the core app."""
+
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+from rest_framework.views import exception_handler as drf_exception_handler
+
+from core.hashing import HashingBusy
+from core.instrumentation import registry
+from user.authentication import SignedTokenAuthentication
+
+
+class ServiceBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins in progress, try again shortly.'
+    default_code = 'hashing_busy'
+
+
+def exception_handler(exc, context):
+    """DRF's exception handler, answering a full password hashing
+    queue with a 503."""
+    if isinstance(exc, HashingBusy):
+        exc = ServiceBusy()
+    return drf_exception_handler(exc, context)
+
+
+class MetricsView(APIView):
+    """Expose request instrumentation in the Prometheus text format."""
+    authentication_classes = [SignedTokenAuthentication]
+    permission_classes = [IsAdminUser]
+    schema = None
+
+    def get(self, request):
+        return HttpResponse(
+            registry.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
+
+
+def lazy_view(dotted_path, **initkwargs):
+    """Return a view that imports the view class at `dotted_path` on its
+    first request instead of when the URLconf loads."""
+    view = None
+
+    @csrf_exempt
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    wrapper.__name__ = dotted_path.rsplit('.', 1)[-1]
+    return wrapper
@@ -0,0 +1,118 @@
+"""Bulk updates and deletes of a user's products.
+
+Items are handled in batches of BATCH_SIZE: each batch is validated
+with one ownership query and written in its own transaction. A field
+set to the same value on many products is written with one UPDATE per
+distinct value, otherwise with `bulk_update`; either way only the
+submitted columns are written. Deletes go through `QuerySet.delete()`, so
+cascades and delete signals run as for a single product; the change
+feed tombstones they log are inserted together.
+
+Every item gets a result: 'updated' or 'deleted', 'not_found' for ids
+the user does not own, or 'invalid' with the field errors.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from core.models import CatalogChange, InventoryMovement, Product
+from products import changes
+from products.serializers import BulkProductItemSerializer
+
+BATCH_SIZE = 1000
+
+
+def _batches(items):
+    for start in range(0, len(items), BATCH_SIZE):
+        yield items[start:start + BATCH_SIZE]
+
+
+def _apply(changed):
+    """Write {product id: {field: value}}, field by field: one UPDATE
+    per distinct value when values repeat, `bulk_update` otherwise."""
+    by_field = defaultdict(lambda: defaultdict(list))
+    for pk, values in changed.items():
+        for field, value in values.items():
+            by_field[field][value].append(pk)
+    for field, groups in by_field.items():
+        count = sum(len(ids) for ids in groups.values())
+        if len(groups) * 4 <= count:
+            for value, ids in groups.items():
+                Product.objects.filter(id__in=ids).update(**{field: value})
+        else:
+            Product.objects.bulk_update([
+                Product(id=pk, **{field: value})
+                for value, ids in groups.items() for pk in ids
+            ], [field])
+
+
+def update_products(user, items, reason='bulk update'):
+    """Apply a list of {'id': ..., field: value} dicts to `user`'s
+    products. Return one result dict per item, in order."""
+    # One serializer validates every item, so its fields are built once.
+    item_serializer = BulkProductItemSerializer()
+    results = []
+    for batch in _batches(items):
+        validated, errors = [], {}
+        for index, item in enumerate(batch):
+            try:
+                validated.append(item_serializer.run_validation(item))
+            except ValidationError as exc:
+                validated.append(None)
+                errors[index] = exc.detail
+        ids = {values['id'] for values in validated if values}
+        changed = {}
+        with transaction.atomic():
+            stock = dict(
+                Product.objects.filter(user=user, id__in=ids)
+                .select_for_update().order_by('id')
+                .values_list('id', 'stock')
+            )
+            for index, (item, values) in enumerate(zip(batch, validated)):
+                if values is None:
+                    results.append({
+                        'id': item.get('id'),
+                        'status': 'invalid',
+                        'errors': errors[index],
+                    })
+                    continue
+                values = dict(values)
+                pk = values.pop('id')
+                if pk not in stock:
+                    results.append({'id': pk, 'status': 'not_found'})
+                    continue
+                changed.setdefault(pk, {}).update(values)
+                results.append({'id': pk, 'status': 'updated'})
+
+            changed = {pk: values for pk, values in changed.items() if values}
+            _apply(changed)
+            InventoryMovement.objects.bulk_create([
+                InventoryMovement(
+                    product_id=pk, user=user,
+                    delta=values['stock'] - stock[pk],
+                    stock_after=values['stock'], reason=reason,
+                )
+                for pk, values in changed.items()
+                if values.get('stock', stock[pk]) != stock[pk]
+            ])
+            changes.record(
+                CatalogChange.PRODUCT, [(pk, user.id) for pk in changed])
+    return results
+
+
+def delete_products(user, ids):
+    """Delete `user`'s products with the given ids. Return one result
+    dict per id, in order."""
+    results = []
+    for batch in _batches(ids):
+        with transaction.atomic(), changes.batched():
+            owned = Product.objects.filter(user=user, id__in=batch)
+            found = set(owned.values_list('id', flat=True))
+            owned.delete()
+        results.extend(
+            {'id': pk, 'status': 'deleted' if pk in found else 'not_found'}
+            for pk in batch
+        )
+    return results
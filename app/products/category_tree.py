@@ -0,0 +1,87 @@
+"""Category subtrees and the cached category tree.
+
+Each category's `path` holds the ids from its root down to it, so the
+categories under X, or the products in them, are one range query on
+the path index. A user's tree is built from one query ordered by path
+and kept in the default cache as compressed JSON, which is a few
+hundred KB for 50k categories and is served without parsing it. A
+version number in the cache, bumped whenever a category is saved or
+deleted, retires every cached tree at once and is part of the trees'
+ETags.
+"""
+
+import json
+import operator
+import zlib
+from functools import reduce
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from core.models import Category, Product
+
+VERSION_KEY = 'category-tree-version'
+
+
+def subtree_q(paths, prefix=''):
+    """Return a Q matching the categories in the subtrees at `paths`,
+    or with a `prefix` such as 'category__' the related rows."""
+    ranges = [
+        Q(**{f'{prefix}path__gte': low, f'{prefix}path__lt': high})
+        for low, high in map(Category.subtree_bounds, paths)
+    ]
+    return reduce(operator.or_, ranges) if ranges else Q(pk__in=[])
+
+
+def products_in(paths):
+    """Return the ids of the products in the subtrees at `paths`, as a
+    subquery that starts from the path index rather than the products.
+    """
+    return Product.categories.through.objects.filter(
+        subtree_q(paths, prefix='category__'),
+    ).values('product_id')
+
+
+def invalidate():
+    """Retire the cached trees in every process."""
+    if not cache.add(VERSION_KEY, 1, timeout=None):
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 1, timeout=None)
+
+
+def build_tree(rows):
+    """Nest (id, name, parent id) rows, ordered by path, into a list of
+    {'id', 'name', 'children'} dicts."""
+    nodes, roots = {}, []
+    for pk, name, parent_id in rows:
+        node = nodes[pk] = {'id': pk, 'name': name, 'children': []}
+        parent = nodes.get(parent_id)
+        if parent is None:
+            roots.append(node)
+        else:
+            parent['children'].append(node)
+    return roots
+
+
+def get_tree(user, root=None):
+    """Return an ETag and the JSON of the user's categories, or those
+    under `root`, nested."""
+    version = cache.get(VERSION_KEY, 0)
+    scope = f'{user.pk}:{root.pk if root else ""}'
+    key = f'category-tree:{version}:{scope}'
+    compressed = cache.get(key)
+    if compressed is None:
+        categories = Category.objects.filter(user=user)
+        if root is not None:
+            categories = categories.filter(subtree_q([root.path]))
+        tree = build_tree(
+            categories.order_by('path').values_list('id', 'name', 'parent'))
+        content = json.dumps(tree, separators=(',', ':')).encode()
+        cache.set(
+            key, zlib.compress(content), settings.CATEGORY_TREE_CACHE_TIMEOUT)
+    else:
+        content = zlib.decompress(compressed)
+    return f'"{version}:{scope}"', content
@@ -0,0 +1,125 @@
+"""Catalog change feed.
+
+Every save or delete of a product, tag or category appends a
+`CatalogChange` row; the signal handlers in `products.signals` and the
+bulk writers (`products.inventory`, `products.labels`) write it on the
+same connection as the change, so it commits or rolls back with it.
+The row id is a monotonic cursor: a client passes the last cursor it
+saw and gets only what changed since, with deleted objects reported as
+tombstones. Ids are allocated at insert rather than at commit, so a
+change made in a long transaction can appear behind a cursor already
+served; writes through the API are short transactions, which keeps that
+window small.
+
+A page of up to CHANGE_FEED_PAGE_SIZE entries takes one query for the
+log and one per kind of object, however many entries it holds.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from core.models import CatalogChange, Category, Product, Tag
+
+BATCH_SIZE = 1000
+
+MODELS = {
+    CatalogChange.PRODUCT: Product,
+    CatalogChange.TAG: Tag,
+    CatalogChange.CATEGORY: Category,
+}
+KINDS = {model: kind for kind, model in MODELS.items()}
+
+_pending = threading.local()
+
+
+@contextmanager
+def batched():
+    """Collect the changes logged inside the block, for example by the
+    delete signals of a bulk delete, and insert them together when it
+    exits."""
+    if getattr(_pending, 'rows', None) is not None:
+        yield
+        return
+    _pending.rows = []
+    try:
+        yield
+        CatalogChange.objects.bulk_create(
+            _pending.rows, batch_size=BATCH_SIZE)
+    finally:
+        _pending.rows = None
+
+
+def record(kind, objects, deleted=False):
+    """Log changes to the given (object id, owner id) pairs."""
+    rows = [
+        CatalogChange(
+            kind=kind, object_id=object_id, user_id=user_id,
+            deleted=deleted,
+        )
+        for object_id, user_id in objects
+    ]
+    if getattr(_pending, 'rows', None) is not None:
+        _pending.rows.extend(rows)
+    else:
+        CatalogChange.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def record_instance(instance, deleted=False):
+    """Log a change to a product, tag or category."""
+    record(KINDS[type(instance)], [(instance.pk, instance.user_id)],
+           deleted=deleted)
+
+
+def record_products(product_ids):
+    """Log changes to products updated in bulk."""
+    product_ids = sorted(set(product_ids))
+    for start in range(0, len(product_ids), BATCH_SIZE):
+        record(CatalogChange.PRODUCT, Product.objects.filter(
+            id__in=product_ids[start:start + BATCH_SIZE],
+        ).values_list('id', 'user_id'))
+
+
+class ChangePage:
+    """Changes of one user's catalog after a cursor.
+
+    `latest` maps each kind to {object id: deleted} for the objects
+    changed in the page, keeping only their last change.
+    """
+
+    def __init__(self, user, since, limit):
+        entries = list(
+            CatalogChange.objects
+            .filter(user=user, id__gt=since)
+            .order_by('id')
+            .values_list('id', 'kind', 'object_id', 'deleted')
+            [:limit + 1]
+        )
+        self.has_more = len(entries) > limit
+        entries = entries[:limit]
+        self.cursor = entries[-1][0] if entries else since
+        self.latest = {kind: {} for kind in MODELS}
+        for _, kind, object_id, deleted in entries:
+            self.latest[kind][object_id] = deleted
+
+    def objects(self, kind, queryset=None):
+        """Return the current rows of the changed objects of `kind`
+        that still exist."""
+        ids = [pk for pk, deleted in self.latest[kind].items()
+               if not deleted]
+        if not ids:
+            return []
+        if queryset is None:
+            queryset = MODELS[kind].objects.all()
+        return list(queryset.filter(id__in=ids).order_by('id'))
+
+    def deleted(self, kind, found=()):
+        """Return the ids of deleted objects of `kind`.
+
+        Objects logged as changed but missing from `found` were deleted
+        by a change past the end of this page, and are tombstones too.
+        """
+        found = {obj.pk for obj in found}
+        return sorted(
+            pk for pk, deleted in self.latest[kind].items()
+            if deleted or pk not in found
+        )
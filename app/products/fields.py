@@ -0,0 +1,81 @@
+"""Custom serializer fields for product API."""
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """Many related field that resolves every submitted pk in one query.
+
+    Lists longer than `max_length` are rejected before any pk is parsed.
+    """
+    default_error_messages = {
+        'max_length': 'Ensure this field has no more than {max_length} '
+                      'elements.',
+    }
+
+    def __init__(self, max_length=None, **kwargs):
+        self.max_length = max_length
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        if self.max_length is not None and len(data) > self.max_length:
+            self.fail('max_length', max_length=self.max_length)
+
+        child = self.child_relation
+        queryset = child.get_queryset()
+        pk = queryset.model._meta.pk
+        pks = []
+        for item in data:
+            if child.pk_field is not None:
+                item = child.pk_field.to_internal_value(item)
+            try:
+                if isinstance(item, bool):
+                    raise TypeError
+                pks.append(pk.to_python(item))
+            except (TypeError, ValueError, DjangoValidationError):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+
+        pks = list(dict.fromkeys(pks))
+        objs = queryset.in_bulk(pks)
+        for value in pks:
+            if value not in objs:
+                child.fail('does_not_exist', pk_value=value)
+        return [objs[value] for value in pks]
+
+
+class UserScopedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field limited to objects visible to the request user.
+
+    `user_field` is the lookup from the related model to its owner.
+    With `many=True` all ids are validated in a single query.
+    """
+
+    def __init__(self, user_field='user', **kwargs):
+        self.user_field = user_field
+        super().__init__(**kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        max_length = kwargs.pop('max_length', None)
+        list_kwargs = {
+            'child_relation': cls(*args, **kwargs),
+            'max_length': max_length,
+        }
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        """Restrict the queryset to the authenticated user."""
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return queryset.none()
+        return queryset.filter(**{self.user_field: request.user})
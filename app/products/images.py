@@ -0,0 +1,99 @@
+"""Resized renditions of product images."""
+
+import hashlib
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from core import jobs
+from core.models import Product
+from products import changes
+
+RENDITION_DIR = 'products/renditions'
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def _encode(image, fmt):
+    """Encode an image and return its bytes."""
+    pil_format, options = FORMATS[fmt]
+    if pil_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def build_renditions(source, storage=None):
+    """Resize `source` and store each rendition under a content-hashed
+    name. Return a mapping of rendition name to {format: storage name}.
+    """
+    # Pillow is only needed by the rendition workers.
+    from PIL import Image, ImageOps
+
+    storage = storage or default_storage
+    with storage.open(source, 'rb') as fh, Image.open(fh) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ('RGB', 'RGBA'):
+            original = original.convert('RGBA')
+        stem = os.path.splitext(os.path.basename(source))[0]
+
+        renditions = {}
+        for name, edge in settings.PRODUCT_IMAGE_RENDITIONS.items():
+            image = original.copy()
+            image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            renditions[name] = {}
+            for fmt in FORMATS:
+                data = _encode(image, fmt)
+                digest = hashlib.sha256(data).hexdigest()[:16]
+                path = f'{RENDITION_DIR}/{stem}-{name}.{digest}.{fmt}'
+                if not storage.exists(path):
+                    path = storage.save(path, ContentFile(data))
+                renditions[name][fmt] = path
+    return renditions
+
+
+def generate_renditions(product_id):
+    """Build renditions for a product's current image and record them."""
+    product = Product.objects.filter(pk=product_id).only('image').first()
+    if product is None or not product.image:
+        return
+    source = product.image.name
+    renditions = build_renditions(source)
+    renditions['source'] = source
+    updated = Product.objects.filter(pk=product_id, image=source).update(
+        image_renditions=renditions)
+    if updated:
+        # update() skips post_save, which logs saves to the change feed.
+        changes.record_products([product_id])
+
+
+def schedule_renditions(product):
+    """Queue rendition generation as a background job."""
+    jobs.enqueue(generate_renditions, product_id=product.pk)
+
+
+def needs_renditions(product):
+    """Return True if the product's image has no renditions yet."""
+    if not product.image:
+        return False
+    renditions = product.image_renditions or {}
+    return renditions.get('source') != product.image.name
+
+
+def rendition_urls(product, storage=None):
+    """Return the URLs of a product's renditions."""
+    storage = storage or default_storage
+    renditions = dict(product.image_renditions or {})
+    source = renditions.pop('source', None)
+    if not product.image or source != product.image.name:
+        return {}
+    return {
+        name: {fmt: storage.url(path) for fmt, path in formats.items()}
+        for name, formats in renditions.items()
+    }
@@ -0,0 +1,100 @@
+"""Stock adjustments and the inventory ledger.
+
+Stock is changed with deltas applied as `F('stock') + delta`, never by
+writing back a value read earlier, so concurrent adjustments add up
+instead of overwriting each other. Every change is recorded as an
+`InventoryMovement` in the same transaction.
+"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, F, When
+
+from core.models import CatalogChange, InventoryMovement, Product
+from products import changes
+
+BATCH_SIZE = 500
+
+
+# Largest stock the column holds on every supported database.
+MAX_STOCK = 2_147_483_647
+
+
+class StockOutOfRange(Exception):
+    """An adjustment would take a product's stock out of range."""
+    message = 'Stock out of range for products: '
+
+    def __init__(self, product_ids):
+        self.product_ids = sorted(product_ids)
+        super().__init__(
+            self.message + ', '.join(map(str, self.product_ids)))
+
+
+class InsufficientStock(StockOutOfRange):
+    """An adjustment would take a product's stock below zero."""
+    message = 'Not enough stock for products: '
+
+
+class StockLimitExceeded(StockOutOfRange):
+    """An adjustment would take a product's stock above MAX_STOCK."""
+    message = 'Stock limit exceeded for products: '
+
+
+def adjust_stock(products, adjustments, user=None, reason=''):
+    """Apply {product id: delta} to the stock of the given products.
+
+    `products` is the queryset the ids must belong to; deltas for other
+    ids are ignored. Nothing is changed if any product would go below
+    zero or above MAX_STOCK. Return {product id: new stock} for the
+    adjusted products.
+    """
+    deltas = Counter()
+    for product_id, delta in adjustments:
+        deltas[product_id] += delta
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    stock, owners = {}, {}
+
+    with transaction.atomic():
+        ids = sorted(deltas)
+        for start in range(0, len(ids), BATCH_SIZE):
+            # Lock the rows in id order, so concurrent batches cannot
+            # deadlock, and check the result before writing anything.
+            for pk, value, owner_id in (
+                    products.filter(id__in=ids[start:start + BATCH_SIZE])
+                    .select_for_update().order_by('id')
+                    .values_list('id', 'stock', 'user_id')):
+                stock[pk], owners[pk] = value, owner_id
+        short = [pk for pk in stock if stock[pk] + deltas[pk] < 0]
+        if short:
+            raise InsufficientStock(short)
+        over = [pk for pk in stock if stock[pk] + deltas[pk] > MAX_STOCK]
+        if over:
+            raise StockLimitExceeded(over)
+
+        ids = sorted(stock)
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start:start + BATCH_SIZE]
+            Product.objects.filter(id__in=batch).update(stock=Case(
+                *[When(id=pk, then=F('stock') + deltas[pk]) for pk in batch]
+            ))
+        for pk in ids:
+            stock[pk] += deltas[pk]
+        InventoryMovement.objects.bulk_create([
+            InventoryMovement(
+                product_id=pk, user=user, delta=deltas[pk],
+                stock_after=stock[pk], reason=reason,
+            )
+            for pk in ids
+        ], batch_size=BATCH_SIZE)
+        changes.record(CatalogChange.PRODUCT, owners.items())
+    return stock
+
+
+def record_movement(product, old_stock, user=None, reason=''):
+    """Record a change to `product.stock` made by saving the product."""
+    if product.stock != old_stock:
+        InventoryMovement.objects.create(
+            product=product, user=user, delta=product.stock - old_stock,
+            stock_after=product.stock, reason=reason,
+        )
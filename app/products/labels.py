@@ -0,0 +1,103 @@
+"""Denormalized tag and category arrays on products.
+
+`Product.cached_tags` and `Product.cached_categories` hold the same
+dicts the product serializer renders for `tags` and `categories`, so a
+product can be read without joining the M2M tables. The signal handlers
+in `products.signals` refresh them in the transaction that changes the
+relations, and `repair_product_labels` fixes any drift. Both log the
+rewritten products to the change feed.
+"""
+
+from collections import defaultdict
+
+from core.models import Product
+from products import changes
+
+BATCH_SIZE = 1000
+
+
+def tag_entry(tag_id, name, user_id):
+    return {'id': tag_id, 'name': name, 'user': user_id}
+
+
+def category_entry(category_id, name):
+    return {'id': category_id, 'name': name}
+
+
+def compute_labels(product_ids):
+    """Return {product id: (tags, categories)} read from the M2M
+    tables."""
+    tags = defaultdict(list)
+    rows = (
+        Product.tags.through.objects
+        .filter(product_id__in=product_ids)
+        .order_by('tag_id')
+        .values_list('product_id', 'tag_id', 'tag__name', 'tag__user_id')
+    )
+    for product_id, tag_id, name, user_id in rows:
+        tags[product_id].append(tag_entry(tag_id, name, user_id))
+
+    categories = defaultdict(list)
+    rows = (
+        Product.categories.through.objects
+        .filter(product_id__in=product_ids)
+        .order_by('category_id')
+        .values_list('product_id', 'category_id', 'category__name')
+    )
+    for product_id, category_id, name in rows:
+        categories[product_id].append(category_entry(category_id, name))
+
+    return {
+        product_id: (tags[product_id], categories[product_id])
+        for product_id in product_ids
+    }
+
+
+def refresh_labels(product_ids, instance=None):
+    """Rewrite the denormalized arrays of the given products.
+
+    If `instance` is one of the products its in-memory copy is updated
+    too, so a later `save()` does not write back stale arrays.
+    """
+    product_ids = sorted(set(product_ids))
+    for start in range(0, len(product_ids), BATCH_SIZE):
+        batch = product_ids[start:start + BATCH_SIZE]
+        labels = compute_labels(batch)
+        Product.objects.bulk_update([
+            Product(id=product_id, cached_tags=tags,
+                    cached_categories=categories)
+            for product_id, (tags, categories) in labels.items()
+        ], ['cached_tags', 'cached_categories'])
+        changes.record_products(batch)
+        if instance is not None and instance.pk in labels:
+            instance.cached_tags, instance.cached_categories = \
+                labels[instance.pk]
+
+
+def repair_labels(dry_run=False, batch_size=BATCH_SIZE):
+    """Compare every product's arrays with its M2M rows and fix the ones
+    that differ. Return (products checked, products repaired)."""
+    checked = repaired = 0
+    last_id = 0
+    while True:
+        rows = list(
+            Product.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'cached_tags', 'cached_categories')
+            [:batch_size]
+        )
+        if not rows:
+            return checked, repaired
+        last_id = rows[-1][0]
+        expected = compute_labels([row[0] for row in rows])
+        drifted = [
+            Product(id=product_id, cached_tags=expected[product_id][0],
+                    cached_categories=expected[product_id][1])
+            for product_id, tags, categories in rows
+            if (tags, categories) != expected[product_id]
+        ]
+        checked += len(rows)
+        repaired += len(drifted)
+        if drifted and not dry_run:
+            Product.objects.bulk_update(
+                drifted, ['cached_tags', 'cached_categories'])
+            changes.record_products(product.id for product in drifted)
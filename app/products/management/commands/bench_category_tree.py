@@ -0,0 +1,161 @@
+"""
+Benchmark subtree queries and the cached tree on a large category tree.
+"""
+import time
+import zlib
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from core import benchmark, seeding
+from core.models import Category, Product
+from products import category_tree
+
+
+def _walk_levels(root):
+    """Return the ids under `root` by querying one level at a time, as
+    a tree with parent links alone would."""
+    ids, level = [root.id], [root.id]
+    while level:
+        level = list(
+            Category.objects.filter(parent__in=level)
+            .values_list('id', flat=True)
+        )
+        ids.extend(level)
+    return ids
+
+
+class Command(BaseCommand):
+    """Django command to time the products under a category, by path
+    range and by walking the tree level by level, and the category tree
+    built from the database and read from the cache."""
+    help = 'Time subtree product queries and the cached category tree.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=50_000)
+        parser.add_argument('--products', type=int, default=200_000)
+        parser.add_argument(
+            '--fanout', type=int, default=8,
+            help='Children per category in the generated tree.')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--output', help='Path of the JSON results.')
+
+    def handle(self, *args, **options):
+        prefix = (
+            f"bench-tree-{options['categories']}-{options['products']}")
+        user = (
+            get_user_model().objects.filter(email__startswith=f'{prefix}-')
+            .first()
+        )
+        if user is None:
+            self.stdout.write(
+                f"Seeding {options['categories']} categories and "
+                f"{options['products']} products...")
+            seeding.generate(
+                prefix, users=1, products=options['products'], tags=1,
+                categories=options['categories'], tags_per_product=0,
+                cart_items=0, wishlist_items=0,
+            )
+            user = get_user_model().objects.get(
+                email__startswith=f'{prefix}-')
+            self._arrange(user, options['fanout'])
+
+        categories = list(
+            Category.objects.filter(user=user).order_by('path')
+            .only('id', 'path')
+        )
+        # The first category at each depth, skipping the top root,
+        # whose subtree is the whole catalog.
+        by_depth = {}
+        for category in categories:
+            if category.depth:
+                by_depth.setdefault(category.depth, category)
+        repeat = options['repeat']
+
+        results = []
+        for depth, root in sorted(by_depth.items()):
+            for method, query in (
+                    ('path range', lambda: self._by_path(user, root)),
+                    ('level walk', lambda: self._by_levels(user, root))):
+                latencies, rows = self._time(query, repeat)
+                results.append({
+                    'case': 'subtree products', 'method': method,
+                    'depth': depth, 'rows': rows,
+                    'latency_ms': benchmark.summarize(latencies),
+                })
+                self.stdout.write(
+                    f'depth {depth} {method:<11}'
+                    f" p50 {results[-1]['latency_ms']['p50']:>9} ms"
+                    f'  {rows:>7} products'
+                )
+
+        def cold():
+            category_tree.invalidate()
+            return category_tree.get_tree(user)
+
+        _, content = cold()
+        size = len(zlib.compress(content))
+        for method, query in (
+                ('cold', cold),
+                ('cached', lambda: category_tree.get_tree(user))):
+            latencies, _ = self._time(query, repeat)
+            results.append({
+                'case': 'tree', 'method': method, 'bytes': size,
+                'latency_ms': benchmark.summarize(latencies),
+            })
+            self.stdout.write(
+                f'tree {method:<6}'
+                f" p50 {results[-1]['latency_ms']['p50']:>9} ms"
+                f'  {size} bytes cached'
+            )
+
+        path = benchmark.write_results('category-tree', {
+            'meta': benchmark.run_metadata(
+                categories=len(categories), products=options['products'],
+                fanout=options['fanout'], repeat=repeat,
+                cache=cache.__class__.__name__),
+            'results': results,
+        }, options['output'])
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
+
+    def _arrange(self, user, fanout):
+        """Turn the seeded flat categories into a tree with `fanout`
+        children per category, breadth first."""
+        categories = list(
+            Category.objects.filter(user=user).order_by('id'))
+        for i, category in enumerate(categories):
+            segment = Category.path_segment(category.id)
+            if i:
+                parent = categories[(i - 1) // fanout]
+                category.parent = parent
+                category.path = parent.path + segment
+            else:
+                category.path = segment
+        Category.objects.bulk_update(
+            categories, ['parent', 'path'], batch_size=seeding.BATCH_SIZE)
+        category_tree.invalidate()
+
+    def _by_path(self, user, root):
+        return list(
+            Product.objects.filter(user=user)
+            .filter(category_tree.subtree_q(
+                [root.path], prefix='categories__'))
+            .distinct().values_list('id', flat=True)
+        )
+
+    def _by_levels(self, user, root):
+        return list(
+            Product.objects.filter(
+                user=user, categories__in=_walk_levels(root))
+            .distinct().values_list('id', flat=True)
+        )
+
+    def _time(self, query, repeat):
+        latencies, rows = [], 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = query()
+            latencies.append(time.perf_counter() - start)
+            rows = len(result)
+        return latencies, rows
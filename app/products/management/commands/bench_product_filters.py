@@ -0,0 +1,122 @@
+"""
+Benchmark the price and stock filters of the product list.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core import benchmark, seeding
+from core.models import Product
+from products.views import ProductViewSet
+
+INDEXES = ['core_product_user_price_idx', 'core_product_user_stock_idx']
+
+# Each case matches well under 1% of a user's products, so the time
+# goes to finding the rows rather than serializing them.
+CASES = {
+    'price range': {'min_price': '500.00', 'max_price': '505.00'},
+    'price range in stock': {
+        'min_price': '500.00', 'max_price': '505.00', 'in_stock': 'true'},
+    'cheapest first': {'max_price': '5.00', 'ordering': 'price'},
+    'dearest first': {'min_price': '995.00', 'ordering': '-price'},
+    'out of stock': {'in_stock': 'false'},
+}
+
+
+class Command(BaseCommand):
+    """Django command to time filtered product lists on a large catalog
+    with and without the (user, price) and (user, stock) indexes."""
+    help = 'Time price and stock filters with and without their indexes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--output', help='Path of the JSON results.')
+
+    def handle(self, *args, **options):
+        prefix = f"bench-filters-{options['products']}"
+        users = list(
+            get_user_model().objects.filter(email__startswith=f'{prefix}-')
+            .order_by('id')
+        )
+        if not users:
+            self.stdout.write(
+                f"Seeding {options['products']} products...")
+            seeding.generate(
+                prefix, users=options['users'],
+                products=options['products'], tags=100, categories=20,
+                cart_items=0, wishlist_items=0,
+            )
+            users = list(
+                get_user_model().objects.filter(
+                    email__startswith=f'{prefix}-').order_by('id')
+            )
+
+        results = []
+        for indexed in (False, True):
+            if not indexed:
+                self._remove_indexes()
+            try:
+                for name, params in CASES.items():
+                    result = self._time(users, params, options['repeat'])
+                    result.update(case=name, indexed=indexed)
+                    results.append(result)
+                    self.stdout.write(
+                        f"{name:<22} {'indexed' if indexed else 'no index':<9}"
+                        f" p50 {result['latency_ms']['p50']:>9} ms"
+                        f"  {result['rows']:>4} rows"
+                    )
+            finally:
+                if not indexed:
+                    self._add_indexes()
+
+        path = benchmark.write_results('product-filters', {
+            'meta': benchmark.run_metadata(
+                products=options['products'], users=len(users),
+                repeat=options['repeat']),
+            'results': results,
+        }, options['output'])
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
+
+    def _indexes(self):
+        return [
+            index for index in Product._meta.indexes if index.name in INDEXES
+        ]
+
+    def _remove_indexes(self):
+        with connection.schema_editor() as editor:
+            for index in self._indexes():
+                editor.remove_index(Product, index)
+
+    def _add_indexes(self):
+        with connection.schema_editor() as editor:
+            for index in self._indexes():
+                editor.add_index(Product, index)
+
+    def _time(self, users, params, repeat):
+        view = ProductViewSet.as_view({'get': 'list'})
+        factory = APIRequestFactory()
+        latencies, rows = [], 0
+        for i in range(repeat):
+            request = factory.get('/', params)
+            force_authenticate(request, users[i % len(users)])
+            start = time.perf_counter()
+            response = view(request)
+            response.render()
+            latencies.append(time.perf_counter() - start)
+            rows = len(response.data)
+
+        request = Request(factory.get('/', params))
+        request.user = users[0]
+        viewset = ProductViewSet(request=request, action='list')
+        return {
+            'params': params,
+            'rows': rows,
+            'latency_ms': benchmark.summarize(latencies),
+            'plan': viewset.get_queryset().explain(),
+        }
@@ -0,0 +1,83 @@
+"""
+Benchmark product reads with and without the denormalized labels, and
+with every field or a sparse field set.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core import benchmark
+from products.views import ProductViewSet
+
+# Query parameters of full and sparse reads.
+FIELD_SETS = {
+    'all fields': {},
+    'grid': {'fields': 'id,name,price'},
+    'grid + tag ids': {'fields': 'id,name,price,tags'},
+}
+
+
+class Command(BaseCommand):
+    """Django command to time ProductViewSet.list with tags and
+    categories read from the arrays on Product or from the M2M tables,
+    for full and sparse field sets."""
+    help = 'Compare product list reads with and without denormalized labels.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', choices=benchmark.SCALES, default='small')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--output', help='Path of the JSON results.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Seeding {options['scale']} catalog...")
+        owners = [user for user, _ in benchmark.seed_catalog(options['scale'])]
+        view = ProductViewSet.as_view({'get': 'list'})
+        factory = APIRequestFactory()
+
+        results = []
+        for denormalized in (False, True):
+            for name, params in FIELD_SETS.items():
+                with override_settings(
+                        PRODUCT_DENORMALIZED_LABELS=denormalized):
+                    result = self._time(
+                        view, factory, owners, params, options['repeat'])
+                result.update(denormalized=denormalized, fields=name)
+                results.append(result)
+                self.stdout.write(
+                    f"{'arrays' if denormalized else 'M2M joins':<10} "
+                    f"{name:<15} "
+                    f"p50 {result['latency_ms']['p50']:>9} ms  "
+                    f"p95 {result['latency_ms']['p95']:>9} ms  "
+                    f"{result['queries']} queries  "
+                    f"{result['bytes']:>9} bytes"
+                )
+
+        path = benchmark.write_results('product-reads', {
+            'meta': benchmark.run_metadata(
+                scale=options['scale'], repeat=options['repeat']),
+            'results': results,
+        }, options['output'])
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
+
+    def _time(self, view, factory, owners, params, repeat):
+        latencies, queries, size = [], 0, 0
+        for i in range(repeat):
+            request = factory.get('/', params)
+            force_authenticate(request, owners[i % len(owners)])
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = view(request)
+                response.render()
+                latencies.append(time.perf_counter() - start)
+            queries, size = len(captured), len(response.content)
+        return {
+            'params': params,
+            'queries': queries,
+            'bytes': size,
+            'latency_ms': benchmark.summarize(latencies),
+        }
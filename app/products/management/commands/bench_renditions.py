@@ -0,0 +1,81 @@
+"""
+Benchmark rendition generation throughput across worker counts.
+"""
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from products.images import build_renditions
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the image rendition pool."""
+    help = 'Measure rendition throughput for increasing worker counts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', type=int, default=32)
+        parser.add_argument('--width', type=int, default=3000)
+        parser.add_argument('--height', type=int, default=2000)
+        parser.add_argument(
+            '--workers', type=int, nargs='+',
+            help='Worker counts to try (default: 1, 2, 4, ... CPUs).',
+        )
+        parser.add_argument('--output', help='Write results as JSON.')
+
+    def handle(self, *args, **options):
+        workers = options['workers'] or self._default_workers()
+        results = []
+        with tempfile.TemporaryDirectory() as root:
+            storage = FileSystemStorage(location=root)
+            sources = self._make_sources(storage, options)
+            for count in workers:
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=count) as pool:
+                    list(pool.map(
+                        lambda name: build_renditions(name, storage),
+                        sources,
+                    ))
+                elapsed = time.perf_counter() - start
+                result = {
+                    'workers': count,
+                    'images': len(sources),
+                    'seconds': round(elapsed, 3),
+                    'images_per_second': round(len(sources) / elapsed, 2),
+                }
+                results.append(result)
+                self.stdout.write(
+                    f"{count:>3} workers: {result['images_per_second']} "
+                    f"images/s ({result['seconds']}s)"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump({'renditions': results}, fh, indent=2)
+
+    def _default_workers(self):
+        """Return powers of two up to the CPU count."""
+        cpus = os.cpu_count() or 1
+        counts = [1]
+        while counts[-1] * 2 <= cpus:
+            counts.append(counts[-1] * 2)
+        if counts[-1] != cpus:
+            counts.append(cpus)
+        return counts
+
+    def _make_sources(self, storage, options):
+        """Write synthetic source images and return their names."""
+        size = (options['width'], options['height'])
+        sources = []
+        for i in range(options['images']):
+            image = Image.linear_gradient('L').resize(size).convert('RGB')
+            image = image.rotate(i * 7)
+            path = os.path.join(storage.location, f'source-{i}.jpg')
+            image.save(path, 'JPEG', quality=90)
+            sources.append(os.path.basename(path))
+        return sources
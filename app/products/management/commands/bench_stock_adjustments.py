@@ -0,0 +1,78 @@
+"""
+Benchmark stock adjustments made one PATCH at a time and in one batch.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core import benchmark
+from core.models import Product
+from products.views import ProductViewSet
+
+
+class Command(BaseCommand):
+    """Django command to time changing the stock of every product of a
+    user with PATCH requests and with one adjust-stock request."""
+    help = 'Compare per-product stock updates with a batched adjustment.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', choices=benchmark.SCALES, default='small')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--output', help='Path of the JSON results.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Seeding {options['scale']} catalog...")
+        owner = benchmark.seed_catalog(options['scale'])[0][0]
+        products = list(
+            Product.objects.filter(user=owner).values_list('id', 'stock'))
+        factory = APIRequestFactory()
+        patch = ProductViewSet.as_view({'patch': 'partial_update'})
+        adjust = ProductViewSet.as_view({'post': 'adjust_stock'})
+
+        def one_by_one():
+            for pk, stock in products:
+                request = factory.patch(
+                    '/', {'stock': stock + 1}, format='json')
+                force_authenticate(request, owner)
+                patch(request, pk=pk)
+
+        def batched():
+            request = factory.post('/', {
+                'adjustments': [
+                    {'product': pk, 'delta': 1} for pk, _ in products
+                ],
+            }, format='json')
+            force_authenticate(request, owner)
+            adjust(request)
+
+        results = []
+        unthrottled = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+        for name, run in (('patch', one_by_one), ('batch', batched)):
+            latencies = []
+            with override_settings(REST_FRAMEWORK=unthrottled):
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    run()
+                    latencies.append(time.perf_counter() - start)
+            result = {
+                'mode': name,
+                'products': len(products),
+                'latency_ms': benchmark.summarize(latencies),
+            }
+            results.append(result)
+            self.stdout.write(
+                f"{name:<6} {len(products)} products  "
+                f"p50 {result['latency_ms']['p50']:>10} ms  "
+                f"p95 {result['latency_ms']['p95']:>10} ms"
+            )
+
+        path = benchmark.write_results('stock-adjustments', {
+            'meta': benchmark.run_metadata(
+                scale=options['scale'], repeat=options['repeat']),
+            'results': results,
+        }, options['output'])
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
@@ -0,0 +1,26 @@
+"""
+Django command to fix drift in the denormalized product labels.
+"""
+from django.core.management.base import BaseCommand
+
+from products.labels import repair_labels
+
+
+class Command(BaseCommand):
+    """Compare Product.cached_tags/cached_categories with the M2M tables
+    and rewrite the ones that differ."""
+    help = 'Check and repair the denormalized tag and category arrays.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report products whose arrays are out of date.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        checked, drifted = repair_labels(
+            dry_run=options['dry_run'], batch_size=options['batch_size'])
+        verb = 'out of date' if options['dry_run'] else 'repaired'
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} products, {drifted} {verb}.'))
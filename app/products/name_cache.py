@@ -0,0 +1,105 @@
+"""Process-local cache of tag and category ids by name.
+
+Tag and category names are unique, few and reused by most product
+writes, so each process keeps a bounded LRU map from name to id. A
+version number in the default cache invalidates the maps when a tag or
+category is renamed or deleted. That reaches every worker only when the
+default cache is shared (CACHE_URL); with the per-process memory cache
+it reaches only the process that made the change, so several workers
+need CACHE_URL set. Entries are only added once the transaction that
+read or created them commits.
+
+Creating a tag or category cannot make an entry stale, since names that
+are not in the map are always looked up in the database. Changes made
+with `QuerySet.update()` bypass the signals and need `invalidate()`.
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.models import Category, Tag
+
+
+class NameCache:
+    """Bounded map from the unique `name` of a model to its id."""
+
+    def __init__(self, model):
+        self.model = model
+        self.version_key = f'name-cache-version:{model._meta.label_lower}'
+        self._ids = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _sync(self):
+        """Drop the local entries if another process invalidated them."""
+        version = cache.get(self.version_key, 0)
+        if version != self._version:
+            with self._lock:
+                self._ids.clear()
+                self._version = version
+
+    def lookup(self, names):
+        """Return {name: id} for the cached names."""
+        self._sync()
+        found = {}
+        with self._lock:
+            for name in names:
+                if name in self._ids:
+                    self._ids.move_to_end(name)
+                    found[name] = self._ids[name]
+        return found
+
+    def remember(self, ids):
+        """Cache {name: id} once the current transaction commits."""
+        version = self._version
+
+        def store():
+            with self._lock:
+                if version != self._version:
+                    return
+                self._ids.update(ids)
+                for name in ids:
+                    self._ids.move_to_end(name)
+                while len(self._ids) > settings.PRODUCT_LABEL_CACHE_SIZE:
+                    self._ids.popitem(last=False)
+
+        transaction.on_commit(store)
+
+    def invalidate(self):
+        """Drop the cached names in every process."""
+        if not cache.add(self.version_key, 1, timeout=None):
+            try:
+                cache.incr(self.version_key)
+            except ValueError:
+                cache.set(self.version_key, 1, timeout=None)
+        with self._lock:
+            self._ids.clear()
+            self._version = None
+
+    def get_or_create_ids(self, names, defaults):
+        """Return the ids for `names`, creating missing rows with
+        `defaults`. Cached names need no query."""
+        names = list(dict.fromkeys(names))
+        ids = self.lookup(names)
+        missing = [name for name in names if name not in ids]
+        if missing:
+            found = dict(
+                self.model.objects.filter(name__in=missing)
+                .values_list('name', 'id')
+            )
+            for name in missing:
+                if name not in found:
+                    obj, _ = self.model.objects.get_or_create(
+                        name=name, defaults=defaults)
+                    found[name] = obj.id
+            self.remember(found)
+            ids.update(found)
+        return [ids[name] for name in names]
+
+
+tag_ids = NameCache(Tag)
+category_ids = NameCache(Category)
@@ -0,0 +1,15 @@
+"""Stripe events, handled by background jobs queued by the webhook."""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def handle_stripe_event(event):
+    """Act on a verified Stripe event, given as its JSON payload."""
+    payment_intent = event['data']['object']
+    if event['type'] == 'payment_intent.succeeded':
+        logger.info('Payment succeeded: %s', payment_intent['id'])
+        # TODO: mark order as paid in your database
+    elif event['type'] == 'payment_intent.payment_failed':
+        logger.info('Payment failed: %s', payment_intent['id'])
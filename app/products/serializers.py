@@ -1,11 +1,28 @@
 """Serializer for product API."""
 
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from rest_framework import serializers
 
-from core.models import Cart, CartItem, Category, Product, Tag, Wishlist
+from core.instrumentation import TimedSerializerMixin
+from core.models import (
+    Cart,
+    CartItem,
+    Category,
+    InventoryMovement,
+    Product,
+    Tag,
+    Wishlist,
+)
+from products import images, inventory, name_cache
+from products.fields import UserScopedPrimaryKeyRelatedField
 
 
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    cart = UserScopedPrimaryKeyRelatedField(queryset=Cart.objects.all())
+    product = UserScopedPrimaryKeyRelatedField(
+        queryset=Product.objects.all())
     product_name = serializers.CharField(
         source='product.name',
         read_only=True)
@@ -15,7 +32,7 @@ class CartItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'cart', 'product', 'product_name', 'quantity']
 
 
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     items = CartItemSerializer(
         source='cartitem_set',
         many=True, read_only=True)
@@ -25,16 +42,35 @@ class CartSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'items']
 
 
-class WishlistSerializer(serializers.ModelSerializer):
-    products = serializers.PrimaryKeyRelatedField(
+class WishlistSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    products = UserScopedPrimaryKeyRelatedField(
         queryset=Product.objects.all(), many=True)
 
     class Meta:
         model = Wishlist
         fields = ['id', 'user', 'products']
+        read_only_fields = ['id', 'user']
+
+
+class WishlistProductIdsSerializer(TimedSerializerMixin,
+                                   serializers.Serializer):
+    """Serializer for a batch of product ids to add to or remove from
+    a wishlist."""
+    max_batch_size = 1000
+
+    products = UserScopedPrimaryKeyRelatedField(
+        queryset=Product.objects.only('id'),
+        many=True,
+        allow_empty=False,
+        max_length=max_batch_size,
+    )
+
+    def validate_products(self, value):
+        """Return the product ids."""
+        return [product.id for product in value]
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Tag"""
     class Meta:
         model = Tag
@@ -42,19 +78,109 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'user']
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Category"""
+    parent = UserScopedPrimaryKeyRelatedField(
+        queryset=Category.objects.all(), required=False, allow_null=True)
+
     class Meta:
         model = Category
-        fields = ['id', 'name']
+        fields = ['id', 'name', 'parent']
         read_only_fields = ['id']
 
+    def validate_parent(self, parent):
+        """Keep the tree acyclic and within CATEGORY_MAX_DEPTH levels."""
+        try:
+            (self.instance or Category()).validate_parent(parent)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.message_dict['parent'])
+        return parent
+
+
+class ProductTagSerializer(TagSerializer):
+    """Tag nested in a product; an existing name links that tag."""
+    class Meta(TagSerializer.Meta):
+        extra_kwargs = {'name': {'validators': []}}
+
+
+class ProductCategorySerializer(CategorySerializer):
+    """Category nested in a product; an existing name links that
+    category."""
+    parent = None
+
+    class Meta(CategorySerializer.Meta):
+        fields = ['id', 'name']
+        extra_kwargs = {'name': {'validators': []}}
+
+
+class CachedLabelListSerializer(serializers.ListSerializer):
+    """Nested tags or categories of a product, read from the product's
+    denormalized array when PRODUCT_DENORMALIZED_LABELS is on."""
+
+    def __init__(self, *args, cache_field, **kwargs):
+        self.cache_field = cache_field
+        super().__init__(*args, **kwargs)
+
+    def get_attribute(self, instance):
+        if settings.PRODUCT_DENORMALIZED_LABELS:
+            return getattr(instance, self.cache_field)
+        return super().get_attribute(instance)
+
+    def to_representation(self, data):
+        if isinstance(data, list):
+            # Already in the serialized form.
+            return data
+        return super().to_representation(data)
+
 
-class ProductSerializer(serializers.ModelSerializer):
-    """Serializer for Product."""
+class LabelIdListField(serializers.Field):
+    """Ids of a product's tags or categories."""
 
-    categories = CategorySerializer(many=True, required=False)
-    tags = TagSerializer(many=True, required=False)
+    def __init__(self, *, cache_field, **kwargs):
+        self.cache_field = cache_field
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        if settings.PRODUCT_DENORMALIZED_LABELS:
+            return [
+                entry['id'] for entry in getattr(instance, self.cache_field)
+            ]
+        return [label.pk for label in getattr(instance, self.source).all()]
+
+    def to_representation(self, value):
+        return value
+
+
+class ProductSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Serializer for Product.
+
+    Pass `fields` to return only those fields. Tags and categories among
+    them are returned as ids unless they are also in `expand`.
+    """
+    LABEL_FIELDS = ('categories', 'tags')
+    # Product columns read by each field, for QuerySet.only(); labels
+    # read the denormalized arrays only when those are enabled.
+    FIELD_COLUMNS = {
+        'id': ['id'],
+        'name': ['name'],
+        'description': ['description'],
+        'price': ['price'],
+        'stock': ['stock'],
+        'categories': ['cached_categories'],
+        'tags': ['cached_tags'],
+        'user': ['user'],
+        'image': ['image'],
+        'image_renditions': ['image', 'image_renditions'],
+    }
+
+    categories = CachedLabelListSerializer(
+        child=ProductCategorySerializer(), cache_field='cached_categories',
+        required=False)
+    tags = CachedLabelListSerializer(
+        child=ProductTagSerializer(), cache_field='cached_tags',
+        required=False)
+    image_renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -66,9 +192,37 @@ class ProductSerializer(serializers.ModelSerializer):
             'stock',
             'categories',
             'tags',
-            'user'
+            'user',
+            'image',
+            'image_renditions',
         ]
-        read_only_fields = ['id', 'user']
+        read_only_fields = ['id', 'user', 'image']
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            return
+        wanted = {*fields, *expand}
+        for name in list(self.fields):
+            if name not in wanted:
+                self.fields.pop(name)
+            elif name in self.LABEL_FIELDS and name not in expand:
+                self.fields[name] = LabelIdListField(
+                    cache_field=self.fields[name].cache_field)
+
+    def get_image_renditions(self, obj) -> dict:
+        """Return URLs of the resized product images."""
+        urls = images.rendition_urls(obj)
+        request = self.context.get('request')
+        if request is not None:
+            urls = {
+                name: {
+                    fmt: request.build_absolute_uri(url)
+                    for fmt, url in formats.items()
+                }
+                for name, formats in urls.items()
+            }
+        return urls
 
     def _get_or_create_category(self, category_name, user):
         """Get or create category."""
@@ -101,8 +255,11 @@ class ProductSerializer(serializers.ModelSerializer):
         )
         self._create_or_update_categories(product, categories_data)
         self._create_or_update_tags(product, tags_data)
+        inventory.record_movement(
+            product, 0, user=user, reason='product created')
         return product
 
+    @transaction.atomic(savepoint=False)
     def update(self, instance, validated_data):
         categories_data = validated_data.pop('categories', None)
         tags_data = validated_data.pop('tags', None)
@@ -113,26 +270,235 @@ class ProductSerializer(serializers.ModelSerializer):
             instance.tags.clear()
             self._create_or_update_tags(instance, tags_data)
 
+        if 'stock' in validated_data:
+            # Lock the row until the write commits, so the recorded
+            # delta is from the stock this update replaces.
+            old_stock = Product.objects.select_for_update().values_list(
+                'stock', flat=True).get(pk=instance.pk)
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
-        instance.save()
+        # Only write the submitted columns, so a concurrent stock
+        # adjustment is not overwritten by the value read above.
+        if validated_data:
+            instance.save(update_fields=list(validated_data))
+        if 'stock' in validated_data:
+            inventory.record_movement(
+                instance, old_stock, user=self.context['request'].user,
+                reason='product update',
+            )
         return instance
 
     def _create_or_update_categories(self, product, categories_data):
         """Handle creating or updating categories"""
-        for category_data in categories_data:
-            category, created = Category.objects.get_or_create(
-                name=category_data['name'],
-                defaults={'user': self.context['request'].user}
-            )
-            product.categories.add(category)
+        if categories_data:
+            product.categories.add(*name_cache.category_ids.get_or_create_ids(
+                [category['name'] for category in categories_data],
+                defaults={'user': self.context['request'].user},
+            ))
 
     def _create_or_update_tags(self, product, tags_data):
         """Handle creating or updating tags"""
-        for tag_data in tags_data:
-            tag, created = Tag.objects.get_or_create(
-                name=tag_data['name'],
-                defaults={'user': self.context['request'].user}
+        if tags_data:
+            product.tags.add(*name_cache.tag_ids.get_or_create_ids(
+                [tag['name'] for tag in tags_data],
+                defaults={'user': self.context['request'].user},
+            ))
+
+
+class StockAdjustmentSerializer(serializers.Serializer):
+    """A change to the stock of one product."""
+    product = serializers.IntegerField()
+    delta = serializers.IntegerField(
+        min_value=-inventory.MAX_STOCK, max_value=inventory.MAX_STOCK)
+
+
+class StockAdjustmentBatchSerializer(TimedSerializerMixin,
+                                     serializers.Serializer):
+    """Serializer for a batch of stock adjustments."""
+    max_batch_size = 5000
+
+    adjustments = StockAdjustmentSerializer(many=True, allow_empty=False)
+    reason = serializers.CharField(
+        max_length=255, required=False, default='')
+
+    def validate_adjustments(self, value):
+        """Limit the batch size, check the user owns the products and
+        that no product would end up above MAX_STOCK.
+
+        Stock that would go below zero is checked again under a lock by
+        inventory.adjust_stock, and reported there.
+        """
+        if len(value) > self.max_batch_size:
+            raise serializers.ValidationError(
+                f'Ensure this field has no more than '
+                f'{self.max_batch_size} elements.'
             )
-            product.tags.add(tag)
+        deltas = {}
+        for item in value:
+            deltas[item['product']] = (
+                deltas.get(item['product'], 0) + item['delta'])
+        stock = dict(
+            Product.objects.filter(
+                user=self.context['request'].user, id__in=deltas,
+            ).values_list('id', 'stock')
+        )
+        missing = sorted(set(deltas) - set(stock))
+        if missing:
+            raise serializers.ValidationError(
+                f'Invalid products: {", ".join(map(str, missing))}.')
+        over = sorted(
+            pk for pk, delta in deltas.items()
+            if stock[pk] + delta > inventory.MAX_STOCK
+            or delta < -inventory.MAX_STOCK
+        )
+        if over:
+            raise serializers.ValidationError(
+                f'Stock of products {", ".join(map(str, over))} would be '
+                f'out of range.')
+        return [(item['product'], item['delta']) for item in value]
+
+
+class InventoryMovementSerializer(TimedSerializerMixin,
+                                  serializers.ModelSerializer):
+    """Serializer for an inventory ledger entry."""
+
+    class Meta:
+        model = InventoryMovement
+        fields = [
+            'id', 'product', 'user', 'delta', 'stock_after', 'reason',
+            'created_at',
+        ]
+        read_only_fields = fields
+
+
+class CatalogChangesQuerySerializer(serializers.Serializer):
+    """Query parameters of the catalog change feed."""
+    since = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_limit(self, value):
+        return min(value, settings.CHANGE_FEED_PAGE_SIZE)
+
+
+class IdListField(serializers.CharField):
+    """Comma separated ids, such as `1,2,3`."""
+    default_error_messages = {
+        'invalid_ids': 'Enter a comma separated list of ids.',
+    }
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        try:
+            return [int(pk) for pk in value.split(',')]
+        except ValueError:
+            self.fail('invalid_ids')
+
+
+class NameListField(serializers.CharField):
+    """Comma separated names, each one of `choices`."""
+    default_error_messages = {
+        'invalid_choice': '"{input}" is not a valid choice.',
+    }
+
+    def __init__(self, *, choices, **kwargs):
+        self.choices = list(choices)
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        names = [
+            name.strip()
+            for name in super().to_internal_value(data).split(',')
+        ]
+        for name in names:
+            if name not in self.choices:
+                self.fail('invalid_choice', input=name)
+        return names
+
+
+class ProductFieldsSerializer(serializers.Serializer):
+    """`fields` and `expand` query parameters of product reads."""
+    fields = NameListField(
+        choices=ProductSerializer.Meta.fields, default=None)
+    expand = NameListField(
+        choices=ProductSerializer.LABEL_FIELDS, default=tuple)
+
+
+class ProductFilterSerializer(serializers.Serializer):
+    """Query parameters of the product list."""
+    ORDERINGS = {
+        'id': ['id'],
+        '-id': ['-id'],
+        # id breaks ties in the same direction as price, so both read
+        # the (user, price, id) index in one direction.
+        'price': ['price', 'id'],
+        '-price': ['-price', '-id'],
+    }
+
+    tags = IdListField(required=False)
+    categories = IdListField(required=False)
+    category_tree = IdListField(required=False)
+    min_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False)
+    max_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False)
+    in_stock = serializers.BooleanField(allow_null=True, default=None)
+    ordering = serializers.ChoiceField(
+        choices=list(ORDERINGS), default='-id')
+
+    def validate(self, attrs):
+        low, high = attrs.get('min_price'), attrs.get('max_price')
+        if low is not None and high is not None and low > high:
+            raise serializers.ValidationError(
+                {'max_price': 'Must not be less than min_price.'})
+        return attrs
+
+
+class CategoryTreeQuerySerializer(serializers.Serializer):
+    """Query parameters selecting a category subtree."""
+    subtree = serializers.IntegerField(required=False)
+    root = serializers.IntegerField(required=False)
+
+
+class BulkProductItemSerializer(serializers.ModelSerializer):
+    """Changes to one product in a bulk update."""
+    id = serializers.IntegerField()
+
+    class Meta:
+        model = Product
+        fields = ['id', 'name', 'description', 'price', 'stock']
+        extra_kwargs = {
+            'name': {'required': False},
+            'description': {'required': False},
+            'price': {'required': False},
+            'stock': {'required': False},
+        }
+
+
+class ProductBulkUpdateSerializer(TimedSerializerMixin,
+                                  serializers.Serializer):
+    """Serializer for a list of product changes.
+
+    Items are only checked to be objects here; each one is validated
+    with BulkProductItemSerializer when it is applied, so one bad item
+    does not reject the others.
+    """
+    max_batch_size = 50_000
+
+    items = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=max_batch_size,
+    )
+
+
+class ProductBulkDeleteSerializer(TimedSerializerMixin,
+                                  serializers.Serializer):
+    """Serializer for a list of product ids to delete."""
+    max_batch_size = 50_000
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=max_batch_size,
+    )
@@ -0,0 +1,137 @@
+"""Signal handlers for product API."""
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.db import transaction
+from django.dispatch import receiver
+
+from core.models import Category, Product, Tag
+from products import category_tree, changes, images, labels, name_cache
+
+NAME_CACHES = {
+    Tag: name_cache.tag_ids,
+    Category: name_cache.category_ids,
+}
+LABEL_FIELDS = {
+    Product.tags.through: 'tags',
+    Product.categories.through: 'categories',
+    Tag: 'tags',
+    Category: 'categories',
+}
+
+
+@receiver(post_save, sender=Product)
+def queue_image_renditions(sender, instance, raw=False, **kwargs):
+    """Generate renditions when a product gets a new image."""
+    if not raw and images.needs_renditions(instance):
+        images.schedule_renditions(instance)
+
+
+def _labelled_product_ids(label):
+    field = LABEL_FIELDS[type(label)]
+    return list(
+        Product.objects.filter(**{field: label}).values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=Product.tags.through)
+@receiver(m2m_changed, sender=Product.categories.through)
+def refresh_product_labels(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    """Keep the denormalized tag and category arrays in step with the
+    M2M tables."""
+    if action == 'pre_clear' and reverse:
+        instance._labelled_product_ids = _labelled_product_ids(instance)
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if action != 'post_clear' and not pk_set:
+        return
+    if not reverse:
+        labels.refresh_labels([instance.pk], instance=instance)
+    elif action == 'post_clear':
+        labels.refresh_labels(instance.__dict__.pop(
+            '_labelled_product_ids', []))
+    else:
+        labels.refresh_labels(pk_set)
+
+
+@receiver(pre_save, sender=Tag)
+@receiver(pre_save, sender=Category)
+def remember_renamed_label(sender, instance, raw=False, update_fields=None,
+                           **kwargs):
+    """Note whether a saved tag or category is being renamed, so other
+    saves, such as moving a category, leave its products alone."""
+    if raw or instance._state.adding or (
+            update_fields is not None and 'name' not in update_fields):
+        instance._renamed = False
+        return
+    old_name = sender.objects.filter(pk=instance.pk).values_list(
+        'name', flat=True).first()
+    instance._renamed = old_name != instance.name
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Category)
+def refresh_renamed_label(sender, instance, created, raw=False, **kwargs):
+    """Rewrite the arrays of products using a renamed tag or category."""
+    if not created and not raw and getattr(instance, '_renamed', True):
+        labels.refresh_labels(_labelled_product_ids(instance))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Category)
+def remember_labelled_products(sender, instance, **kwargs):
+    instance._labelled_product_ids = _labelled_product_ids(instance)
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Category)
+def refresh_deleted_label(sender, instance, **kwargs):
+    """Drop a deleted tag or category from its products' arrays."""
+    labels.refresh_labels(instance.__dict__.pop('_labelled_product_ids', []))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Category)
+def invalidate_name_cache(sender, instance, created=False, **kwargs):
+    """Forget cached name to id mappings when a label changes or goes.
+
+    The cache is cleared now and again after the transaction commits,
+    so no process can re-cache the old name in between.
+    """
+    if created or not getattr(instance, '_renamed', True):
+        return
+    cache = NAME_CACHES[sender]
+    cache.invalidate()
+    transaction.on_commit(cache.invalidate)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree(sender, instance, **kwargs):
+    """Retire cached category trees now and once the change commits."""
+    category_tree.invalidate()
+    transaction.on_commit(category_tree.invalidate)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Category)
+def log_saved_change(sender, instance, raw=False, **kwargs):
+    """Add a saved product, tag or category to the change feed."""
+    if not raw:
+        changes.record_instance(instance)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Category)
+def log_deleted_change(sender, instance, **kwargs):
+    """Add a tombstone for a deleted product, tag or category."""
+    changes.record_instance(instance, deleted=True)
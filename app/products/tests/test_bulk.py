@@ -0,0 +1,162 @@
+"""Tests for bulk product updates and deletes."""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Cart,
+    CartItem,
+    CatalogChange,
+    InventoryMovement,
+    Product,
+    Wishlist,
+)
+
+
+BULK_URL = reverse('products:product-bulk')
+
+
+def create_product(user, **params):
+    defaults = {
+        'name': 'Sample Product',
+        'description': 'Sample description',
+        'price': Decimal('9.99'),
+        'stock': 3,
+    }
+    defaults.update(params)
+    return Product.objects.create(user=user, **defaults)
+
+
+class BulkProductAPITests(TestCase):
+    """Test the bulk update and delete endpoint."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        cls.other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_update(self):
+        """Test updating several products with per-item results."""
+        first = create_product(self.user)
+        second = create_product(self.user, stock=1)
+        foreign = create_product(self.other)
+        payload = {'items': [
+            {'id': first.id, 'price': '5.00'},
+            {'id': second.id, 'name': 'Renamed', 'stock': 4},
+            {'id': foreign.id, 'price': '1.00'},
+            {'id': first.id + second.id + foreign.id, 'price': '1.00'},
+            {'id': first.id, 'price': 'cheap'},
+        ]}
+
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['status'] for item in res.data['results']],
+            ['updated', 'updated', 'not_found', 'not_found', 'invalid'],
+        )
+        self.assertIn('price', res.data['results'][4]['errors'])
+        first.refresh_from_db()
+        second.refresh_from_db()
+        foreign.refresh_from_db()
+        self.assertEqual(first.price, Decimal('5.00'))
+        self.assertEqual((second.name, second.stock), ('Renamed', 4))
+        self.assertEqual(foreign.price, Decimal('9.99'))
+        movement = InventoryMovement.objects.get(product=second)
+        self.assertEqual((movement.delta, movement.stock_after), (3, 4))
+        self.assertTrue(CatalogChange.objects.filter(
+            kind=CatalogChange.PRODUCT, object_id=first.id).exists())
+
+    def test_shared_values_use_one_update(self):
+        """Test products given the same value share one UPDATE."""
+        products = Product.objects.bulk_create([
+            Product(user=self.user, name=f'Product {i}', description='',
+                    price=Decimal('1.00'), stock=1)
+            for i in range(50)
+        ])
+        payload = {'items': [
+            {'id': product.id, 'price': '2.50'} for product in products
+        ]}
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        updates = [
+            query for query in ctx.captured_queries
+            if query['sql'].startswith('UPDATE "core_product"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            set(Product.objects.values_list('price', flat=True)),
+            {Decimal('2.50')},
+        )
+
+    def test_distinct_values_use_bulk_update(self):
+        """Test distinct values are written without a query each."""
+        products = Product.objects.bulk_create([
+            Product(user=self.user, name=f'Product {i}', description='',
+                    price=Decimal('1.00'), stock=1)
+            for i in range(50)
+        ])
+        payload = {'items': [
+            {'id': product.id, 'price': f'{i}.00'}
+            for i, product in enumerate(products)
+        ]}
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertLess(len(ctx), 10)
+        for i, product in enumerate(products):
+            product.refresh_from_db()
+            self.assertEqual(product.price, Decimal(i))
+
+    def test_bulk_delete_cascades(self):
+        """Test bulk deletes remove related rows of the products."""
+        product = create_product(self.user)
+        kept = create_product(self.user)
+        foreign = create_product(self.other)
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=product)
+        wishlist = Wishlist.objects.create(user=self.user)
+        wishlist.products.add(product, kept)
+        payload = {'ids': [product.id, foreign.id]}
+
+        res = self.client.delete(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [
+            {'id': product.id, 'status': 'deleted'},
+            {'id': foreign.id, 'status': 'not_found'},
+        ])
+        self.assertFalse(Product.objects.filter(id=product.id).exists())
+        self.assertTrue(Product.objects.filter(id=foreign.id).exists())
+        self.assertFalse(CartItem.objects.exists())
+        self.assertEqual(list(wishlist.products.all()), [kept])
+        self.assertTrue(CatalogChange.objects.filter(
+            object_id=product.id, deleted=True).exists())
+
+    def test_bulk_requires_list(self):
+        """Test a malformed payload is rejected as a whole."""
+        res = self.client.patch(BULK_URL, {'items': 'all'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
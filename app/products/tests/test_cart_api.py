@@ -0,0 +1,81 @@
+"""Tests for Cart API."""
+
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Cart, CartItem, Product
+
+
+CARTITEM_URL = reverse('products:cartitem-list')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a user."""
+    return get_user_model().objects.create_user(email, password)
+
+
+def create_product(user, **params):
+    """Create and return a sample product."""
+    defaults = {
+        'name': 'Sample Product',
+        'description': 'Sample description',
+        'price': Decimal('9.99'),
+        'stock': 3,
+    }
+    defaults.update(params)
+    return Product.objects.create(user=user, **defaults)
+
+
+class PrivateCartItemAPITests(TestCase):
+    """Test authenticated cart item API requests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.cart = Cart.objects.create(user=cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_create_cart_item(self):
+        """Test adding a product to the user's cart."""
+        product = create_product(self.user)
+        payload = {'cart': self.cart.id, 'product': product.id}
+
+        with self.assertNumQueries(3):
+            res = self.client.post(CARTITEM_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        item = CartItem.objects.get(id=res.data['id'])
+        self.assertEqual(item.product, product)
+        self.assertEqual(item.quantity, 1)
+
+    def test_cannot_add_to_other_users_cart(self):
+        """Test another user's cart is rejected."""
+        other = create_user(email='other@example.com')
+        cart = Cart.objects.create(user=other)
+        product = create_product(self.user)
+        payload = {'cart': cart.id, 'product': product.id}
+
+        res = self.client.post(CARTITEM_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cart', res.data)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_cannot_add_other_users_product(self):
+        """Test another user's product is rejected."""
+        other = create_user(email='other@example.com')
+        product = create_product(other)
+        payload = {'cart': self.cart.id, 'product': product.id}
+
+        res = self.client.post(CARTITEM_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('product', res.data)
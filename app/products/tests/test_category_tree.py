@@ -0,0 +1,179 @@
+"""Tests for the category hierarchy."""
+
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Category, Product
+
+CATEGORY_URL = reverse('products:category-list')
+TREE_URL = reverse('products:category-tree')
+PRODUCT_URL = reverse('products:product-list')
+
+
+def detail_url(category_id):
+    return reverse('products:category-detail', args=[category_id])
+
+
+class CategoryTreeTests(TestCase):
+    """Test parent and child categories."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='tree@example.com', password='testpass123')
+        cls.home = Category.objects.create(user=cls.user, name='Home')
+        cls.kitchen = Category.objects.create(
+            user=cls.user, name='Kitchen', parent=cls.home)
+        cls.knives = Category.objects.create(
+            user=cls.user, name='Knives', parent=cls.kitchen)
+        cls.garden = Category.objects.create(user=cls.user, name='Garden')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_paths(self):
+        """Test paths hold the ids from the root down."""
+        self.assertEqual(self.knives.path, ''.join(
+            Category.path_segment(category.id)
+            for category in (self.home, self.kitchen, self.knives)
+        ))
+        self.assertEqual(self.knives.depth, 2)
+        self.assertEqual(self.garden.depth, 0)
+
+    def test_create_child(self):
+        """Test creating a category under a parent."""
+        res = self.client.post(
+            CATEGORY_URL, {'name': 'Pots', 'parent': self.kitchen.id})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        pots = Category.objects.get(pk=res.data['id'])
+        self.assertEqual(pots.parent, self.kitchen)
+        self.assertEqual(pots.depth, 2)
+
+    def test_move_subtree(self):
+        """Test moving a category moves its descendants."""
+        res = self.client.patch(
+            detail_url(self.kitchen.id), {'parent': self.garden.id})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.knives.refresh_from_db()
+        self.assertTrue(self.knives.path.startswith(self.garden.path))
+        self.assertEqual(self.knives.depth, 2)
+
+    def test_move_under_itself_rejected(self):
+        """Test a category cannot be moved under its descendants."""
+        res = self.client.patch(
+            detail_url(self.home.id), {'parent': self.knives.id})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(CATEGORY_MAX_DEPTH=3)
+    def test_max_depth(self):
+        """Test the tree cannot grow deeper than CATEGORY_MAX_DEPTH."""
+        res = self.client.post(
+            CATEGORY_URL, {'name': 'Chef', 'parent': self.knives.id})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.patch(
+            detail_url(self.garden.id), {'parent': self.kitchen.id})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_subtree_listing(self):
+        """Test listing a category and the ones under it."""
+        res = self.client.get(CATEGORY_URL, {'subtree': self.kitchen.id})
+
+        self.assertEqual(
+            [category['id'] for category in res.data],
+            [self.kitchen.id, self.knives.id],
+        )
+
+    def test_tree_cached(self):
+        """Test the nested tree is cached until a category changes."""
+        res = self.client.get(TREE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(res.content), [
+            {'id': self.home.id, 'name': 'Home', 'children': [
+                {'id': self.kitchen.id, 'name': 'Kitchen', 'children': [
+                    {'id': self.knives.id, 'name': 'Knives',
+                     'children': []},
+                ]},
+            ]},
+            {'id': self.garden.id, 'name': 'Garden', 'children': []},
+        ])
+        with self.assertNumQueries(0):
+            cached = self.client.get(TREE_URL)
+        self.assertEqual(cached.content, res.content)
+        res = self.client.get(TREE_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.knives.name = 'Blades'
+        self.knives.save()
+        res = self.client.get(TREE_URL, {'root': self.kitchen.id})
+        self.assertEqual(
+            json.loads(res.content)[0]['children'][0]['name'], 'Blades')
+
+    def test_delete_moves_children_up(self):
+        """Test deleting a category keeps the ones under it, and their
+        products, under its parent."""
+        knife = Product.objects.create(
+            user=self.user, name='Knife', description='Sharp',
+            price=Decimal('9.00'), stock=1)
+        knife.categories.add(self.knives)
+
+        res = self.client.delete(detail_url(self.kitchen.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.knives.refresh_from_db()
+        self.assertEqual(self.knives.parent, self.home)
+        self.assertEqual(
+            self.knives.path, self.home.path
+            + Category.path_segment(self.knives.id))
+        self.assertEqual(list(knife.categories.all()), [self.knives])
+
+    def test_delete_root_makes_children_roots(self):
+        """Test the children of a deleted root become roots."""
+        self.home.delete()
+
+        self.kitchen.refresh_from_db()
+        self.knives.refresh_from_db()
+        self.assertIsNone(self.kitchen.parent)
+        self.assertEqual(self.kitchen.depth, 0)
+        self.assertEqual(self.knives.depth, 1)
+
+    def test_save_rejects_cycle(self):
+        """Test the model refuses a move under its own subtree."""
+        self.home.parent = self.knives
+
+        with self.assertRaises(ValidationError):
+            self.home.save()
+        self.knives.refresh_from_db()
+        self.assertEqual(self.knives.depth, 2)
+
+    def test_products_in_subtree(self):
+        """Test filtering products by a category and its descendants
+        takes one query for the products."""
+        knife = Product.objects.create(
+            user=self.user, name='Knife', description='Sharp',
+            price=Decimal('9.00'), stock=1)
+        knife.categories.add(self.knives)
+        rake = Product.objects.create(
+            user=self.user, name='Rake', description='Long',
+            price=Decimal('9.00'), stock=1)
+        rake.categories.add(self.garden)
+
+        with self.assertNumQueries(2):
+            res = self.client.get(
+                PRODUCT_URL, {'category_tree': self.home.id})
+
+        self.assertEqual([product['id'] for product in res.data], [knife.id])
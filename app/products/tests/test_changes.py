@@ -0,0 +1,231 @@
+"""Tests for the catalog change feed."""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import CatalogChange, Category, Product, Tag
+from products import inventory
+
+
+CHANGES_URL = reverse('products:catalog-changes')
+PRODUCTS_URL = reverse('products:product-list')
+
+
+def detail_url(product_id):
+    return reverse('products:product-detail', args=[product_id])
+
+
+def create_product(user, **params):
+    defaults = {
+        'name': 'Sample Product',
+        'description': 'Sample description',
+        'price': Decimal('9.99'),
+        'stock': 3,
+    }
+    defaults.update(params)
+    return Product.objects.create(user=user, **defaults)
+
+
+class CatalogChangesAPITests(TestCase):
+    """Test the change feed endpoint."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_changes(self, since=0, **params):
+        res = self.client.get(CHANGES_URL, {'since': since, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_auth_required(self):
+        """Test the feed requires authentication."""
+        res = APIClient().get(CHANGES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_created_objects(self):
+        """Test new products, tags and categories are in the feed."""
+        payload = {
+            'name': 'Lamp',
+            'description': 'A lamp',
+            'price': Decimal('19.99'),
+            'stock': 4,
+            'tags': [{'name': 'Home'}],
+            'categories': [{'name': 'Furniture'}],
+        }
+        self.client.post(PRODUCTS_URL, payload, format='json')
+
+        data = self.get_changes()
+
+        self.assertFalse(data['has_more'])
+        self.assertEqual([p['name'] for p in data['products']], ['Lamp'])
+        self.assertEqual(data['products'][0]['tags'][0]['name'], 'Home')
+        self.assertEqual([t['name'] for t in data['tags']], ['Home'])
+        self.assertEqual(
+            [c['name'] for c in data['categories']], ['Furniture'])
+        self.assertEqual(data['deleted'], {
+            'products': [], 'tags': [], 'categories': []})
+
+    def test_only_changes_after_cursor(self):
+        """Test a cursor returns only what changed since."""
+        first = create_product(self.user, name='First')
+        cursor = self.get_changes()['cursor']
+        create_product(self.user, name='Second')
+        self.client.patch(detail_url(first.id), {'name': 'Renamed'})
+
+        data = self.get_changes(cursor)
+
+        self.assertEqual(
+            sorted(p['name'] for p in data['products']),
+            ['Renamed', 'Second'],
+        )
+        self.assertEqual(self.get_changes(data['cursor'])['products'], [])
+
+    def test_deletes_are_tombstones(self):
+        """Test deleted objects are listed by id."""
+        product = create_product(self.user)
+        tag = Tag.objects.create(user=self.user, name='Home')
+        product.tags.add(tag)
+        cursor = self.get_changes()['cursor']
+        product_id, tag_id = product.id, tag.id
+        product.delete()
+        tag.delete()
+
+        data = self.get_changes(cursor)
+
+        self.assertEqual(data['products'], [])
+        self.assertEqual(data['deleted']['products'], [product_id])
+        self.assertEqual(data['deleted']['tags'], [tag_id])
+
+    def test_bulk_stock_adjustments_logged(self):
+        """Test stock adjustments made in bulk are in the feed."""
+        product = create_product(self.user)
+        cursor = self.get_changes()['cursor']
+
+        inventory.adjust_stock(Product.objects.all(), [(product.id, 2)])
+
+        data = self.get_changes(cursor)
+        self.assertEqual(data['products'][0]['stock'], 5)
+
+    def test_renamed_category_updates_products(self):
+        """Test renaming a category lists its products as changed."""
+        product = create_product(self.user)
+        category = Category.objects.create(user=self.user, name='Old')
+        product.categories.add(category)
+        cursor = self.get_changes()['cursor']
+
+        category.name = 'New'
+        category.save()
+
+        data = self.get_changes(cursor)
+        self.assertEqual(data['categories'][0]['name'], 'New')
+        self.assertEqual(
+            data['products'][0]['categories'][0]['name'], 'New')
+
+    def test_deleted_category_moves_children_in_feed(self):
+        """Test children moved up by a category delete are in the feed
+        with their new parent."""
+        home = Category.objects.create(user=self.user, name='Home')
+        kitchen = Category.objects.create(
+            user=self.user, name='Kitchen', parent=home)
+        knives = Category.objects.create(
+            user=self.user, name='Knives', parent=kitchen)
+        cursor = self.get_changes()['cursor']
+
+        kitchen.delete()
+
+        data = self.get_changes(cursor)
+        self.assertEqual(
+            [(c['id'], c['parent']) for c in data['categories']],
+            [(knives.id, home.id)],
+        )
+        self.assertEqual(data['deleted']['categories'], [kitchen.id])
+
+    def test_limited_to_user(self):
+        """Test changes of other users are not returned."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        create_product(other)
+
+        data = self.get_changes()
+
+        self.assertEqual(data['products'], [])
+        self.assertEqual(data['cursor'], 0)
+
+    def test_pages(self):
+        """Test paging through the feed with the cursor."""
+        for i in range(5):
+            create_product(self.user, name=f'Product {i}')
+
+        first = self.get_changes(limit=3)
+        second = self.get_changes(first['cursor'], limit=3)
+
+        self.assertTrue(first['has_more'])
+        self.assertFalse(second['has_more'])
+        self.assertEqual(
+            [p['name'] for p in first['products'] + second['products']],
+            [f'Product {i}' for i in range(5)],
+        )
+
+    def test_query_count_is_constant(self):
+        """Test a large page takes a fixed number of queries."""
+        products = Product.objects.bulk_create([
+            Product(user=self.user, name=f'Product {i}', description='',
+                    price=Decimal('1.00'), stock=10)
+            for i in range(300)
+        ])
+        inventory.adjust_stock(
+            Product.objects.all(), [(p.id, 1) for p in products])
+        Product.objects.filter(id__in=[p.id for p in products[:100]]) \
+            .delete()
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.get_changes()
+
+        # The log, then products; tags and categories have no changes.
+        self.assertEqual(len(ctx), 2)
+        self.assertEqual(len(data['products']), 200)
+        self.assertEqual(len(data['deleted']['products']), 100)
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected."""
+        res = self.client.get(CHANGES_URL, {'since': 'abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CatalogChangeLogTests(TestCase):
+    """Test the change log rows."""
+
+    def test_rolled_back_changes_are_not_logged(self):
+        """Test a change and its log entry roll back together."""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        before = CatalogChange.objects.count()
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                create_product(user)
+                raise RuntimeError
+
+        self.assertEqual(CatalogChange.objects.count(), before)
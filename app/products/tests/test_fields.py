@@ -0,0 +1,102 @@
+"""Tests for sparse fields and expansion of product responses."""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Category, Product, Tag
+
+PRODUCT_URL = reverse('products:product-list')
+
+
+def detail_url(product_id):
+    return reverse('products:product-detail', args=[product_id])
+
+
+class ProductFieldsTests(TestCase):
+    """Test the fields and expand parameters."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='fields@example.com', password='testpass123')
+        cls.product = Product.objects.create(
+            user=cls.user, name='Lamp', description='A long description',
+            price=Decimal('12.50'), stock=3,
+        )
+        cls.tag = Tag.objects.create(user=cls.user, name='Light')
+        cls.category = Category.objects.create(user=cls.user, name='Home')
+        cls.product.tags.add(cls.tag)
+        cls.product.categories.add(cls.category)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_full_response_by_default(self):
+        """Test products have every field when fields is not given."""
+        res = self.client.get(PRODUCT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('description', res.data[0])
+        self.assertEqual(res.data[0]['tags'][0]['name'], 'Light')
+
+    def test_sparse_fields(self):
+        """Test only the requested fields are returned or loaded."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(PRODUCT_URL, {'fields': 'id,name,price'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data, [{'id': self.product.id, 'name': 'Lamp',
+                        'price': '12.50'}])
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('description', sql)
+        self.assertNotIn('core_tag', sql)
+
+    def test_labels_as_ids_unless_expanded(self):
+        """Test tags are ids, and objects when expanded."""
+        for denormalized in (False, True):
+            with override_settings(PRODUCT_DENORMALIZED_LABELS=denormalized):
+                res = self.client.get(
+                    PRODUCT_URL, {'fields': 'id,tags,categories'})
+                self.assertEqual(res.data[0]['tags'], [self.tag.id])
+                self.assertEqual(
+                    res.data[0]['categories'], [self.category.id])
+
+                res = self.client.get(
+                    PRODUCT_URL, {'fields': 'id', 'expand': 'tags'})
+                self.assertEqual(res.data[0]['tags'], [
+                    {'id': self.tag.id, 'name': 'Light',
+                     'user': self.user.id},
+                ])
+                self.assertNotIn('categories', res.data[0])
+
+    def test_retrieve_with_fields(self):
+        """Test a single product honours fields."""
+        res = self.client.get(
+            detail_url(self.product.id), {'fields': 'name,stock'})
+
+        self.assertEqual(res.data, {'name': 'Lamp', 'stock': 3})
+
+    def test_update_ignores_fields(self):
+        """Test writes return the full product."""
+        res = self.client.patch(
+            detail_url(self.product.id) + '?fields=name', {'stock': 4})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['stock'], 4)
+        self.assertIn('description', res.data)
+
+    def test_invalid_field_names(self):
+        """Test unknown fields and expansions return 400."""
+        for params in ({'fields': 'id,secret'}, {'expand': 'user'}):
+            res = self.client.get(PRODUCT_URL, params)
+            self.assertEqual(
+                res.status_code, status.HTTP_400_BAD_REQUEST, params)
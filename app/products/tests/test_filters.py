@@ -0,0 +1,102 @@
+"""Tests for the price and stock filters of the product list."""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Product, Tag
+
+PRODUCT_URL = reverse('products:product-list')
+
+
+def create_product(user, name, price, stock=5):
+    """Create and return a product with the given price and stock."""
+    return Product.objects.create(
+        user=user, name=name, description='Description',
+        price=Decimal(price), stock=stock,
+    )
+
+
+class ProductFilterTests(TestCase):
+    """Test filtering and ordering the product list."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='filters@example.com', password='testpass123')
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123')
+        cls.cheap = create_product(cls.user, 'Cheap', '5.00')
+        cls.mid = create_product(cls.user, 'Mid', '20.00', stock=0)
+        cls.tie = create_product(cls.user, 'Tie', '20.00')
+        cls.dear = create_product(cls.user, 'Dear', '80.00')
+        create_product(other, 'Other', '20.00')
+        cls.tag = Tag.objects.create(user=cls.user, name='Sale')
+        cls.mid.tags.add(cls.tag)
+        cls.dear.tags.add(cls.tag)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def ids(self, **params):
+        res = self.client.get(PRODUCT_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [product['id'] for product in res.data]
+
+    def test_price_range(self):
+        """Test min_price and max_price are inclusive bounds."""
+        ids = self.ids(min_price='20', max_price='80')
+
+        self.assertCountEqual(ids, [self.mid.id, self.tie.id, self.dear.id])
+        self.assertEqual(self.ids(max_price='19.99'), [self.cheap.id])
+
+    def test_in_stock(self):
+        """Test in_stock keeps products with or without stock."""
+        self.assertNotIn(self.mid.id, self.ids(in_stock='true'))
+        self.assertEqual(self.ids(in_stock='false'), [self.mid.id])
+        self.assertEqual(len(self.ids()), 4)
+
+    def test_ordering_by_price(self):
+        """Test ordering by price breaks ties by id."""
+        self.assertEqual(
+            self.ids(ordering='price'),
+            [self.cheap.id, self.mid.id, self.tie.id, self.dear.id],
+        )
+        self.assertEqual(
+            self.ids(ordering='-price'),
+            [self.dear.id, self.tie.id, self.mid.id, self.cheap.id],
+        )
+
+    def test_combined_with_tags(self):
+        """Test price and stock filters combine with the tag filter."""
+        ids = self.ids(tags=str(self.tag.id), min_price='10', in_stock='1')
+
+        self.assertEqual(ids, [self.dear.id])
+
+    def test_invalid_parameters(self):
+        """Test invalid filters return 400 instead of an error."""
+        for params in (
+                {'min_price': 'cheap'},
+                {'min_price': '50', 'max_price': '10'},
+                {'in_stock': 'maybe'},
+                {'ordering': 'name'},
+                {'tags': '1,x'}):
+            res = self.client.get(PRODUCT_URL, params)
+            self.assertEqual(
+                res.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_filters_ignored_outside_list(self):
+        """Test filter parameters do not affect other actions."""
+        url = reverse('products:product-detail', args=[self.cheap.id])
+        for params in ({'tags': ''}, {'ordering': 'x'}, {'in_stock': 'foo'}):
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK, params)
+
+        res = self.client.patch(
+            f'{url}?in_stock=false', {'name': 'Cheaper'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
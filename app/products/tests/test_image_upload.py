@@ -0,0 +1,146 @@
+"""Tests for the resumable product image upload."""
+
+import io
+import shutil
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Product
+
+
+def upload_url(product_id):
+    """Create and return an image upload URL."""
+    return reverse('products:product-upload-image', args=[product_id])
+
+
+def png_bytes(size=(64, 64)):
+    """Return the bytes of a PNG image."""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color=(10, 120, 200)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class ImageUploadTests(TestCase):
+    """Tests for the image upload API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(
+            user=self.user,
+            name='Sample Product',
+            description='Sample description',
+            price=Decimal('9.99'),
+            stock=3,
+        )
+        self.url = upload_url(self.product.id)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def put_chunk(self, data, start, total, content_type='image/png'):
+        end = start + len(data) - 1
+        return self.client.put(
+            self.url,
+            data,
+            content_type=content_type,
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{total}',
+        )
+
+    def test_upload_image_single_request(self):
+        """Test uploading a whole image in one request."""
+        res = self.client.put(
+            self.url, png_bytes(), content_type='image/png')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.product.refresh_from_db()
+        self.assertRegex(self.product.image.name, r'^products/[0-9a-f]+\.png$')
+        self.assertIn('image', res.data)
+        with self.product.image.open('rb') as fh:
+            self.assertEqual(fh.read(), png_bytes())
+
+    def test_upload_image_in_chunks_and_resume(self):
+        """Test an interrupted upload resumes from the stored offset."""
+        data = png_bytes()
+        total = len(data)
+        half = total // 2
+
+        res = self.put_chunk(data[:half], 0, total)
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['offset'], half)
+
+        res = self.client.get(self.url)
+        self.assertEqual(res.data, {'offset': half, 'size': total})
+
+        res = self.put_chunk(data[half:], half, total)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.product.refresh_from_db()
+        with self.product.image.open('rb') as fh:
+            self.assertEqual(fh.read(), data)
+
+    def test_chunk_at_wrong_offset_conflicts(self):
+        """Test a chunk that skips ahead is rejected with the offset."""
+        data = png_bytes()
+        self.put_chunk(data[:10], 0, len(data))
+
+        res = self.put_chunk(data[20:30], 20, len(data))
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data['offset'], 10)
+
+    def test_upload_rejects_unsupported_type(self):
+        """Test a non-image content type is rejected."""
+        res = self.client.put(
+            self.url, b'%PDF-1.4', content_type='application/pdf')
+
+        self.assertEqual(
+            res.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    @override_settings(PRODUCT_IMAGE_MAX_UPLOAD_SIZE=100)
+    def test_upload_rejects_large_file(self):
+        """Test uploads over the size limit are rejected."""
+        res = self.put_chunk(b'x' * 50, 0, 1000)
+
+        self.assertEqual(
+            res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_upload_rejects_invalid_image(self):
+        """Test bytes that are not the declared image type are rejected."""
+        res = self.client.put(
+            self.url, b'not an image', content_type='image/png')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.product.refresh_from_db()
+        self.assertFalse(self.product.image)
+
+    def test_cannot_upload_to_other_users_product(self):
+        """Test uploading to another user's product is not found."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123')
+        self.client.force_authenticate(other)
+
+        res = self.client.put(
+            self.url, png_bytes(), content_type='image/png')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
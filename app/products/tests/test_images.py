@@ -0,0 +1,142 @@
+"""Tests for product image renditions."""
+
+import io
+import shutil
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from core.models import Product
+from products import images
+from products.serializers import ProductSerializer
+from products.views import serve_rendition
+
+
+def image_file(size=(1200, 900), fmt='JPEG'):
+    """Return an in-memory image file."""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color=(200, 40, 40)).save(buffer, fmt)
+    return ContentFile(buffer.getvalue())
+
+
+def create_product(user, **params):
+    """Create and return a sample product."""
+    defaults = {
+        'name': 'Sample Product',
+        'description': 'Sample description',
+        'price': Decimal('9.99'),
+        'stock': 3,
+    }
+    defaults.update(params)
+    return Product.objects.create(user=user, **defaults)
+
+
+class ImageRenditionTests(TestCase):
+    """Test generating and serving product image renditions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.product = create_product(self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    @override_settings(JOB_BACKEND='local')
+    def test_saving_image_queues_renditions(self):
+        """Test renditions are queued once the image is committed."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.product.image.save('photo.jpg', image_file())
+
+        self.assertEqual(len(callbacks), 1)
+
+    def test_saving_without_image_change_does_not_queue(self):
+        """Test unrelated saves do not queue renditions."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.product.name = 'Renamed'
+            self.product.save()
+
+        self.assertEqual(callbacks, [])
+
+    def test_generate_renditions(self):
+        """Test each configured size is stored with hashed names."""
+        self.product.image.save('photo.jpg', image_file())
+
+        images.generate_renditions(self.product.id)
+
+        self.product.refresh_from_db()
+        renditions = self.product.image_renditions
+        self.assertEqual(renditions['source'], self.product.image.name)
+        for name, edge in {'thumbnail': 200, 'medium': 800}.items():
+            self.assertEqual(set(renditions[name]), {'webp', 'jpeg'})
+            path = renditions[name]['jpeg']
+            self.assertRegex(
+                path, rf'^products/renditions/photo.*-{name}\.[0-9a-f]{{16}}'
+            )
+            with Image.open(f'{self.media_root}/{path}') as image:
+                self.assertEqual(max(image.size), edge)
+        self.assertFalse(images.needs_renditions(self.product))
+
+    def test_renditions_in_change_feed(self):
+        """Test stored renditions list the product in the change feed."""
+        self.product.image.save('photo.jpg', image_file())
+        client = APIClient()
+        client.force_authenticate(self.user)
+        changes_url = reverse('products:catalog-changes')
+        cursor = client.get(changes_url, {'since': 0}).data['cursor']
+
+        images.generate_renditions(self.product.id)
+
+        data = client.get(changes_url, {'since': cursor}).data
+        self.assertEqual(
+            [product['id'] for product in data['products']],
+            [self.product.id])
+        self.assertIn('thumbnail', data['products'][0]['image_renditions'])
+
+    def test_serializer_returns_rendition_urls(self):
+        """Test rendition URLs are returned for the current image only."""
+        self.product.image.save('photo.jpg', image_file())
+        images.generate_renditions(self.product.id)
+        self.product.refresh_from_db()
+
+        data = ProductSerializer(self.product).data
+
+        self.assertIn('thumbnail', data['image_renditions'])
+        self.assertTrue(
+            data['image_renditions']['thumbnail']['webp'].endswith('.webp'))
+
+        self.product.image.save('other.jpg', image_file())
+        data = ProductSerializer(self.product).data
+
+        self.assertEqual(data['image_renditions'], {})
+
+    def test_serve_rendition_is_immutable(self):
+        """Test renditions are served with a long immutable lifetime."""
+        self.product.image.save('photo.jpg', image_file())
+        images.generate_renditions(self.product.id)
+        self.product.refresh_from_db()
+        path = self.product.image_renditions['thumbnail']['webp']
+        name = path[len(images.RENDITION_DIR) + 1:]
+
+        request = RequestFactory().get(f'/media/{path}')
+        res = serve_rendition(request, name)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('immutable', res['Cache-Control'])
+        self.assertIn('max-age=31536000', res['Cache-Control'])
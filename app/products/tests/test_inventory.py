@@ -0,0 +1,245 @@
+"""Tests for stock adjustments and the inventory ledger."""
+
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import InventoryMovement, Product
+from products import inventory
+from products.views import ProductViewSet
+
+
+PRODUCTS_URL = reverse('products:product-list')
+ADJUST_URL = reverse('products:product-adjust-stock')
+
+
+def detail_url(product_id):
+    return reverse('products:product-detail', args=[product_id])
+
+
+def history_url(product_id):
+    return reverse('products:product-inventory-history', args=[product_id])
+
+
+def create_product(user, **params):
+    defaults = {
+        'name': 'Sample Product',
+        'description': 'Sample description',
+        'price': Decimal('9.99'),
+        'stock': 10,
+    }
+    defaults.update(params)
+    return Product.objects.create(user=user, **defaults)
+
+
+class InventoryTests(TestCase):
+    """Test the stock adjustment functions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+
+    def test_adjust_stock_sums_deltas(self):
+        """Test deltas for the same product are combined."""
+        product = create_product(self.user)
+
+        stock = inventory.adjust_stock(
+            Product.objects.all(), [(product.id, -3), (product.id, 5)],
+            user=self.user, reason='recount',
+        )
+
+        product.refresh_from_db()
+        self.assertEqual(stock, {product.id: 12})
+        self.assertEqual(product.stock, 12)
+        movement = InventoryMovement.objects.get()
+        self.assertEqual(movement.delta, 2)
+        self.assertEqual(movement.stock_after, 12)
+        self.assertEqual(movement.reason, 'recount')
+
+    def test_adjust_stock_applies_to_current_value(self):
+        """Test a delta is added to the stock in the database, not to a
+        value read earlier."""
+        product = create_product(self.user)
+        Product.objects.filter(id=product.id).update(stock=20)
+
+        inventory.adjust_stock(Product.objects.all(), [(product.id, 1)])
+
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 21)
+
+    def test_insufficient_stock_changes_nothing(self):
+        """Test one short product rolls back the whole batch."""
+        first = create_product(self.user, stock=5)
+        second = create_product(self.user, stock=1)
+
+        with self.assertRaises(inventory.InsufficientStock) as ctx:
+            inventory.adjust_stock(
+                Product.objects.all(), [(first.id, -2), (second.id, -2)])
+
+        self.assertEqual(ctx.exception.product_ids, [second.id])
+        first.refresh_from_db()
+        self.assertEqual(first.stock, 5)
+        self.assertFalse(InventoryMovement.objects.exists())
+
+    def test_large_batch_query_count(self):
+        """Test the query count does not grow with every product."""
+        products = Product.objects.bulk_create([
+            Product(user=self.user, name=f'Product {i}', description='',
+                    price=Decimal('1.00'), stock=10)
+            for i in range(1200)
+        ])
+
+        with CaptureQueriesContext(connection) as ctx:
+            inventory.adjust_stock(
+                Product.objects.all(),
+                [(product.id, -1) for product in products],
+            )
+
+        # A few batched locks, updates and inserts (SQLite splits large
+        # inserts further), not one per product.
+        self.assertLess(len(ctx), 30)
+        self.assertEqual(
+            set(Product.objects.values_list('stock', flat=True)), {9})
+        self.assertEqual(InventoryMovement.objects.count(), 1200)
+
+
+class InventoryAPITests(TestCase):
+    """Test the stock adjustment endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_adjust_stock(self):
+        """Test adjusting a batch of products."""
+        first = create_product(self.user)
+        second = create_product(self.user, stock=2)
+        payload = {
+            'adjustments': [
+                {'product': first.id, 'delta': 4},
+                {'product': second.id, 'delta': -2},
+            ],
+            'reason': 'delivery',
+        }
+
+        res = self.client.post(ADJUST_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        products = sorted(res.data['products'], key=lambda p: p['id'])
+        self.assertEqual(products, [
+            {'id': first.id, 'stock': 14},
+            {'id': second.id, 'stock': 0},
+        ])
+        self.assertEqual(
+            InventoryMovement.objects.filter(reason='delivery').count(), 2)
+
+    def test_adjust_stock_other_users_product(self):
+        """Test products of other users are rejected."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        product = create_product(other)
+        payload = {'adjustments': [{'product': product.id, 'delta': 1}]}
+
+        res = self.client.post(ADJUST_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 10)
+
+    def test_adjust_stock_insufficient(self):
+        """Test taking more than the stock returns 409."""
+        product = create_product(self.user, stock=1)
+        payload = {'adjustments': [{'product': product.id, 'delta': -2}]}
+
+        res = self.client.post(ADJUST_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data['products'], [product.id])
+
+    def test_adjust_stock_out_of_range(self):
+        """Test deltas that would overflow the stock column return 400."""
+        product = create_product(self.user)
+        for delta in (10 ** 12, inventory.MAX_STOCK):
+            payload = {
+                'adjustments': [{'product': product.id, 'delta': delta}]}
+
+            res = self.client.post(ADJUST_URL, payload, format='json')
+
+            self.assertEqual(
+                res.status_code, status.HTTP_400_BAD_REQUEST, delta)
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 10)
+
+    def test_update_records_delta_from_stored_stock(self):
+        """Test PATCH records the change from the stock in the database,
+        not from the copy it loaded."""
+        product = create_product(self.user)
+        stale = Product.objects.get(id=product.id)
+        Product.objects.filter(id=product.id).update(stock=20)
+
+        with mock.patch.object(
+                ProductViewSet, 'get_object', return_value=stale):
+            res = self.client.patch(detail_url(product.id), {'stock': 25})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        movement = InventoryMovement.objects.get(product=product)
+        self.assertEqual((movement.delta, movement.stock_after), (5, 25))
+
+    def test_partial_update_writes_submitted_fields(self):
+        """Test PATCH leaves stock changed by others alone."""
+        product = create_product(self.user)
+        Product.objects.filter(id=product.id).update(stock=42)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(
+                detail_url(product.id), {'name': 'Renamed'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        product.refresh_from_db()
+        self.assertEqual(product.name, 'Renamed')
+        self.assertEqual(product.stock, 42)
+        update = next(
+            query['sql'] for query in ctx.captured_queries
+            if query['sql'].startswith('UPDATE "core_product"')
+        )
+        self.assertNotIn('"stock"', update)
+
+    def test_stock_changes_are_recorded(self):
+        """Test creating a product and setting its stock are logged."""
+        payload = {
+            'name': 'Lamp',
+            'description': 'A lamp',
+            'price': Decimal('19.99'),
+            'stock': 4,
+        }
+        res = self.client.post(PRODUCTS_URL, payload, format='json')
+        product_id = res.data['id']
+        self.client.patch(detail_url(product_id), {'stock': 7})
+
+        res = self.client.get(history_url(product_id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(entry['delta'], entry['stock_after']) for entry in res.data],
+            [(3, 7), (4, 4)],
+        )
@@ -0,0 +1,156 @@
+"""Tests for the denormalized product tags and categories."""
+
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Category, Product, Tag
+from products import labels
+
+
+PRODUCTS_URL = reverse('products:product-list')
+
+
+def detail_url(product_id):
+    return reverse('products:product-detail', args=[product_id])
+
+
+def create_product(user, **params):
+    defaults = {
+        'name': 'Sample Product',
+        'description': 'Sample description',
+        'price': Decimal('9.99'),
+        'stock': 3,
+    }
+    defaults.update(params)
+    return Product.objects.create(user=user, **defaults)
+
+
+class ProductLabelTests(TestCase):
+    """Test the arrays stay in step with the M2M tables."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        cls.product = create_product(cls.user)
+        cls.tag = Tag.objects.create(name='Sale', user=cls.user)
+        cls.category = Category.objects.create(name='Books', user=cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def cached(self):
+        self.product.refresh_from_db()
+        return self.product.cached_tags, self.product.cached_categories
+
+    def test_add_and_remove(self):
+        """Test adding and removing labels updates the arrays."""
+        self.product.tags.add(self.tag)
+        self.product.categories.add(self.category)
+
+        self.assertEqual(self.cached(), (
+            [{'id': self.tag.id, 'name': 'Sale', 'user': self.user.id}],
+            [{'id': self.category.id, 'name': 'Books'}],
+        ))
+
+        self.product.tags.remove(self.tag)
+
+        self.assertEqual(self.cached()[0], [])
+
+    def test_reverse_changes(self):
+        """Test changes made from the tag side update the products."""
+        self.tag.product_set.add(self.product)
+        self.assertEqual(len(self.cached()[0]), 1)
+
+        self.tag.product_set.clear()
+
+        self.assertEqual(self.cached()[0], [])
+
+    def test_rename_and_delete_label(self):
+        """Test renamed and deleted labels are rewritten."""
+        self.product.tags.add(self.tag)
+
+        self.tag.name = 'Clearance'
+        self.tag.save()
+        self.assertEqual(self.cached()[0][0]['name'], 'Clearance')
+
+        self.tag.delete()
+        self.assertEqual(self.cached()[0], [])
+
+    def test_moving_category_leaves_products(self):
+        """Test saves that keep the name do not rewrite products."""
+        self.product.categories.add(self.category)
+        parent = Category.objects.create(name='Media', user=self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.category.parent = parent
+            self.category.save()
+
+        self.assertFalse(any(
+            'UPDATE "core_product"' in query['sql']
+            for query in queries.captured_queries
+        ))
+        self.assertEqual(self.cached()[1], [
+            {'id': self.category.id, 'name': 'Books'}])
+
+    def test_api_update_keeps_arrays(self):
+        """Test updating labels through the API saves fresh arrays."""
+        payload = {'tags': [{'name': 'New'}], 'name': 'Renamed'}
+
+        res = self.client.patch(
+            detail_url(self.product.id), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([t['name'] for t in res.data['tags']], ['New'])
+        self.assertEqual(self.cached()[0][0]['name'], 'New')
+
+    def test_list_reads_one_table(self):
+        """Test listing products does not query the label tables."""
+        for i in range(3):
+            product = create_product(self.user, name=f'Product {i}')
+            product.tags.add(self.tag)
+            product.categories.add(self.category)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(res.data[0]['tags'][0]['name'], 'Sale')
+        self.assertFalse(any(
+            'core_tag' in query['sql'] or 'core_category' in query['sql']
+            for query in queries.captured_queries
+        ))
+
+    @override_settings(PRODUCT_DENORMALIZED_LABELS=False)
+    def test_list_without_arrays(self):
+        """Test the M2M tables are read when the arrays are disabled."""
+        self.product.tags.add(self.tag)
+        Product.objects.update(cached_tags=[])
+
+        res = self.client.get(PRODUCTS_URL)
+
+        self.assertEqual(res.data[0]['tags'][0]['name'], 'Sale')
+
+    def test_repair_command(self):
+        """Test the repair command rewrites drifted arrays."""
+        self.product.tags.add(self.tag)
+        Product.objects.update(cached_tags=[])
+        out = StringIO()
+
+        call_command('repair_product_labels', stdout=out)
+
+        self.assertIn('1 repaired', out.getvalue())
+        self.assertEqual(len(self.cached()[0]), 1)
+        self.assertEqual(labels.repair_labels(), (1, 0))
@@ -0,0 +1,134 @@
+"""Tests for the tag and category name cache."""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Category, Product, Tag
+from products.name_cache import category_ids, tag_ids
+
+
+PRODUCTS_URL = reverse('products:product-list')
+
+
+def label_queries(queries):
+    return [
+        query['sql'] for query in queries
+        if 'FROM "core_tag"' in query['sql']
+        or 'FROM "core_category"' in query['sql']
+    ]
+
+
+class NameCacheTests(TestCase):
+    """Test the name to id cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+
+    def setUp(self):
+        tag_ids.invalidate()
+        category_ids.invalidate()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_product(self, name='Lamp'):
+        payload = {
+            'name': name,
+            'description': 'A lamp',
+            'price': Decimal('19.99'),
+            'stock': 4,
+            'tags': [{'name': 'Home'}, {'name': 'Light'}],
+            'categories': [{'name': 'Furniture'}],
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(PRODUCTS_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return Product.objects.get(id=res.data['id'])
+
+    def test_creates_missing_labels(self):
+        """Test unknown names are created and linked."""
+        product = self.create_product()
+
+        self.assertEqual(
+            sorted(product.tags.values_list('name', flat=True)),
+            ['Home', 'Light'],
+        )
+        self.assertEqual(Category.objects.get().name, 'Furniture')
+        self.assertEqual(Tag.objects.get(name='Home').user, self.user)
+
+    def test_cached_names_need_no_lookup(self):
+        """Test a warm cache skips the tag and category queries."""
+        self.create_product('Lamp')
+
+        with CaptureQueriesContext(connection) as ctx:
+            product = self.create_product('Desk lamp')
+
+        self.assertEqual(label_queries(ctx.captured_queries), [])
+        self.assertEqual(product.tags.count(), 2)
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_rename_invalidates(self):
+        """Test renaming a tag drops the cached names."""
+        self.create_product()
+        tag = Tag.objects.get(name='Home')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.name = 'House'
+            tag.save()
+
+        self.assertEqual(tag_ids.lookup(['Home', 'Light']), {})
+        product = self.create_product('Desk lamp')
+        self.assertEqual(
+            sorted(product.tags.values_list('name', flat=True)),
+            ['Home', 'Light'],
+        )
+        self.assertNotEqual(Tag.objects.get(name='Home').id, tag.id)
+
+    def test_delete_invalidates(self):
+        """Test deleting a category drops the cached names."""
+        self.create_product()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.get(name='Furniture').delete()
+
+        self.assertEqual(category_ids.lookup(['Furniture']), {})
+        product = self.create_product('Desk lamp')
+        self.assertEqual(
+            list(product.categories.values_list('name', flat=True)),
+            ['Furniture'],
+        )
+
+    def test_rollback_is_not_cached(self):
+        """Test ids read in a rolled back transaction are not kept."""
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    tag_ids.get_or_create_ids(
+                        ['Gone'], defaults={'user': self.user})
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertEqual(tag_ids.lookup(['Gone']), {})
+        self.assertFalse(Tag.objects.filter(name='Gone').exists())
+
+    @override_settings(PRODUCT_LABEL_CACHE_SIZE=2)
+    def test_cache_is_bounded(self):
+        """Test the least recently used names are evicted."""
+        with self.captureOnCommitCallbacks(execute=True):
+            ids = tag_ids.get_or_create_ids(
+                ['a', 'b', 'c'], defaults={'user': self.user})
+
+        self.assertEqual(tag_ids.lookup(['a', 'b', 'c']),
+                         {'b': ids[1], 'c': ids[2]})
@@ -70,23 +70,25 @@ class PublicProductAPITest(TestCase):
 class PrivateProductAPITests(TestCase):
     """Test for authenticated API requests."""
 
-    def setUp(self):
-        self.client = APIClient()
-        self.user = get_user_model().objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
             email="testuser@example.com",
             password="testpass123"
         )
-        self.client.force_authenticate(user=self.user)
-
-        self.category, _ = Category.objects.get_or_create(
+        cls.category, _ = Category.objects.get_or_create(
             name="Test Category",
-            user=self.user,
+            user=cls.user,
         )
-        self.tags, created = Tag.objects.get_or_create(
+        cls.tags, created = Tag.objects.get_or_create(
             name="Sample Tag",
-            user=self.user,
+            user=cls.user,
         )
 
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
     def test_retrieve_products(self):
         """Test retrieving a list of products"""
         create_product(user=self.user)
@@ -42,8 +42,11 @@ class PublicTagAPITest(TestCase):
 class PrivateTagAPITest(TestCase):
     """Test authorized API requests."""
 
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+
     def setUp(self):
-        self.user = create_user()
         self.client = APIClient()
         self.client.force_authenticate(self.user)
 
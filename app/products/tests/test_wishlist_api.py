@@ -0,0 +1,172 @@
+"""Tests for Wishlist API."""
+
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Product, Wishlist
+
+
+WISHLIST_URL = reverse('products:wishlist-list')
+
+
+def add_products_url(wishlist_id):
+    """Create and return a wishlist add-products url."""
+    return reverse('products:wishlist-add-products', args=[wishlist_id])
+
+
+def remove_products_url(wishlist_id):
+    """Create and return a wishlist remove-products url."""
+    return reverse('products:wishlist-remove-products', args=[wishlist_id])
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a user."""
+    return get_user_model().objects.create_user(email, password)
+
+
+def create_product(user, **params):
+    """Create and return a sample product."""
+    defaults = {
+        'name': 'Sample Product',
+        'description': 'Sample description',
+        'price': Decimal('9.99'),
+        'stock': 3,
+    }
+    defaults.update(params)
+    return Product.objects.create(user=user, **defaults)
+
+
+class PrivateWishlistAPITests(TestCase):
+    """Test authenticated wishlist API requests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.wishlist = Wishlist.objects.create(user=cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_create_wishlist_validates_ids_in_one_query(self):
+        """Test creating a wishlist resolves all product ids at once."""
+        products = [create_product(self.user) for _ in range(20)]
+        payload = {'products': [p.id for p in products]}
+
+        with self.assertNumQueries(5):
+            res = self.client.post(WISHLIST_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        wishlist = Wishlist.objects.get(id=res.data['id'])
+        self.assertEqual(wishlist.user, self.user)
+        self.assertEqual(wishlist.products.count(), 20)
+
+    def test_create_wishlist_with_other_users_product_fails(self):
+        """Test products of other users are not visible."""
+        other = create_user(email='other@example.com')
+        product = create_product(other)
+
+        res = self.client.post(
+            WISHLIST_URL, {'products': [product.id]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_add_products(self):
+        """Test adding a batch of products only inserts new ones."""
+        p1 = create_product(self.user)
+        p2 = create_product(self.user)
+        self.wishlist.products.add(p1)
+
+        res = self.client.post(
+            add_products_url(self.wishlist.id),
+            {'products': [p1.id, p2.id]},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['added'], [p2.id])
+        self.assertEqual(
+            set(self.wishlist.products.values_list('id', flat=True)),
+            {p1.id, p2.id},
+        )
+
+    def test_add_products_query_count(self):
+        """Test a batch is validated and applied in constant queries."""
+        products = [create_product(self.user) for _ in range(20)]
+
+        with self.assertNumQueries(4):
+            res = self.client.post(
+                add_products_url(self.wishlist.id),
+                {'products': [p.id for p in products]},
+                format='json',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.wishlist.products.count(), 20)
+
+    def test_oversized_batch_rejected_before_lookup(self):
+        """Test batches over the limit are rejected without looking up
+        the products."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(
+                add_products_url(self.wishlist.id),
+                {'products': list(range(1, 1002))},
+                format='json',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(any(
+            'FROM "core_product"' in query['sql']
+            for query in queries.captured_queries
+        ))
+
+    def test_add_other_users_product_fails(self):
+        """Test products of other users are rejected."""
+        other = create_user(email='other@example.com')
+        product = create_product(other)
+
+        res = self.client.post(
+            add_products_url(self.wishlist.id),
+            {'products': [product.id]},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.wishlist.products.exists())
+
+    def test_remove_products(self):
+        """Test removing a batch of products from the wishlist."""
+        p1 = create_product(self.user)
+        p2 = create_product(self.user)
+        self.wishlist.products.add(p1, p2)
+
+        res = self.client.post(
+            remove_products_url(self.wishlist.id),
+            {'products': [p1.id]},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['removed'], [p1.id])
+        self.assertEqual(list(self.wishlist.products.all()), [p2])
+
+    def test_cannot_modify_other_users_wishlist(self):
+        """Test another user's wishlist is not found."""
+        other = create_user(email='other@example.com')
+        wishlist = Wishlist.objects.create(user=other)
+        product = create_product(self.user)
+
+        res = self.client.post(
+            add_products_url(wishlist.id),
+            {'products': [product.id]},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,167 @@
+"""Chunked, resumable uploads of product images."""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from rest_framework import status
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+PIL_FORMATS = {
+    'image/jpeg': 'JPEG',
+    'image/png': 'PNG',
+    'image/webp': 'WEBP',
+}
+EXTENSIONS = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/webp': 'webp',
+}
+
+
+class UploadError(Exception):
+    """Raised when an upload chunk is rejected."""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def parse_content_range(header, content_length):
+    """Return (start, end, total) for a chunk.
+
+    Without a Content-Range header the body is the whole file.
+    """
+    if not header:
+        length = int(content_length or 0)
+        if not length:
+            raise UploadError('Empty upload.')
+        return 0, length - 1, length
+    match = CONTENT_RANGE_RE.match(header)
+    if not match:
+        raise UploadError('Invalid Content-Range header.')
+    start, end, total = (int(value) for value in match.groups())
+    if start > end or end >= total:
+        raise UploadError('Invalid Content-Range header.')
+    return start, end, total
+
+
+class ResumableUpload:
+    """Upload of a product image that is written to disk as it arrives.
+
+    The bytes received so far live in a `.part` file under MEDIA_ROOT,
+    so an interrupted client can ask for the offset and carry on.
+    """
+
+    def __init__(self, product):
+        directory = Path(settings.MEDIA_ROOT) / 'uploads' / 'partial'
+        self.path = directory / f'product-{product.pk}.part'
+        self.meta_path = directory / f'product-{product.pk}.json'
+
+    @property
+    def offset(self):
+        """Number of bytes received so far."""
+        try:
+            return self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _load_meta(self):
+        try:
+            return json.loads(self.meta_path.read_text())
+        except FileNotFoundError:
+            return {}
+
+    def state(self):
+        """Return the progress of the upload."""
+        return {'offset': self.offset, 'size': self._load_meta().get('size')}
+
+    @property
+    def is_complete(self):
+        size = self._load_meta().get('size')
+        return size is not None and self.offset == size
+
+    def _start(self, size, content_type):
+        """Discard previous progress and begin a new upload."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_bytes(b'')
+        self.meta_path.write_text(
+            json.dumps({'size': size, 'content_type': content_type}))
+
+    def write_chunk(self, stream, start, end, total, content_type):
+        """Append a chunk read from `stream` to the partial file."""
+        if content_type not in PIL_FORMATS:
+            raise UploadError(
+                'Unsupported image type.',
+                status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        if total > settings.PRODUCT_IMAGE_MAX_UPLOAD_SIZE:
+            raise UploadError(
+                'Image is too large.',
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+
+        meta = self._load_meta()
+        if start == 0:
+            self._start(total, content_type)
+        elif meta != {'size': total, 'content_type': content_type}:
+            raise UploadError(
+                'Chunk does not match the upload in progress.',
+                status.HTTP_409_CONFLICT,
+            )
+        if start != self.offset:
+            raise UploadError(
+                'Chunk does not start at the current offset.',
+                status.HTTP_409_CONFLICT,
+            )
+
+        chunk_size = settings.PRODUCT_IMAGE_UPLOAD_CHUNK_SIZE
+        remaining = end - start + 1
+        with open(self.path, 'ab') as fh:
+            while remaining and stream is not None:
+                data = stream.read(min(chunk_size, remaining))
+                if not data:
+                    break
+                fh.write(data)
+                remaining -= len(data)
+
+    def finish(self):
+        """Validate the received file and store it under a hashed name.
+
+        Return the storage name of the image.
+        """
+        from PIL import Image, UnidentifiedImageError
+
+        content_type = self._load_meta()['content_type']
+        try:
+            with Image.open(self.path) as image:
+                image_format = image.format
+                image.verify()
+        except (UnidentifiedImageError, Image.DecompressionBombError,
+                OSError, SyntaxError):
+            self.discard()
+            raise UploadError('Upload is not a valid image.')
+        if image_format != PIL_FORMATS[content_type]:
+            self.discard()
+            raise UploadError('Image does not match its content type.')
+
+        digest = hashlib.sha256()
+        with open(self.path, 'rb') as fh:
+            for block in iter(lambda: fh.read(1024 * 1024), b''):
+                digest.update(block)
+        extension = EXTENSIONS[content_type]
+        name = f'products/{digest.hexdigest()[:32]}.{extension}'
+        if not default_storage.exists(name):
+            with open(self.path, 'rb') as fh:
+                name = default_storage.save(name, File(fh))
+        self.discard()
+        return name
+
+    def discard(self):
+        """Remove any partial upload state."""
+        self.path.unlink(missing_ok=True)
+        self.meta_path.unlink(missing_ok=True)
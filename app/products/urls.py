@@ -16,6 +16,8 @@ app_name = 'products'
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('changes/', views.CatalogChangesView.as_view(),
+         name='catalog-changes'),
     path('create-payment-intent/',
          views.CreateStripePaymentIntent.as_view(),
          name='create-payment-intent'),
@@ -1,55 +1,309 @@
 """Views for Product API."""
 
+import json
+from pathlib import Path
+
 from django.conf import settings
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import HttpResponse, HttpResponseNotModified
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
 from django.views.decorators.csrf import csrf_exempt
+from django.views.static import serve
 from rest_framework.response import Response
-from rest_framework import viewsets
-from drf_spectacular.utils import extend_schema
-from rest_framework.authentication import TokenAuthentication
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
-import stripe
 
-from core.models import Cart, CartItem, Category, Product, Tag, Wishlist
-from products import serializers
+from core.models import (
+    Cart,
+    CartItem,
+    CatalogChange,
+    Category,
+    Product,
+    Tag,
+    Wishlist,
+)
+from core import jobs
+from core.replicas import ReplicaReadMixin
+from products import (
+    bulk,
+    category_tree,
+    changes,
+    images,
+    inventory,
+    payments,
+    serializers,
+)
+from products.uploads import (
+    ResumableUpload,
+    UploadError,
+    parse_content_range,
+)
+from user.authentication import SignedTokenAuthentication
+
+
+class AtomicWriteMixin:
+    """Run each create, update and delete in one transaction, so the
+    change feed entries it logs commit with it."""
+
+    def create(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().create(request, *args, **kwargs)
 
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
 
-class ProductViewSet(viewsets.ModelViewSet):
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().destroy(request, *args, **kwargs)
+
+
+FIELD_PARAMETERS = [
+    OpenApiParameter(
+        'fields', str,
+        description='Comma separated fields to return; all by default.'),
+    OpenApiParameter(
+        'expand', str,
+        description=(
+            'With `fields`, tags or categories to return as objects '
+            'rather than ids.'
+        )),
+]
+
+
+class ProductViewSet(ReplicaReadMixin, AtomicWriteMixin,
+                     viewsets.ModelViewSet):
     """View for for manage Product API."""
     serializer_class = serializers.ProductSerializer
     queryset = Product.objects.all()
-    authentication_classes = [TokenAuthentication]
+    throttle_scope = 'products'
+    authentication_classes = [SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def get_serializer_class(self):
+        """Return the serializer class for request."""
+        if self.action == 'adjust_stock':
+            return serializers.StockAdjustmentBatchSerializer
+        if self.action == 'bulk':
+            if self.request.method == 'DELETE':
+                return serializers.ProductBulkDeleteSerializer
+            return serializers.ProductBulkUpdateSerializer
+        if self.action == 'inventory_history':
+            return serializers.InventoryMovementSerializer
+        return self.serializer_class
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-    def _params_to_ints(self, qs):
-        """Convert a list of strings into integers."""
-        return [int(str_id) for str_id in qs.split(',')]
+    def get_field_selection(self):
+        """Return the `fields` and `expand` parameters of a read."""
+        if self.action not in ('list', 'retrieve'):
+            return {'fields': None, 'expand': ()}
+        if not hasattr(self, '_field_selection'):
+            params = serializers.ProductFieldsSerializer(
+                data=self.request.query_params)
+            params.is_valid(raise_exception=True)
+            self._field_selection = params.validated_data
+        return self._field_selection
+
+    def get_serializer(self, *args, **kwargs):
+        if self.get_serializer_class() is self.serializer_class:
+            kwargs.update(self.get_field_selection())
+        return super().get_serializer(*args, **kwargs)
+
+    def _select_fields(self, queryset):
+        """Load only the columns and labels the response includes."""
+        selection = self.get_field_selection()
+        denormalized = settings.PRODUCT_DENORMALIZED_LABELS
+        label_fields = serializers.ProductSerializer.LABEL_FIELDS
+        if selection['fields'] is None:
+            if denormalized:
+                return queryset
+            return queryset.prefetch_related(*label_fields)
+
+        columns, lookups = [], []
+        for name in {*selection['fields'], *selection['expand']}:
+            if name in label_fields and not denormalized:
+                if name in selection['expand']:
+                    lookups.append(name)
+                else:
+                    model = Product._meta.get_field(name).related_model
+                    lookups.append(
+                        Prefetch(name, queryset=model.objects.only('id')))
+            else:
+                columns.extend(
+                    serializers.ProductSerializer.FIELD_COLUMNS[name])
+        return queryset.only(*columns).prefetch_related(*lookups)
+
+    def _filter_list(self, queryset):
+        """Apply the list's filter and ordering parameters."""
+        params = serializers.ProductFilterSerializer(
+            data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = params.validated_data
+        if 'tags' in filters:
+            queryset = queryset.filter(tags__id__in=filters['tags'])
+        if 'categories' in filters:
+            queryset = queryset.filter(
+                categories__id__in=filters['categories'])
+        if 'category_tree' in filters:
+            paths = Category.objects.filter(
+                pk__in=filters['category_tree'], user=self.request.user,
+            ).values_list('path', flat=True)
+            queryset = queryset.filter(
+                pk__in=category_tree.products_in(paths))
+        if 'min_price' in filters:
+            queryset = queryset.filter(price__gte=filters['min_price'])
+        if 'max_price' in filters:
+            queryset = queryset.filter(price__lte=filters['max_price'])
+        if filters['in_stock'] is True:
+            queryset = queryset.filter(stock__gt=0)
+        elif filters['in_stock'] is False:
+            queryset = queryset.filter(stock=0)
+        return queryset.order_by(
+            *params.ORDERINGS[filters['ordering']]).distinct()
 
     def get_queryset(self):
-        """Retrieve recipes for authenticated user."""
-        tags = self.request.query_params.get('tags')
-        categories = self.request.query_params.get('categories')
-        queryset = self.queryset
-        if tags:
-            tags_id = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tags_id)
-        if categories:
-            category_ids = self._params_to_ints(categories)
-            queryset = queryset.filter(categories__id__in=category_ids)
-        return queryset.filter(
-            user=self.request.user
-        ).order_by('-id').distinct()
-
-
-class TagViewSet(viewsets.ModelViewSet):
+        """Retrieve products for authenticated user.
+
+        Only the list takes filter parameters; other actions ignore them.
+        """
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action == 'list':
+            queryset = self._filter_list(queryset)
+        else:
+            queryset = queryset.order_by('-id')
+        return self._select_fields(queryset)
+
+    @extend_schema(parameters=[
+        OpenApiParameter(
+            'tags', str, description='Comma separated tag ids.'),
+        OpenApiParameter(
+            'categories', str, description='Comma separated category ids.'),
+        OpenApiParameter(
+            'category_tree', str,
+            description=(
+                'Comma separated category ids; matches products in them '
+                'or in any category under them.'
+            )),
+        OpenApiParameter(
+            'min_price', float, description='Lowest price to include.'),
+        OpenApiParameter(
+            'max_price', float, description='Highest price to include.'),
+        OpenApiParameter(
+            'in_stock', bool,
+            description='Only products in stock, or out of stock if false.'),
+        OpenApiParameter(
+            'ordering', str, enum=list(
+                serializers.ProductFilterSerializer.ORDERINGS),
+            description='Sort order; newest first by default.'),
+        *FIELD_PARAMETERS,
+    ])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(parameters=FIELD_PARAMETERS)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @extend_schema(
+        request={'image/*': {'type': 'string', 'format': 'binary'}},
+        description=(
+            'Upload the product image in chunks. Send each chunk with a '
+            '`Content-Range: bytes start-end/total` header; GET returns '
+            'the offset to resume from.'
+        ),
+    )
+    @action(methods=['GET', 'PUT'], detail=True, url_path='upload-image')
+    def upload_image(self, request, pk=None):
+        """Upload an image to a product, resuming partial uploads."""
+        product = self.get_object()
+        upload = ResumableUpload(product)
+        if request.method == 'GET':
+            return Response(upload.state())
+
+        content_type = request.content_type.split(';')[0].strip()
+        try:
+            start, end, total = parse_content_range(
+                request.META.get('HTTP_CONTENT_RANGE'),
+                request.META.get('CONTENT_LENGTH'),
+            )
+            upload.write_chunk(
+                request.stream, start, end, total, content_type)
+            if not upload.is_complete:
+                return Response(
+                    upload.state(), status=status.HTTP_202_ACCEPTED)
+            name = upload.finish()
+        except UploadError as exc:
+            return Response(
+                {'error': str(exc), **upload.state()},
+                status=exc.status_code,
+            )
+
+        product.image.name = name
+        product.save(update_fields=['image'])
+        return Response(self.get_serializer(product).data)
+
+    @action(methods=['POST'], detail=False, url_path='adjust-stock')
+    def adjust_stock(self, request):
+        """Apply a batch of stock deltas in one transaction."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            stock = inventory.adjust_stock(
+                Product.objects.filter(user=request.user),
+                serializer.validated_data['adjustments'],
+                user=request.user,
+                reason=serializer.validated_data['reason'],
+            )
+        except inventory.StockOutOfRange as exc:
+            return Response(
+                {'error': str(exc), 'products': exc.product_ids},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response({
+            'products': [
+                {'id': pk, 'stock': value} for pk, value in stock.items()
+            ],
+        })
+
+    @action(methods=['PATCH', 'DELETE'], detail=False)
+    def bulk(self, request):
+        """Update or delete a list of products.
+
+        PATCH takes {"items": [{"id": ..., field: value}, ...]} and
+        DELETE takes {"ids": [...]}; the response has a result per item.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if request.method == 'DELETE':
+            results = bulk.delete_products(
+                request.user, serializer.validated_data['ids'])
+        else:
+            results = bulk.update_products(
+                request.user, serializer.validated_data['items'])
+        return Response({'results': results})
+
+    @action(methods=['GET'], detail=True, url_path='inventory')
+    def inventory_history(self, request, pk=None):
+        """List the latest stock movements of a product."""
+        product = self.get_object()
+        movements = product.inventory_movements.order_by('-id')[
+            :settings.INVENTORY_HISTORY_LIMIT]
+        return Response(self.get_serializer(movements, many=True).data)
+
+
+class TagViewSet(ReplicaReadMixin, AtomicWriteMixin,
+                 viewsets.ModelViewSet):
     """Manage tags in the database."""
     serializer_class = serializers.TagSerializer
     queryset = Tag.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -64,31 +318,168 @@ class TagViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ReplicaReadMixin, AtomicWriteMixin,
+                      viewsets.ModelViewSet):
     """Manage categories in database."""
     serializer_class = serializers.CategorySerializer
     queryset = Category.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def _get_root(self, param):
+        """Return the user's category whose id is in `param`, or None."""
+        params = serializers.CategoryTreeQuerySerializer(
+            data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        if param not in params.validated_data:
+            return None
+        return get_object_or_404(
+            Category, pk=params.validated_data[param],
+            user=self.request.user)
+
     def get_queryset(self):
         """Filter queryset to authenticated user and assigned categories"""
         queryset = self.queryset.filter(user=self.request.user)
         assigned_only = bool(self.request.query_params.get('assigned_only'))
         if assigned_only:
             queryset = queryset.filter(products__isnull=False).distinct()
+        if self.action == 'list':
+            root = self._get_root('subtree')
+            if root is not None:
+                queryset = queryset.filter(
+                    category_tree.subtree_q([root.path])).order_by('path')
         return queryset
 
     def perform_create(self, serializer):
         """Create a new category"""
         serializer.save(user=self.request.user)
 
+    @extend_schema(parameters=[
+        OpenApiParameter(
+            'subtree', int,
+            description='Only this category and the ones under it.'),
+    ])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'root', int, description='Only the tree under this category.'),
+        ],
+        responses={200: {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'id': {'type': 'integer'},
+                    'name': {'type': 'string'},
+                    'children': {'type': 'array', 'items': {'type': 'object'}},
+                },
+            },
+        }},
+    )
+    @action(methods=['GET'], detail=False)
+    def tree(self, request):
+        """Return the categories nested under their parents."""
+        etag, content = category_tree.get_tree(
+            request.user, self._get_root('root'))
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+        elif request.accepted_renderer.format == 'json':
+            response = HttpResponse(content, content_type='application/json')
+        else:
+            response = Response(json.loads(content))
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            'since', int, description='Cursor returned by the last page.'),
+        OpenApiParameter(
+            'limit', int, description='Most changes to return.'),
+    ],
+    responses={
+        200: {
+            'type': 'object',
+            'properties': {
+                'cursor': {'type': 'integer'},
+                'has_more': {'type': 'boolean'},
+                'products': {'type': 'array', 'items': {'type': 'object'}},
+                'tags': {'type': 'array', 'items': {'type': 'object'}},
+                'categories': {
+                    'type': 'array', 'items': {'type': 'object'}},
+                'deleted': {
+                    'type': 'object',
+                    'additionalProperties': {
+                        'type': 'array', 'items': {'type': 'integer'}},
+                },
+            },
+        },
+    },
+)
+class CatalogChangesView(APIView):
+    """Products, tags and categories changed since a cursor.
+
+    Objects are returned in their current state, and deleted ones are
+    listed under `deleted`. Pass `cursor` back as `since` to get the next
+    page, until `has_more` is false.
+    """
+    throttle_scope = 'products'
+    authentication_classes = [SignedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = serializers.CatalogChangesQuerySerializer(
+            data=request.query_params)
+        params.is_valid(raise_exception=True)
+        page = changes.ChangePage(
+            request.user,
+            params.validated_data['since'],
+            params.validated_data.get(
+                'limit', settings.CHANGE_FEED_PAGE_SIZE),
+        )
+
+        products = Product.objects.all()
+        if not settings.PRODUCT_DENORMALIZED_LABELS:
+            products = products.prefetch_related('tags', 'categories')
+        found = {
+            CatalogChange.PRODUCT: page.objects(
+                CatalogChange.PRODUCT, products),
+            CatalogChange.TAG: page.objects(CatalogChange.TAG),
+            CatalogChange.CATEGORY: page.objects(CatalogChange.CATEGORY),
+        }
+        context = {'request': request}
+        return Response({
+            'cursor': page.cursor,
+            'has_more': page.has_more,
+            'products': serializers.ProductSerializer(
+                found[CatalogChange.PRODUCT], many=True,
+                context=context).data,
+            'tags': serializers.TagSerializer(
+                found[CatalogChange.TAG], many=True, context=context).data,
+            'categories': serializers.CategorySerializer(
+                found[CatalogChange.CATEGORY], many=True,
+                context=context).data,
+            'deleted': {
+                'products': page.deleted(
+                    CatalogChange.PRODUCT, found[CatalogChange.PRODUCT]),
+                'tags': page.deleted(
+                    CatalogChange.TAG, found[CatalogChange.TAG]),
+                'categories': page.deleted(
+                    CatalogChange.CATEGORY, found[CatalogChange.CATEGORY]),
+            },
+        })
+
 
 class CartViewSet(viewsets.ModelViewSet):
     """Manage carts in the database."""
     serializer_class = serializers.CartSerializer
     queryset = Cart.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -104,7 +495,7 @@ class CartItemViewSet(viewsets.ModelViewSet):
     """Manage items in a user's cart."""
     serializer_class = serializers.CartItemSerializer
     queryset = CartItem.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -112,23 +503,76 @@ class CartItemViewSet(viewsets.ModelViewSet):
         return self.queryset.filter(cart__user=self.request.user)
 
 
-class WishlistViewSet(viewsets.ModelViewSet):
+class WishlistViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """Manage wishlists for users."""
     serializer_class = serializers.WishlistSerializer
     queryset = Wishlist.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         """Return wishlist for the authenticated user."""
         return self.queryset.filter(user=self.request.user)
 
+    def get_serializer_class(self):
+        """Return the serializer class for request."""
+        if self.action in ('add_products', 'remove_products'):
+            return serializers.WishlistProductIdsSerializer
+        return self.serializer_class
+
     def perform_create(self, serializer):
         """Create a wishlist for the authenticated user."""
         serializer.save(user=self.request.user)
 
+    def _get_product_ids(self, request):
+        """Validate the submitted batch of product ids."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['products']
+
+    @action(methods=['POST'], detail=True, url_path='add-products')
+    def add_products(self, request, pk=None):
+        """Add a batch of products to the wishlist."""
+        wishlist = self.get_object()
+        ids = self._get_product_ids(request)
+        through = Wishlist.products.through
+        existing = set(
+            through.objects.filter(
+                wishlist=wishlist, product_id__in=ids,
+            ).values_list('product_id', flat=True)
+        )
+        added = [pk for pk in ids if pk not in existing]
+        # A concurrent add of the same product may insert it first.
+        through.objects.bulk_create([
+            through(wishlist_id=wishlist.id, product_id=pk) for pk in added
+        ], ignore_conflicts=True)
+        return Response(
+            {'id': wishlist.id, 'added': added},
+            status=status.HTTP_200_OK,
+        )
+
+    @action(methods=['POST'], detail=True, url_path='remove-products')
+    def remove_products(self, request, pk=None):
+        """Remove a batch of products from the wishlist."""
+        wishlist = self.get_object()
+        ids = self._get_product_ids(request)
+        through = Wishlist.products.through
+        memberships = through.objects.filter(
+            wishlist=wishlist, product_id__in=ids,
+        )
+        removed = list(memberships.values_list('product_id', flat=True))
+        memberships.delete()
+        return Response(
+            {'id': wishlist.id, 'removed': removed},
+            status=status.HTTP_200_OK,
+        )
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
+
+def get_stripe():
+    """Return the Stripe SDK, imported on first use since it is slow to
+    import and only the payment views need it."""
+    import stripe
+    return stripe
 
 
 @extend_schema(
@@ -165,16 +609,17 @@ stripe.api_key = settings.STRIPE_SECRET_KEY
 )
 class CreateStripePaymentIntent(APIView):
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [SignedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
         try:
             amount = int(request.data.get("amount"))
-            intent = stripe.PaymentIntent.create(
+            intent = get_stripe().PaymentIntent.create(
                 amount=amount,
                 currency='usd',
                 metadata={'user_id': request.user.id},
+                api_key=settings.STRIPE_SECRET_KEY,
             )
             return Response({
                 'client_secret': intent.client_secret
@@ -183,14 +628,19 @@ class CreateStripePaymentIntent(APIView):
             return Response({"error": str(e)}, status=400)
 
 
+# Payment events run before other background jobs.
+PAYMENT_JOB_PRIORITY = 10
+
+
 @csrf_exempt
 def stripe_webhook(request):
     payload = request.body
     sig_header = request.META.get('HTTP_STRIPE_SIGNATURE')
-    endpoint_secret = 'your_webhook_secret_from_stripe'
+    endpoint_secret = settings.STRIPE_WEBHOOK_SECRET
+    stripe = get_stripe()
 
     try:
-        event = stripe.Webhook.construct_event(
+        stripe.Webhook.construct_event(
             payload, sig_header, endpoint_secret
         )
     except ValueError as e:
@@ -200,12 +650,30 @@ def stripe_webhook(request):
         # Invalid signature
         return HttpResponse(status=400)
 
-    # Handle the event
-    if event['type'] == 'payment_intent.succeeded':
-        payment_intent = event['data']['object']
-        print('Payment succeeded:', payment_intent['id'])
-        # TODO: mark order as paid in your database
-    elif event['type'] == 'payment_intent.payment_failed':
-        print('Payment failed')
-
+    # Handle the event in the background, so Stripe gets its response
+    # right away.
+    jobs.enqueue(
+        payments.handle_stripe_event,
+        priority=PAYMENT_JOB_PRIORITY,
+        event=json.loads(payload),
+    )
     return HttpResponse(status=200)
+
+
+def serve_rendition(request, path):
+    """Serve a content-hashed image rendition with a long cache lifetime.
+
+    Rendition names change whenever their bytes change, so responses can
+    be cached as immutable.
+    """
+    response = serve(
+        request, path,
+        document_root=Path(settings.MEDIA_ROOT) / images.RENDITION_DIR,
+    )
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=settings.PRODUCT_IMAGE_CACHE_MAX_AGE,
+        immutable=True,
+    )
+    return response
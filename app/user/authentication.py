@@ -0,0 +1,35 @@
+"""Authentication for the API."""
+
+from rest_framework import authentication, exceptions
+from rest_framework.permissions import SAFE_METHODS
+
+from user import tokens
+
+
+class SignedTokenAuthentication(authentication.TokenAuthentication):
+    """Token authentication accepting signed tokens as well as database
+    tokens.
+
+    Signed tokens are verified without a database query on reads, and
+    `request.user` has only its primary key loaded. Writes load the user
+    and reject inactive or deleted ones.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if (result is None or not isinstance(result[1], dict)
+                or request.method in SAFE_METHODS):
+            return result
+        try:
+            return tokens.active_user(result[1]), result[1]
+        except tokens.TokenError as exc:
+            raise exceptions.AuthenticationFailed(str(exc))
+
+    def authenticate_credentials(self, key):
+        if not tokens.is_signed(key):
+            return super().authenticate_credentials(key)
+        try:
+            payload = tokens.verify(key, tokens.ACCESS)
+        except tokens.TokenError as exc:
+            raise exceptions.AuthenticationFailed(str(exc))
+        return tokens.user_from_payload(payload), payload
@@ -6,10 +6,13 @@ from django.contrib.auth import (
 )
 from django.utils.translation import gettext as _
 
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
 
+from core.instrumentation import TimedSerializerMixin
+from user import tokens
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = get_user_model()
         fields = ('email', 'password', 'name')
@@ -31,7 +34,7 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
-class AuthTokenSerializer(serializers.Serializer):
+class AuthTokenSerializer(TimedSerializerMixin, serializers.Serializer):
     """Serializer for the user authentication object."""
     email = serializers.EmailField()
     password = serializers.CharField(
@@ -55,3 +58,35 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs['user'] = user
         return attrs
+
+
+class RefreshTokenSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Serializer exchanging a refresh token for a new token pair."""
+    refresh = serializers.CharField()
+
+    def validate(self, attrs):
+        """Validate the refresh token and revoke it so it is used once."""
+        try:
+            payload = tokens.verify(attrs['refresh'], tokens.REFRESH)
+            user = tokens.active_user(payload)
+        except tokens.TokenError as exc:
+            raise exceptions.AuthenticationFailed(str(exc))
+
+        if not tokens.revocations.revoke(payload['jti'], payload['exp']):
+            raise exceptions.AuthenticationFailed(
+                _('Token has been revoked.'))
+
+        attrs['user'] = user
+        return attrs
+
+
+class RevokeTokenSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Serializer for an optional refresh token to revoke."""
+    refresh = serializers.CharField(required=False)
+
+    def validate_refresh(self, value):
+        """Return the payload of the refresh token."""
+        try:
+            return tokens.verify(value, tokens.REFRESH)
+        except tokens.TokenError as exc:
+            raise serializers.ValidationError(str(exc))
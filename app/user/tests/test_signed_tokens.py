@@ -0,0 +1,168 @@
+"""Tests for signed auth tokens."""
+
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user import tokens
+
+
+TOKEN_URL = reverse('user:token')
+REFRESH_URL = reverse('user:token-refresh')
+REVOKE_URL = reverse('user:token-revoke')
+ME_URL = reverse('user:me')
+PRODUCT_URL = reverse('products:product-list')
+
+
+@override_settings(
+    AUTH_TOKEN_MODE='signed',
+    PASSWORD_HASHER_OPTIONS={'pbkdf2': {'iterations': 1000}},
+)
+class SignedTokenTests(TestCase):
+    """Test issuing, using, rotating and revoking signed tokens."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def obtain(self):
+        res = self.client.post(TOKEN_URL, {
+            'email': 'test@example.com',
+            'password': 'testpass123',
+        })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def authenticate(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+    def test_obtain_token_pair(self):
+        """Test signed mode returns an access and refresh token."""
+        data = self.obtain()
+
+        self.assertIn('token', data)
+        self.assertIn('refresh', data)
+        self.assertTrue(tokens.is_signed(data['token']))
+
+    def test_access_token_authenticates_without_queries(self):
+        """Test a signed token is verified without a database lookup."""
+        self.authenticate(self.obtain()['token'])
+        self.client.get(PRODUCT_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(PRODUCT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(any(
+            'authtoken_token' in query['sql'] or 'core_user' in query['sql']
+            for query in queries.captured_queries
+        ))
+
+    def test_me_with_signed_token(self):
+        """Test the profile endpoint loads the full user."""
+        self.authenticate(self.obtain()['token'])
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], 'test@example.com')
+
+    def test_expired_token_rejected(self):
+        """Test an expired access token is rejected."""
+        token = self.obtain()['token']
+        self.authenticate(token)
+
+        with mock.patch('user.tokens.time.time',
+                        return_value=time.time() + 3600):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_token_rejected_as_access_token(self):
+        """Test a refresh token cannot authenticate requests."""
+        self.authenticate(self.obtain()['refresh'])
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_rotates_tokens(self):
+        """Test a refresh token is exchanged once for a new pair."""
+        refresh = self.obtain()['refresh']
+
+        res = self.client.post(REFRESH_URL, {'refresh': refresh})
+        reuse = self.client.post(REFRESH_URL, {'refresh': refresh})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data['refresh'], refresh)
+        self.assertEqual(reuse.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_for_inactive_user_rejected(self):
+        """Test inactive users cannot refresh their tokens."""
+        refresh = self.obtain()['refresh']
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.post(REFRESH_URL, {'refresh': refresh})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_write_by_inactive_user_rejected(self):
+        """Test writes check the user is still active."""
+        self.authenticate(self.obtain()['token'])
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.patch(ME_URL, {'name': 'New Name'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_write_by_deleted_user_rejected(self):
+        """Test writes by a deleted user are rejected, not a 500."""
+        self.authenticate(self.obtain()['token'])
+        self.user.delete()
+
+        res = self.client.post(PRODUCT_URL, {})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revoke_token(self):
+        """Test a revoked access token is rejected."""
+        data = self.obtain()
+        self.authenticate(data['token'])
+
+        res = self.client.post(REVOKE_URL, {'refresh': data['refresh']})
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            self.client.get(ME_URL).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+        res = self.client.post(REFRESH_URL, {'refresh': data['refresh']})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_TOKEN_MODE='db')
+    def test_database_tokens_still_accepted(self):
+        """Test database mode issues tokens the API accepts."""
+        token = self.obtain()['token']
+        self.assertFalse(tokens.is_signed(token))
+        self.authenticate(token)
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
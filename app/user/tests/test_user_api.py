@@ -0,0 +1,105 @@
+"""Tests for the user API."""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+CREATE_USER_URL = reverse('user:create')
+TOKEN_URL = reverse('user:token')
+ME_URL = reverse('user:me')
+
+FAST_PBKDF2 = {'pbkdf2': {'iterations': 1000}}
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+@override_settings(PASSWORD_HASHER_OPTIONS=FAST_PBKDF2)
+class PublicUserApiTests(TestCase):
+    """Test the public features of the user API."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_create_user_success(self):
+        """Test creating a user is successful."""
+        payload = {
+            'email': 'test@example.com',
+            'password': 'testpass123',
+            'name': 'Test Name',
+        }
+
+        res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        user = get_user_model().objects.get(email=payload['email'])
+        self.assertTrue(user.check_password(payload['password']))
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+        self.assertNotIn('password', res.data)
+
+    def test_create_token_for_user(self):
+        """Test generating a token for valid credentials."""
+        create_user(email='test@example.com', password='test-user-pass123')
+        payload = {
+            'email': 'test@example.com',
+            'password': 'test-user-pass123',
+        }
+
+        res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('token', res.data)
+
+    def test_create_token_bad_credentials(self):
+        """Test an error is returned for invalid credentials."""
+        create_user(email='test@example.com', password='goodpass')
+        payload = {'email': 'test@example.com', 'password': 'badpass'}
+
+        res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn('token', res.data)
+
+    def test_login_upgrades_password_hash(self):
+        """Test logging in rehashes a password with an old work factor."""
+        user = create_user(email='test@example.com', password='testpass123')
+        payload = {'email': 'test@example.com', 'password': 'testpass123'}
+
+        with override_settings(
+                PASSWORD_HASHER_OPTIONS={'pbkdf2': {'iterations': 2000}}):
+            res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+        self.assertTrue(user.check_password('testpass123'))
+
+    def test_login_upgrades_password_hasher(self):
+        """Test logging in moves a hash to the preferred hasher."""
+        user = create_user(email='test@example.com', password='testpass123')
+        with override_settings(PASSWORD_HASHERS=[
+                'django.contrib.auth.hashers.MD5PasswordHasher']):
+            user.set_password('testpass123')
+        user.save()
+        payload = {'email': 'test@example.com', 'password': 'testpass123'}
+
+        with override_settings(PASSWORD_HASHERS=[
+                'core.hashers.PBKDF2PasswordHasher',
+                'django.contrib.auth.hashers.MD5PasswordHasher']):
+            res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+
+    def test_retrieve_user_unauthorized(self):
+        """Test authentication is required for users."""
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
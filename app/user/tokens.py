@@ -0,0 +1,137 @@
+"""Stateless signed auth tokens.
+
+A signed token carries the user id, a unique id (jti), its kind and an
+expiry, and is verified with the SECRET_KEY instead of a database
+lookup. Revoked token ids are kept in a small in-memory list that is
+refreshed from the RevokedToken table every few seconds.
+
+Reads trust the token until it expires. Writes and refreshes load the
+user, so a deactivated or deleted user can only read, and only until
+their access token expires (SIGNED_TOKEN_ACCESS_LIFETIME).
+"""
+
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+
+from core.models import RevokedToken
+
+SALT = 'user.tokens'
+ACCESS = 'access'
+REFRESH = 'refresh'
+
+
+class TokenError(Exception):
+    """Raised when a signed token is invalid, expired or revoked."""
+
+
+class RevocationList:
+    """Process-local cache of revoked token ids."""
+
+    def __init__(self):
+        self._revoked = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        now = datetime.now(timezone.utc)
+        self._revoked = dict(
+            RevokedToken.objects.filter(expires_at__gt=now)
+            .values_list('jti', 'expires_at')
+        )
+        self._loaded_at = time.monotonic()
+
+    def is_revoked(self, jti):
+        stale = (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at
+            > settings.SIGNED_TOKEN_REVOCATION_REFRESH
+        )
+        if stale:
+            with self._lock:
+                self._load()
+        return jti in self._revoked
+
+    def revoke(self, jti, expires):
+        """Revoke a token; return False if it already was revoked."""
+        expires_at = datetime.fromtimestamp(expires, timezone.utc)
+        _, created = RevokedToken.objects.get_or_create(
+            jti=jti, defaults={'expires_at': expires_at})
+        self._revoked[jti] = expires_at
+        RevokedToken.objects.filter(
+            expires_at__lt=datetime.now(timezone.utc)).delete()
+        return created
+
+
+revocations = RevocationList()
+
+
+def issue(user, kind):
+    """Return a signed token of `kind` for the user."""
+    lifetime = {
+        ACCESS: settings.SIGNED_TOKEN_ACCESS_LIFETIME,
+        REFRESH: settings.SIGNED_TOKEN_REFRESH_LIFETIME,
+    }[kind]
+    return signing.dumps({
+        'uid': user.pk,
+        'jti': uuid.uuid4().hex,
+        'typ': kind,
+        'exp': int(time.time() + lifetime),
+    }, salt=SALT)
+
+
+def issue_pair(user):
+    """Return a new access and refresh token for the user."""
+    return {
+        'token': issue(user, ACCESS),
+        'refresh': issue(user, REFRESH),
+        'expires_in': settings.SIGNED_TOKEN_ACCESS_LIFETIME,
+    }
+
+
+def is_signed(token):
+    """Return True if the token looks like a signed token.
+
+    Database tokens are 40 hex characters and never contain ':'.
+    """
+    return ':' in token
+
+
+def verify(token, kind):
+    """Return the payload of a valid token of `kind`."""
+    try:
+        payload = signing.loads(token, salt=SALT)
+    except signing.BadSignature:
+        raise TokenError('Invalid token.')
+    if payload.get('typ') != kind:
+        raise TokenError('Invalid token.')
+    if payload['exp'] < time.time():
+        raise TokenError('Token has expired.')
+    if revocations.is_revoked(payload['jti']):
+        raise TokenError('Token has been revoked.')
+    return payload
+
+
+def user_from_payload(payload):
+    """Return the token's user without querying the database.
+
+    Only the primary key is loaded; other fields are fetched on first
+    access.
+    """
+    User = get_user_model()
+    return User.from_db(None, ['id'], [payload['uid']])
+
+
+def active_user(payload):
+    """Return the token's user loaded from the database, or raise
+    TokenError if the user is inactive or deleted."""
+    user = get_user_model().objects.filter(
+        pk=payload['uid'], is_active=True).first()
+    if user is None:
+        raise TokenError('User inactive or deleted.')
+    return user
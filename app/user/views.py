@@ -1,33 +1,94 @@
 """Views for the User API."""
 
-from rest_framework import generics, authentication, permissions
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework import generics, permissions, status
+from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
 
+from user import tokens
+from user.authentication import SignedTokenAuthentication
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
+    RefreshTokenSerializer,
+    RevokeTokenSerializer,
 )
 
 
 class CreateUserView(generics.CreateAPIView):
     """Create a new user in the system."""
     serializer_class = UserSerializer
+    throttle_scope = 'auth'
 
 
 class CreateTokenView(ObtainAuthToken):
     """Create a new auth token for the user."""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    throttle_scope = 'auth'
+
+    def post(self, request, *args, **kwargs):
+        """Return a token, or a signed token pair in signed mode."""
+        if settings.AUTH_TOKEN_MODE != 'signed':
+            return super().post(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(tokens.issue_pair(serializer.validated_data['user']))
+
+
+class RefreshTokenView(generics.GenericAPIView):
+    """Exchange a signed refresh token for a new token pair."""
+    serializer_class = RefreshTokenSerializer
+    authentication_classes = []
+    permission_classes = []
+    throttle_scope = 'auth'
+
+    def get_authenticate_header(self, request):
+        """Answer rejected refresh tokens with 401 rather than 403."""
+        return SignedTokenAuthentication().authenticate_header(request)
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(tokens.issue_pair(serializer.validated_data['user']))
+
+
+class RevokeTokenView(generics.GenericAPIView):
+    """Revoke the token used for the request and, optionally, a refresh
+    token."""
+    serializer_class = RevokeTokenSerializer
+    authentication_classes = [SignedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        refresh = serializer.validated_data.get('refresh')
+        if refresh:
+            tokens.revocations.revoke(refresh['jti'], refresh['exp'])
+        if isinstance(request.auth, Token):
+            request.auth.delete()
+        elif request.auth:
+            tokens.revocations.revoke(
+                request.auth['jti'], request.auth['exp'])
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [SignedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         """Retrieve and return authenticated user."""
-        return self.request.user
+        user = self.request.user
+        if user.get_deferred_fields():
+            # Signed tokens only carry the user id.
+            user = get_user_model().objects.get(pk=user.pk)
+        return user